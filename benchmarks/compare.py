@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import argparse
+import json
+
+"""
+Compare the timings of two benchmark runs (see benchmarks.run):
+
+    python -m benchmarks.compare old.json new.json
+"""
+
+
+def load_timings(path):
+    with open(path, 'r') as fid:
+        results = json.load(fid)
+    return {(b['topology'], b['n_reactions']): b['timings']
+            for b in results['benchmarks']}
+
+
+def compare(old_path, new_path, threshold=1.2):
+    """
+    Print the ratio new/old of the timings of the models in both runs
+
+    :param threshold: ratios above the threshold are flagged as regressions
+    :return: list of the regressions as (topology, n_reactions, phase, ratio)
+    """
+    old = load_timings(old_path)
+    new = load_timings(new_path)
+
+    regressions = []
+    for key in sorted(set(old) & set(new)):
+        for phase, new_time in new[key].items():
+            old_time = old[key].get(phase)
+            if not old_time:
+                continue
+            ratio = new_time / old_time
+            flag = ''
+            if ratio > threshold:
+                flag = ' <- regression'
+                regressions.append(key + (phase, ratio))
+            print('{} {} {}: {:.3f} s -> {:.3f} s ({:.2f}x){}'.format(
+                key[0], key[1], phase, old_time, new_time, ratio, flag))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two benchmark runs')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args(argv)
+    return compare(args.old, args.new, threshold=args.threshold)
+
+
+if __name__ == '__main__':
+    main()
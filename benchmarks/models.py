@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from skimpy.core import Reaction, KineticModel, ConstantConcentration
+from skimpy.mechanisms import ReversibleMichaelisMenten, make_convenience
+
+"""
+Synthetic kinetic models of increasing size for the benchmarks. Every
+builder returns the model with a flux and a concentration dict that are a
+thermodynamically consistent steady state (all concentrations equal to one
+and k_equilibrium = 2 with positive fluxes), such that the model can be
+sampled.
+"""
+
+K_EQUILIBRIUM = 2.0
+CONCENTRATION = 1.0
+
+
+def build_linear_model(n_reactions):
+    """
+    Linear pathway M_0 -> M_1 -> ... -> M_n with reversible Michaelis-Menten
+    kinetics and constant concentrations of M_0 and M_n
+
+    :param n_reactions: number of reactions
+    :return: tuple (model, flux_dict, concentration_dict)
+    """
+    this_model = KineticModel(name='linear_{}'.format(n_reactions))
+    flux_dict = dict()
+
+    for i in range(n_reactions):
+        name = 'R_{}'.format(i)
+        reactants = ReversibleMichaelisMenten.Reactants(substrate='M_{}'.format(i),
+                                                        product='M_{}'.format(i + 1))
+        _add_reaction(this_model, name, ReversibleMichaelisMenten, reactants)
+        flux_dict[name] = 1.0
+
+    _add_boundaries(this_model, ['M_0', 'M_{}'.format(n_reactions)])
+
+    return _finalize(this_model, flux_dict)
+
+
+def build_branched_model(n_reactions):
+    """
+    Main chain M_0 -> M_1 -> ... where every intermediate M_i+1 has a side
+    branch to a constant sink S_i. The flux through the main chain decreases
+    by one at every branch point.
+
+    :param n_reactions: number of reactions (rounded up to an even number)
+    :return: tuple (model, flux_dict, concentration_dict)
+    """
+    n_branches = max(1, (n_reactions + 1) // 2)
+    this_model = KineticModel(name='branched_{}'.format(2*n_branches))
+    flux_dict = dict()
+
+    sinks = []
+    for i in range(n_branches):
+        main = 'R_{}'.format(i)
+        reactants = ReversibleMichaelisMenten.Reactants(substrate='M_{}'.format(i),
+                                                        product='M_{}'.format(i + 1))
+        _add_reaction(this_model, main, ReversibleMichaelisMenten, reactants)
+        flux_dict[main] = float(n_branches - i)
+
+        side = 'B_{}'.format(i)
+        sink = 'S_{}'.format(i)
+        reactants = ReversibleMichaelisMenten.Reactants(substrate='M_{}'.format(i + 1),
+                                                        product=sink)
+        _add_reaction(this_model, side, ReversibleMichaelisMenten, reactants)
+        flux_dict[side] = 1.0
+        sinks.append(sink)
+
+    _add_boundaries(this_model, ['M_0'] + sinks)
+
+    return _finalize(this_model, flux_dict)
+
+
+def build_moiety_model(n_reactions, reactions_per_moiety=10):
+    """
+    Linear pathway X_0 -> X_1 -> ... where the reactions are coupled to
+    cofactor pairs (A_k, B_k). Consecutive reactions use the same pair in
+    opposite directions such that each pair is a conserved moiety.
+
+    :param n_reactions: number of reactions
+    :param reactions_per_moiety: number of reactions that share a cofactor pair
+    :return: tuple (model, flux_dict, concentration_dict)
+    """
+    TheMechanism = make_convenience([-1, -1, 1, 1])
+    TheUncoupledMechanism = make_convenience([-1, 1])
+
+    n_moieties = max(1, n_reactions // reactions_per_moiety)
+    this_model = KineticModel(name='moiety_{}'.format(n_reactions))
+    flux_dict = dict()
+
+    for i in range(n_reactions):
+        name = 'R_{}'.format(i)
+        substrate = 'X_{}'.format(i)
+        product = 'X_{}'.format(i + 1)
+
+        if i == n_reactions - 1 and i % 2 == 0:
+            # An odd reaction at the end would not balance its cofactors
+            reactants = TheUncoupledMechanism.Reactants(substrate1=substrate,
+                                                        product1=product)
+            _add_reaction(this_model, name, TheUncoupledMechanism, reactants)
+        else:
+            moiety = (i // 2) % n_moieties
+            cofactors = ['A_{}'.format(moiety), 'B_{}'.format(moiety)]
+            if i % 2:
+                cofactors.reverse()
+            reactants = TheMechanism.Reactants(substrate1=substrate,
+                                               substrate2=cofactors[0],
+                                               product1=product,
+                                               product2=cofactors[1])
+            _add_reaction(this_model, name, TheMechanism, reactants)
+
+        flux_dict[name] = 1.0
+
+    _add_boundaries(this_model, ['X_0', 'X_{}'.format(n_reactions)])
+
+    return _finalize(this_model, flux_dict)
+
+
+MODEL_BUILDERS = {'linear': build_linear_model,
+                  'branched': build_branched_model,
+                  'moiety': build_moiety_model}
+
+
+def _add_reaction(model, name, mechanism, reactants):
+    reaction = Reaction(name=name, mechanism=mechanism, reactants=reactants)
+    model.add_reaction(reaction)
+
+
+def _add_boundaries(model, reactants):
+    for this_reactant in reactants:
+        the_boundary_condition = ConstantConcentration(model.reactants[this_reactant])
+        model.add_boundary_condition(the_boundary_condition)
+
+
+def _finalize(model, flux_dict):
+    model.parametrize_by_reaction(
+        {name: reaction.mechanism.__class__.Parameters(k_equilibrium=K_EQUILIBRIUM)
+         for name, reaction in model.reactions.items()})
+
+    # The concentrations of the boundaries are parameters of the model
+    concentration_dict = {k: CONCENTRATION for k in model.reactants}
+    concentration_dict.update({bc.reactant.name: CONCENTRATION
+                               for bc in model.boundary_conditions.values()})
+
+    return model, flux_dict, concentration_dict
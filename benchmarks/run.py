@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from contextlib import contextmanager
+
+import numpy as np
+
+from skimpy.io.yaml import export_to_yaml, load_yaml_model
+from skimpy.sampling.simple_parameter_sampler import SimpleParameterSampler
+from skimpy.utils import TabDict
+from skimpy.utils.namespace import QSSA
+
+from benchmarks.models import MODEL_BUILDERS
+
+"""
+Time the phases of the modelling pipeline on the synthetic models and write
+the results to a json file, such that the performance of two commits can be
+compared offline:
+
+    python -m benchmarks.run --sizes 10 100 1000 --output results.json
+"""
+
+DEFAULT_SIZES = [10, 100, 1000]
+
+
+@contextmanager
+def timer(timings, phase):
+    start = time.time()
+    yield
+    timings[phase] = time.time() - start
+
+
+def run_benchmark(topology, n_reactions, n_samples=10, n_evaluations=100):
+    """
+    Time the phases for one synthetic model
+
+    :param topology: key of MODEL_BUILDERS
+    :param n_reactions: number of reactions of the model
+    :param n_samples: number of parameter samples
+    :param n_evaluations: number of calls to time the rhs and the jacobian
+    :return: dict with the model size and the timings in seconds
+    """
+    timings = dict()
+
+    with timer(timings, 'build'):
+        model, flux_dict, concentration_dict = MODEL_BUILDERS[topology](n_reactions)
+
+    with timer(timings, 'prepare'):
+        model.prepare(mca=True)
+
+    parameter_list = TabDict([(k, p.symbol) for k, p in model.parameters.items()
+                              if p.name.startswith('vmax_forward')])
+
+    # The mca functions need to be compiled before the ode function
+    with timer(timings, 'compile_mca'):
+        model.compile_mca(sim_type=QSSA, parameter_list=parameter_list, lazy=False)
+        model.warmup(['independent_elasticity_fun',
+                      'dependent_elasticity_fun',
+                      'parameter_elasticities_fun'])
+
+    with timer(timings, 'compile_ode'):
+        model.compile_ode(sim_type=QSSA, lazy=False)
+        model.warmup(['ode_fun'])
+
+    sampler = SimpleParameterSampler(SimpleParameterSampler.Parameters(n_samples=n_samples))
+    with timer(timings, 'sampling'):
+        parameter_population = sampler.sample(model, flux_dict, concentration_dict,
+                                              only_stable=False)
+
+    # Evaluate the model at the first sample
+    parameters = parameter_population[0]
+    model.parameters = parameters
+
+    fluxes = [flux_dict[r] for r in model.reactions]
+    concentrations = np.array([concentration_dict[x] for x in model.variables])
+
+    model.ode_fun.get_parames()
+    ydot = np.zeros(len(concentrations))
+    with timer(timings, 'rhs'):
+        for _ in range(n_evaluations):
+            model.ode_fun(0.0, concentrations, ydot)
+
+    with timer(timings, 'jacobian'):
+        for _ in range(n_evaluations):
+            model.jacobian_fun(fluxes, concentrations, parameters)
+
+    with timer(timings, 'mca'):
+        model.flux_control_fun(flux_dict, concentration_dict, parameter_population)
+
+    fid, path = tempfile.mkstemp(suffix='.yaml')
+    os.close(fid)
+    try:
+        with timer(timings, 'yaml_export'):
+            export_to_yaml(model, path)
+        with timer(timings, 'yaml_load'):
+            load_yaml_model(path)
+    finally:
+        os.remove(path)
+
+    return {'topology': topology,
+            'n_reactions': len(model.reactions),
+            'n_variables': len(model.variables),
+            'n_samples': n_samples,
+            'n_evaluations': n_evaluations,
+            'timings': timings,
+            'sampling_throughput': n_samples / timings['sampling'],
+            'rhs_per_call': timings['rhs'] / n_evaluations,
+            'jacobian_per_call': timings['jacobian'] / n_evaluations,
+            }
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))
+                                       ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the modelling pipeline '
+                                                 'on synthetic models')
+    parser.add_argument('--topologies', nargs='+', default=sorted(MODEL_BUILDERS),
+                        choices=sorted(MODEL_BUILDERS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help='number of reactions, e.g. 10 100 1000 5000')
+    parser.add_argument('--samples', type=int, default=10)
+    parser.add_argument('--evaluations', type=int, default=100)
+    parser.add_argument('--output', default='benchmark.json')
+    args = parser.parse_args(argv)
+
+    results = {'commit': get_commit(),
+               'python': sys.version,
+               'platform': platform.platform(),
+               'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'benchmarks': []}
+
+    for topology in args.topologies:
+        for n_reactions in args.sizes:
+            this_result = run_benchmark(topology, n_reactions,
+                                        n_samples=args.samples,
+                                        n_evaluations=args.evaluations)
+            results['benchmarks'].append(this_result)
+            print('{} {}: {}'.format(topology, n_reactions,
+                                     ', '.join('{} {:.3f} s'.format(k, v)
+                                               for k, v in this_result['timings'].items())))
+
+            # Write after each model such that long runs can be inspected
+            with open(args.output, 'w') as fid:
+                json.dump(results, fid, indent=1)
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,7 @@ from scipy.sparse import diags
 from scipy.sparse.linalg import inv as sparse_inv
 
 from skimpy.utils.tensor import Tensor
+from skimpy.utils.profiling import timed
 
 class ConcentrationControlFunction:
     def __init__(self,
@@ -53,7 +54,12 @@ class ConcentrationControlFunction:
         self.dependent_variable_ix = dependent_variable_ix
         self.conservation_relation = conservation_relation
 
-    def __call__(self,  flux_dict, concentration_dict, parameter_population):
+    @timed('mca.concentration_control')
+    def __call__(self,  flux_dict, concentration_dict, parameter_population, parameter_list=None):
+        """
+        :param parameter_list: optional subset of the compiled parameters, only the
+                               control coefficients for these parameters are computed
+        """
 
         # Calculate the Concentration Control coefficients
         # Log response of the concentration with respect to the log change in a Parameter
@@ -66,7 +72,12 @@ class ConcentrationControlFunction:
         # Only consider independent concentrations
         concentrations = [concentration_dict[r] for r in self.model.reactants]
 
-        num_parameters = len(self.parameter_elasticity_function.expressions)
+        if parameter_list is None:
+            parameter_list = list(self.parameter_elasticity_function.respective_variables)
+        else:
+            parameter_list = list(parameter_list)
+
+        num_parameters = len(parameter_list)
         num_concentration = len(self.independent_variable_ix)
         population_size = len(parameter_population)
 
@@ -103,7 +114,9 @@ class ConcentrationControlFunction:
             N_E_V = self.reduced_stoichometry.dot(flux_matrix).dot(elasticity_matrix)
             N_E_V_inv = sparse_inv(N_E_V)
 
-            parameter_elasticity_matrix = self.parameter_elasticity_function(concentrations, parameters)
+            parameter_elasticity_matrix = self.parameter_elasticity_function(concentrations,
+                                                                             parameters,
+                                                                             parameter_list)
 
             N_E_P = self.reduced_stoichometry.dot(flux_matrix).dot(parameter_elasticity_matrix)
 
@@ -112,7 +125,7 @@ class ConcentrationControlFunction:
 
         concentration_index = pd.Index([self.model.reactants.iloc(i)[0] for i in self.independent_variable_ix],
                                        name="concentration")
-        parameter_index = pd.Index(self.parameter_elasticity_function.respective_variables, name="parameter")
+        parameter_index = pd.Index(parameter_list, name="parameter")
         sample_index = pd.Index(range(population_size), name="sample")
 
         tensor_ccc = Tensor(concentration_control_coefficients, [concentration_index,parameter_index,sample_index])
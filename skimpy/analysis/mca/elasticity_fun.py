@@ -25,7 +25,7 @@ limitations under the License.
 
 """
 import numpy as np
-from numpy import array, double, reciprocal,zeros
+from numpy import array, double, reciprocal, zeros, ones
 from numpy import append as append_array
 
 # Test wise
@@ -39,11 +39,13 @@ from scipy.sparse.linalg import inv as sparse_inv
 from sympy import symbols,Symbol
 
 from skimpy.utils.tabdict import TabDict
-from skimpy.utils.compile_sympy import make_cython_function
+from skimpy.utils.compile_sympy import make_cython_function, \
+    make_cython_unit_function, RebuildReport
 from skimpy.utils.general import robust_index
 
 class ElasticityFunction:
-    def __init__(self, expressions, respective_variables, variables,  parameters, shape, pool=None):
+    def __init__(self, expressions, respective_variables, variables,  parameters, shape, pool=None,
+                 units=None, report_name='elasticities'):
         """
         Constructor for a precompiled function to compute elasticities
         numerically
@@ -54,9 +56,12 @@ class ElasticityFunction:
                             e.g: (1,1)
         :param parameters:  list of parameter names
         :param shape: Tuple defining the over all matrix size e.g (10,30)
+        :param units: optional list of code units (name, fingerprint, expressions,
+                      coordinates) to build the function from
 
         """
         self.respective_variables = respective_variables
+        self.respective_variable_index = {k: i for i, k in enumerate(respective_variables)}
         self.variables = variables
         self.expressions = expressions
         self.parameters = parameters
@@ -81,18 +86,53 @@ class ElasticityFunction:
         # self.function = theano_function(sym_vars, expressions,
         #                                 on_unused_input='ignore')
 
-        self.function = make_cython_function(sym_vars, expressions, pool=pool, simplify=True)
+        if units is None:
+            self.function = make_cython_function(sym_vars, expressions, pool=pool, simplify=True)
+            self.rebuild_report = None
+        else:
+            unit_position = {coord: (u, k) for u, unit in enumerate(units)
+                             for k, coord in enumerate(unit[3])}
+            outputs = [[unit_position[coord] + (1.0,)] for coord in coordinates]
+
+            self.rebuild_report = RebuildReport(report_name)
+            self.function = make_cython_unit_function(sym_vars,
+                                                      [unit[:3] for unit in units],
+                                                      outputs,
+                                                      pool=pool,
+                                                      report=self.rebuild_report)
+
+    @classmethod
+    def from_kernel(cls, kernel, respective_variables, variables, parameters,
+                    rows, columns, shape):
+        """
+        Elasticity function of a compiled kernel without the expressions,
+        e.g. loaded from a model bundle
+        """
+        self = cls.__new__(cls)
+        self.respective_variables = respective_variables
+        self.respective_variable_index = {k: i for i, k in enumerate(respective_variables)}
+        self.variables = variables
+        self.expressions = None
+        self.parameters = parameters
+        self.shape = shape
+        self.rows = rows
+        self.columns = columns
+        self.function = kernel
+        self.rebuild_report = None
+        return self
 
-    def __call__(self, variables, parameters):
+    def __call__(self, variables, parameters, respective_variables=None):
         """
         Return a sparse matrix type with elasticity values
+        :param respective_variables: optional subset of the respective variables,
+                                     only these columns are returned
         """
         parameter_values = array([parameters[x] for x in
                                   self.parameters.values()], dtype=double)
 
         input_vars = append_array(variables , parameter_values)
 
-        values = array(zeros(len(self.expressions)),dtype=double)
+        values = array(zeros(len(self.rows)),dtype=double)
 
         self.function(input_vars, values)
 
@@ -100,8 +140,35 @@ class ElasticityFunction:
                                       (self.rows, self.columns)),
                                        shape=self.shape).tocsc()
 
+        if respective_variables is not None:
+            elasticiy_matrix = elasticiy_matrix[:, self.get_column_index(respective_variables)]
+
         return elasticiy_matrix
 
+    def warmup(self):
+        """
+        Compile the cython kernel by evaluating it once with the
+        argument types used in __call__
+        """
+        input_vars = ones(len(self.variables)+len(self.parameters), dtype=double)
+        values = zeros(len(self.rows), dtype=double)
+        try:
+            self.function(input_vars, values)
+        except ArithmeticError:
+            pass
+
+    def get_column_index(self, respective_variables):
+        """
+        Column positions of a subset of the respective variables
+        :param respective_variables: iterable of respective variable names
+        :return: list of column indices
+        """
+        try:
+            return [self.respective_variable_index[k] for k in respective_variables]
+        except KeyError as e:
+            raise KeyError('{} is not a respective variable of the elasticity function'
+                           .format(e.args[0]))
+
     def get_dependent_weights(self, concentration_vector, L0, all_independent_ix, all_dependent_ix):
 
         # TODO This derivation does not allow cross dependencies of dependent metabolites!
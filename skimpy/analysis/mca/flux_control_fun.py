@@ -32,6 +32,7 @@ from scipy.sparse import diags
 from scipy.sparse.linalg import inv as sparse_inv
 
 from skimpy.utils.tensor import Tensor
+from skimpy.utils.profiling import timed
 
 
 class FluxControlFunction:
@@ -57,7 +58,12 @@ class FluxControlFunction:
 
         self.concentration_control_fun = concentration_control_fun
 
-    def __call__(self, flux_dict, concentration_dict, parameter_population):
+    @timed('mca.flux_control')
+    def __call__(self, flux_dict, concentration_dict, parameter_population, parameter_list=None):
+        """
+        :param parameter_list: optional subset of the compiled parameters, only the
+                               control coefficients for these parameters are computed
+        """
 
         # Calculate the Flux Control coefficients
         # Log response of the concentration with respect to the log change in a Parameter
@@ -68,7 +74,12 @@ class FluxControlFunction:
         fluxes = [flux_dict[r] for r in self.model.reactions]
         concentrations = [concentration_dict[r] for r in self.model.reactants]
 
-        num_parameters = len(self.parameter_elasticity_function.respective_variables)
+        if parameter_list is None:
+            parameter_list = list(self.parameter_elasticity_function.respective_variables)
+        else:
+            parameter_list = list(parameter_list)
+
+        num_parameters = len(parameter_list)
         num_fluxes = len(fluxes)
         population_size = len(parameter_population)
 
@@ -97,15 +108,18 @@ class FluxControlFunction:
                 elasticity_matrix += self.dependent_elasticity_function(concentrations, parameters)\
                                      .dot(dependent_weights)
 
-            C_Xi_P = self.concentration_control_fun(flux_dict, concentration_dict, [parameters])._data
+            C_Xi_P = self.concentration_control_fun(flux_dict, concentration_dict, [parameters],
+                                                    parameter_list)._data
 
-            parameter_elasticity_matrix = self.parameter_elasticity_function(concentrations, parameters)
+            parameter_elasticity_matrix = self.parameter_elasticity_function(concentrations,
+                                                                             parameters,
+                                                                             parameter_list)
 
             this_cc = elasticity_matrix.dot(C_Xi_P[:,:,0]) + parameter_elasticity_matrix
             flux_control_coefficients[:,:,i] = this_cc
 
         flux_index = pd.Index(self.model.reactions.keys(), name="flux")
-        parameter_index = pd.Index(self.parameter_elasticity_function.respective_variables, name="parameter")
+        parameter_index = pd.Index(parameter_list, name="parameter")
         sample_index = pd.Index(range(population_size), name="sample")
 
         tensor_fcc = Tensor(flux_control_coefficients, [flux_index,parameter_index,sample_index])
@@ -30,6 +30,8 @@ from numpy import array
 from scipy.sparse import diags
 from scipy.sparse.linalg import inv as sparse_inv
 
+from skimpy.utils.profiling import timed
+
 
 class JacobianFunction:
     def __init__(self,
@@ -48,6 +50,7 @@ class JacobianFunction:
         self.dependent_variable_ix = dependent_variable_ix
         self.conservation_relation = conservation_relation
 
+    @timed('mca.jacobian')
     def __call__(self, fluxes, concentrations, parameters):
         """
         :param fluxes: `Dict` or `pd.Series` of reference flux vector
@@ -29,15 +29,26 @@ from skimpy.analysis.mca.elasticity_fun import ElasticityFunction
 from skimpy.analysis.mca.utils import get_dlogx_dlogy
 from skimpy.utils import iterable_to_tabdict
 from skimpy.utils.general import join_dicts
+from skimpy.utils.parallel import map_with_shared_state
 from skimpy.utils.namespace import QSSA, PARAMETER, TQSSA, ELEMENTARY
+from skimpy.utils.compile_sympy import get_fingerprint
+from skimpy.utils.lazy import LazyFunction
+from skimpy.utils.profiling import timed
+
+from collections import OrderedDict
 
 from skimpy.utils import TabDict, iterable_to_tabdict
 
+# Derived elasticity rows indexed by their fingerprint
+ELASTICITY_UNIT_CACHE = OrderedDict()
+ELASTICITY_UNIT_CACHE_SIZE = 100000
+
+@timed('mca.derivation')
 def make_mca_functions(kinetic_model,parameter_list,sim_type):
     """ Create the elasticity and flux functions for MCA
     :param kinmodel:
     :param parameter_list:
-    :return:
+    :return: LazyFunction handles of the elasticity functions, built on first use
     """
 
     # Get all variables and expressions (Better solution with types?)
@@ -81,6 +92,14 @@ def make_mca_functions(kinetic_model,parameter_list,sim_type):
     all_flux_expressions = [this_reaction.mechanism.reaction_rates['v_net'] \
                            for this_reaction in kinetic_model.reactions.values()]
 
+    reaction_names = list(kinetic_model.reactions.keys())
+
+    # Closed form log-elasticities provided by the mechanisms, the modifiers
+    # change the rate expressions such that these are not valid anymore
+    all_log_elasticities = [this_reaction.mechanism.get_log_elasticities()
+                            if not this_reaction.modifiers else None
+                            for this_reaction in kinetic_model.reactions.values()]
+
     all_expr, all_parameters = list(zip(*all_data))
 
     # Flatten all the lists
@@ -92,7 +111,8 @@ def make_mca_functions(kinetic_model,parameter_list,sim_type):
 
     # Sort into an ordered list
     all_parameters = flatten_list(all_parameters)
-    all_parameters = list(set(all_parameters))
+    # Sorted to generate the same kernel code in every session
+    all_parameters = sorted(set(all_parameters), key=str)
     all_parameters = iterable_to_tabdict(all_parameters, use_name=False)
 
     all_variables = TabDict([(k, v.symbol) for k, v in kinetic_model.reactants.items()])
@@ -103,72 +123,119 @@ def make_mca_functions(kinetic_model,parameter_list,sim_type):
                                        if e in kinetic_model.dependent_variables_ix])
 
 
+    # The elasticities are derived and the code is generated on first use
+    def make_lazy_elasticity_fun(respective_variables, report_name):
+        def build_elasticity_fun():
+            return make_elasticity_fun(all_flux_expressions,
+                                       respective_variables,
+                                       all_variables,
+                                       all_parameters,
+                                       kinetic_model.pool,
+                                       all_log_elasticities,
+                                       reaction_names,
+                                       report_name)
+
+        respective_variable_index = {k: i for i, k in enumerate(respective_variables)}
+        return LazyFunction(build_elasticity_fun,
+                            name=report_name,
+                            respective_variables=respective_variables,
+                            respective_variable_index=respective_variable_index)
+
     #parameter elasticity function
     if parameter_list:
-        parameter_elasticities_fun = make_elasticity_fun(all_flux_expressions,
-                                                         parameter_list,
-                                                         all_variables,
-                                                         all_parameters,
-                                                         kinetic_model.pool
-                                                         )
+        parameter_elasticities_fun = make_lazy_elasticity_fun(parameter_list,
+                                                              'parameter_elasticities')
     else:
         parameter_elasticities_fun = None
 
     #concentration elasticity functions
-    independent_elasticity_fun = make_elasticity_fun(all_flux_expressions,
-                                                      all_independent_variables,
-                                                      all_variables,
-                                                      all_parameters,
-                                                      kinetic_model.pool
-                                                     )
+    independent_elasticity_fun = make_lazy_elasticity_fun(all_independent_variables,
+                                                          'independent_elasticities')
 
     if all_dependent_variables:
-        dependent_elasticity_fun = make_elasticity_fun(all_flux_expressions,
-                                                        all_dependent_variables,
-                                                        all_variables,
-                                                        all_parameters,
-                                                        kinetic_model.pool
-                                                       )
+        dependent_elasticity_fun = make_lazy_elasticity_fun(all_dependent_variables,
+                                                            'dependent_elasticities')
     else:
         dependent_elasticity_fun = None
 
     return independent_elasticity_fun, dependent_elasticity_fun, parameter_elasticities_fun
 
 
-def make_elasticity_fun(expressions, respective_variables, variables, parameters, pool=None):
+@timed('mca.build')
+def make_elasticity_fun(expressions, respective_variables, variables, parameters,
+                        pool=None, log_elasticities=None, names=None, report_name='elasticities'):
     """
     Create an ElasticityFunction with elasticity = dlog(expression)/dlog(respective_variable)
     :param expressions  tab_dict of expressions (e.g. forward and backward fluxes)
     :param variables    list of variables as string (e.g. concentrations or parameters)
+    :param log_elasticities  optional list of dicts (or None) with closed form
+                             elasticities per expression, missing entries are
+                             derived symbolically
+    :param names        optional names of the expressions used in the rebuild report
 
+    Every row of the elasticity matrix is a code unit, rows that have been
+    derived before are taken from the cache.
     """
-    if pool is None:
-        elasticity_fun = make_elasticity_fun_single_cpu(expressions,
-                                                       respective_variables,
-                                                       variables,
-                                                       parameters)
-    else:
-        elasticity_fun = make_elasticity_fun_multicore(expressions,
-                                                      respective_variables,
-                                                      variables,
-                                                      parameters,
-                                                      pool)
-
-
-    return elasticity_fun
+    if names is None:
+        names = [str(row) for row, _ in enumerate(expressions)]
 
+    known_elasticities = get_known_elasticities(expressions,
+                                                respective_variables,
+                                                log_elasticities)
 
-def make_elasticity_fun_single_cpu(expressions,respective_variables ,variables, parameters):
-    # Get the derivative of expression x vs variable y
-    elasticity_expressions = {}
+    respective_symbols = list(respective_variables.values())
 
+    row_keys = []
+    missing_rows = []
     for row, this_expression in enumerate(expressions):
-
-        for column,this_variable in enumerate(respective_variables.values()):
-
-            if this_variable in this_expression.free_symbols:
-                this_elasticity = get_dlogx_dlogy(this_expression, this_variable)
-                elasticity_expressions[(row, column)] = this_elasticity
+        columns = [column for column, this_variable in enumerate(respective_symbols)
+                   if this_variable in this_expression.free_symbols]
+        known_columns = [column for column in columns
+                         if (row, column) in known_elasticities]
+
+        fingerprint = get_fingerprint(this_expression,
+                                      *[respective_symbols[c] for c in columns],
+                                      'known:{}'.format([respective_symbols[c]
+                                                         for c in known_columns]))
+        row_keys.append((fingerprint, columns))
+
+        if fingerprint in ELASTICITY_UNIT_CACHE:
+            ELASTICITY_UNIT_CACHE.move_to_end(fingerprint)
+        else:
+            missing_rows.append((row, this_expression, set(known_columns)))
+
+    # Derive the rows that are not cached
+    if pool is None:
+        row_slices = [make_elasticity_single_row((row, this_expression,
+                                                  respective_variables, known_columns))
+                      for row, this_expression, known_columns in missing_rows]
+    else:
+        # The respective variables are send only once to each worker
+        row_slices = map_with_shared_state(_make_elasticity_single_row,
+                                           missing_rows,
+                                           respective_variables,
+                                           pool=pool,
+                                           phase='elasticities')
+
+    derived_elasticities = join_dicts(row_slices)
+    derived_elasticities.update(known_elasticities)
+
+    for row, _, _ in missing_rows:
+        fingerprint, columns = row_keys[row]
+        ELASTICITY_UNIT_CACHE[fingerprint] = [derived_elasticities[(row, column)]
+                                              for column in columns]
+
+    while len(ELASTICITY_UNIT_CACHE) > ELASTICITY_UNIT_CACHE_SIZE:
+        ELASTICITY_UNIT_CACHE.popitem(last=False)
+
+    # Assemble the units
+    units = []
+    elasticity_expressions = {}
+    for row, (fingerprint, columns) in enumerate(row_keys):
+        unit_expressions = ELASTICITY_UNIT_CACHE[fingerprint]
+        coordinates = [(row, column) for column in columns]
+        elasticity_expressions.update(zip(coordinates, unit_expressions))
+        units.append((names[row], fingerprint, unit_expressions, coordinates))
 
     # Shape of the matrix
     shape = (len(expressions), len(respective_variables))
@@ -178,30 +245,32 @@ def make_elasticity_fun_single_cpu(expressions,respective_variables ,variables,
                                         respective_variables,
                                         variables,
                                         parameters,
-                                        shape, )
+                                        shape,
+                                        pool=pool,
+                                        units=units,
+                                        report_name=report_name)
     return elasticity_fun
 
 
-def make_elasticity_fun_multicore(expressions,respective_variables ,variables, parameters, pool):
-    # Get the derivative of expression x vs variable y
-
-    inputs = [(i,e,respective_variables) for i,e in enumerate(expressions)]
+def get_known_elasticities(expressions, respective_variables, log_elasticities=None):
+    """
+    Pick the closed form elasticities of the respective variables
+    :return: dict of the known elasticity expressions indexed by (row, column)
+    """
+    known_elasticities = {}
+    if log_elasticities is None:
+        return known_elasticities
 
-    all_row_slices = pool.map(make_elasticity_single_row,inputs)
+    for row, (this_expression, these_log_elasticities) \
+            in enumerate(zip(expressions, log_elasticities)):
+        if not these_log_elasticities:
+            continue
+        for column, this_variable in enumerate(respective_variables.values()):
+            if this_variable in this_expression.free_symbols \
+                    and this_variable in these_log_elasticities:
+                known_elasticities[(row, column)] = these_log_elasticities[this_variable]
 
-    elasticity_expressions = join_dicts(all_row_slices)
-
-    # Shape of the matrix
-    shape = (len(expressions), len(respective_variables))
-
-    # Create the elasticity function
-    elasticity_fun = ElasticityFunction(elasticity_expressions,
-                                        respective_variables,
-                                        variables,
-                                        parameters,
-                                        shape,
-                                        pool=pool)
-    return elasticity_fun
+    return known_elasticities
 
 
 def make_elasticity_single_row(input):
@@ -211,12 +280,22 @@ def make_elasticity_single_row(input):
     :return:
     """
     elasticity_expressions_row_slice = {}
-    this_row, this_expression, respective_variables = input
+    this_row, this_expression, respective_variables = input[:3]
+    known_columns = input[3] if len(input) > 3 else ()
 
     for column, this_variable in enumerate(respective_variables.values()):
 
+        if column in known_columns:
+            continue
+
         if this_variable in this_expression.free_symbols:
             this_elasticity = get_dlogx_dlogy(this_expression, this_variable)
             elasticity_expressions_row_slice[(this_row, column)] = this_elasticity
 
-    return elasticity_expressions_row_slice
\ No newline at end of file
+    return elasticity_expressions_row_slice
+
+
+def _make_elasticity_single_row(input, respective_variables):
+    this_row, this_expression, known_columns = input
+    return make_elasticity_single_row((this_row, this_expression,
+                                       respective_variables, known_columns))
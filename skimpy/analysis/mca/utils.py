@@ -26,26 +26,36 @@ limitations under the License.
 """
 
 from collections import defaultdict, OrderedDict
+from hashlib import sha1
 import numpy as np
 
 import multiprocessing
 
 from scipy.sparse import csr_matrix, csc_matrix
 from scipy.sparse.linalg import inv as sparse_inv
-from sympy import diff, simplify, Matrix, eye, zeros
+from sympy import diff
 
 from .elasticity_fun import ElasticityFunction
 
 from skimpy.utils.general import get_stoichiometry, join_dicts
 from skimpy.utils.tabdict import iterable_to_tabdict, TabDict
 from skimpy.utils.namespace import *
+from skimpy.utils.moieties import sparse_left_integer_nullspace
 
-from skimpy.nullspace import left_integer_nullspace
+try:
+    from skimpy.nullspace import left_integer_nullspace
+except ImportError:
+    # Exact sparse fallback without flint
+    left_integer_nullspace = None
 
 from ...utils.namespace import *
 
 sparse_matrix = csc_matrix
 
+# Reduced stoichiometries indexed by the hash of the full stoichiometry
+REDUCED_STOICHIOMETRY_CACHE = OrderedDict()
+REDUCED_STOICHIOMETRY_CACHE_SIZE = 32
+
 
 def get_dlogx_dlogy(sympy_expression, variable):
     """
@@ -59,49 +69,44 @@ def get_dlogx_dlogy(sympy_expression, variable):
 
 
 def get_reduced_stoichiometry(kinetic_model, all_variables, all_dependent_ix=None):
-
-    #TODO IMPLEMENT THE MOIJETY DETECTION
+    """
+    Compute the reduced stoichiometry N, the conservation relation L0 and the
+    independent and dependent variable indices. The result is cached by a hash
+    of the stoichiometric matrix.
+    """
     full_stoichiometry = get_stoichiometry(kinetic_model, all_variables)
 
-    S = full_stoichiometry.todense()
-    # Left basis dimensions: rows are metabolites, columns are moieties
-    # L0*S = 0 -> L0 is the left null space matrix
-    S_non_integer = None
+    key = stoichiometry_hash(full_stoichiometry, all_dependent_ix)
     try:
-        left_basis = left_integer_nullspace(S)
-    except TypeError:
-        # Get reactions containing non integers
-        non_integer_rxn_idx = set([j for i in range(S.shape[0])
-                                   for j in range(S.shape[1])
-                                   if not float(S[i, j]).is_integer()])
-        integer_rxn_idx = set(range(S.shape[1])).difference(non_integer_rxn_idx)
-        S_non_integer = S[:,list(non_integer_rxn_idx)]
-
-        non_integer_rxns = [kinetic_model.reactions.iloc(i)[0] for i in non_integer_rxn_idx]
+        return _copy_reduced_stoichiometry(REDUCED_STOICHIOMETRY_CACHE[key])
+    except KeyError:
+        pass
+
+    S = full_stoichiometry.tocsc()
+
+    # Get reactions containing non integers, they are not considered for
+    # the linear dependencies
+    S_coo = S.tocoo()
+    non_integer_rxn_idx = np.unique(S_coo.col[np.mod(S_coo.data, 1) != 0])
+    if len(non_integer_rxn_idx) > 0:
+        non_integer_rxns = [k for k, _ in kinetic_model.reactions.iloc(non_integer_rxn_idx)]
         kinetic_model.logger.warning('Non integer stoichiometries found {} '
                                       'do not consider for linear dependencies'.format(non_integer_rxns))
+        integer_rxn_idx = np.setdiff1d(np.arange(S.shape[1]), non_integer_rxn_idx)
+        S_integer = S[:, integer_rxn_idx]
+    else:
+        S_integer = S
 
-        S = S[:,list(integer_rxn_idx)].astype(int)
-        left_basis = left_integer_nullspace(S)
+    # Left basis dimensions: rows are moieties, columns are metabolites
+    # L0*S = 0 -> L0 is the left null space matrix
+    left_basis = get_left_integer_basis(S_integer)
 
     if left_basis.any():
-
-        L0 = Matrix(left_basis)
-
-        ## We need to separate N and N0 beforehand
+        conservation_relation = sparse_matrix(left_basis, dtype=float)
 
         # Per moiety, select one variable that has not been selected before
-        # L0
-        L0_sparse = sparse_matrix(np.array(L0), dtype=np.float)
-
-        all_dependent_ix, all_independent_ix = get_dep_indep_vars_from_basis(L0_sparse, all_dependent_ix)
-
-        # Reindex S in N, N0
-
-        #S = Matrix(S[all_independent_ix+all_dependent_ix,:])
-
-        # If we reindex S, then so should be L0
-        L0 = L0[:,all_independent_ix+all_dependent_ix]
+        all_dependent_ix, all_independent_ix = \
+            get_dep_indep_vars_from_basis(conservation_relation, all_dependent_ix)
 
         # Getting the reduced Stoichiometry:
         # S is the full stoichiometric matrix
@@ -121,55 +126,83 @@ def get_reduced_stoichiometry(kinetic_model, all_variables, all_dependent_ix=Non
         #          [ I_n*N + 0_r * N0 ]   [ N ]
         # L * S  = [      L0 * S      ] = [ 0 ]
         #
-        # r,n_plus_r = L0.shape
-        # n = n_plus_r - r
-        #
-        # # Upper block
-        # U = Matrix([eye(n), zeros(r,n)]).transpose()
-        # L = Matrix([U,L0])
-        #
-        # N_ = L*S
-        # N  = N_[:n,:] # the rows after n are 0s
-        #
-
-        # This is equivalent to
-        N = Matrix(S[all_independent_ix, :])
-
-        reduced_stoichiometry   = sparse_matrix(np.array(N),dtype=np.float)
-        conservation_relation = L0_sparse
+        # This is equivalent to selecting the rows of the independent
+        # variables in S, this includes reactions with non integer
+        # stoichiometries
+        reduced_stoichiometry = sparse_matrix(S[all_independent_ix, :], dtype=float)
 
     # If the left hand null space is empty no mojeties
     else:
-        reduced_stoichiometry = full_stoichiometry
-        all_independent_ix = range(full_stoichiometry.shape[0])
+        reduced_stoichiometry = sparse_matrix(S, dtype=float)
+        all_independent_ix = list(range(S.shape[0]))
         all_dependent_ix = []
-        conservation_relation = sparse_matrix(np.array([]),dtype=np.float)
+        conservation_relation = sparse_matrix(np.array([]), dtype=float)
+
+    result = (reduced_stoichiometry, conservation_relation,
+              all_independent_ix, all_dependent_ix)
 
-    # Reconstruct with non integer reactions
-    if S_non_integer is not None:
-        reduced_stoichiometry_int = reduced_stoichiometry.todense()
-        reduced_stoichiometry = np.zeros((reduced_stoichiometry.shape[0],
-                                          S.shape[1]+S_non_integer.shape[1]))
-        for i,ix in enumerate(integer_rxn_idx):
-            reduced_stoichiometry[:,ix] = reduced_stoichiometry_int[:,i].T
-        for i,ix in enumerate(non_integer_rxn_idx):
-            reduced_stoichiometry[:,ix] = S_non_integer[all_independent_ix,i].T
-        # Reconvert to sparse
-        reduced_stoichiometry = sparse_matrix(np.array(reduced_stoichiometry), dtype=np.float)
+    if len(REDUCED_STOICHIOMETRY_CACHE) >= REDUCED_STOICHIOMETRY_CACHE_SIZE:
+        REDUCED_STOICHIOMETRY_CACHE.popitem(last=False)
+    REDUCED_STOICHIOMETRY_CACHE[key] = result
 
-    return reduced_stoichiometry, conservation_relation, all_independent_ix, all_dependent_ix
+    return _copy_reduced_stoichiometry(result)
+
+
+def get_left_integer_basis(S):
+    """
+    Integer left null space of a sparse integer matrix. Uses the flint
+    based extension if it is available and an exact sparse elimination
+    otherwise.
+    """
+    if left_integer_nullspace is not None:
+        return left_integer_nullspace(np.rint(S.toarray()).astype(int))
+    else:
+        return sparse_left_integer_nullspace(S)
+
+
+def stoichiometry_hash(S, all_dependent_ix=None):
+    """
+    Hash of the structure and values of a sparse stoichiometric matrix
+    """
+    S = csr_matrix(S, copy=True)
+    S.sum_duplicates()
+    S.sort_indices()
+
+    the_hash = sha1()
+    the_hash.update(repr((S.shape, str(S.dtype))).encode())
+    the_hash.update(S.indptr.tobytes())
+    the_hash.update(S.indices.tobytes())
+    the_hash.update(S.data.tobytes())
+    if all_dependent_ix is not None:
+        the_hash.update(repr([int(i) for i in all_dependent_ix]).encode())
+
+    return the_hash.hexdigest()
+
+
+def _copy_reduced_stoichiometry(result):
+    reduced_stoichiometry, conservation_relation, \
+    all_independent_ix, all_dependent_ix = result
+    return reduced_stoichiometry.copy(), \
+           conservation_relation.copy(), \
+           list(all_independent_ix), \
+           list(all_dependent_ix)
 
 
 def get_dep_indep_vars_from_basis(L0, all_dependent_ix=None, concentrations=None):
+    L0 = csc_matrix(L0)
     nonzero_rows, nonzero_cols = L0.nonzero()
     row_dict = defaultdict(list)
     # Put the ixs in a dict indexed by row number (moiety index)
     for k, v in zip(nonzero_rows, nonzero_cols):
         row_dict[k].append(v)
 
-        # The first independent variables are those involved in no moieties
-        all_independent_ix = [x for x in range(L0.shape[1]) if not x in nonzero_cols]
     if all_dependent_ix is None:
+        # The first independent variables are those involved in no moieties
+        assigned_vars = set(range(L0.shape[1])).difference(nonzero_cols)
+
+        # Number of moieties a variable participates in
+        moiety_count = np.bincount(nonzero_cols, minlength=L0.shape[1])
+
         # Indices for dependent metabolites indices
         all_dependent_ix = []
 
@@ -180,12 +213,11 @@ def get_dep_indep_vars_from_basis(L0, all_dependent_ix=None, concentrations=None
         for row in sorted(row_dict, key=lambda k: len(row_dict[k])):
             mojetie_vars = row_dict[row]
             # Get all unassigned metabolites participating in this mojetie
-            unassigned_vars = [x for x in set(mojetie_vars)
-                .difference(all_independent_ix + all_dependent_ix)]
+            unassigned_vars = sorted(set(mojetie_vars).difference(assigned_vars))
             # Get the metabolite that participates in least mojeties:
             if concentrations is None:
                 unassigned_vars_sorted = sorted(unassigned_vars,
-                                                key=lambda k: L0[:, k].count_nonzero())
+                                                key=lambda k: moiety_count[k])
             else:
                 # The largest concentrations to be dependent
                 unassigned_vars_sorted = sorted(unassigned_vars,
@@ -194,6 +226,7 @@ def get_dep_indep_vars_from_basis(L0, all_dependent_ix=None, concentrations=None
             # Choose a representative dependent metabolite:
             if unassigned_vars_sorted:
                 all_dependent_ix.append(unassigned_vars_sorted[0])
+                assigned_vars.add(unassigned_vars_sorted[0])
             else:
                 raise Exception('Could not find an dependent var that is not already used'
                                 ' in {}'.format(mojetie_vars))
@@ -202,10 +235,6 @@ def get_dep_indep_vars_from_basis(L0, all_dependent_ix=None, concentrations=None
         # The depednent ix are defined as an input
         pass
     # The independent mets is the set difference from the dependent
-    all_independent_ix = [x for x in set(range(L0.shape[1]))
-        .difference(all_dependent_ix)]
+    all_independent_ix = sorted(set(range(L0.shape[1]))
+                                .difference(all_dependent_ix))
     return all_dependent_ix, all_independent_ix
-
-
-
-
@@ -28,5 +28,6 @@ limitations under the License.
 from .utils import *
 from .flux_fun import *
 from .ode_fun import *
+from .elementary_fun import *
 from .sample_concentrations import *
 
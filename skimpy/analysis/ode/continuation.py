@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from skimpy.analysis.mca.utils import get_reduced_stoichiometry
+from skimpy.utils.profiling import timed
+
+
+class ParameterScan(object):
+    """
+    Steady states along a path of parameter values
+
+    :param parameters: DataFrame of the parameter values of every point
+    :param concentrations: DataFrame of the steady states, NaN where no
+                           steady state was found
+    :param statistics: DataFrame with the columns converged,
+                       newton_iterations, integrated and jacobian_sign
+    :param folds: indices of the points at which the jacobian is singular or
+                  changed the sign of its determinant since the last point
+    """
+    def __init__(self, parameters, concentrations, statistics, folds):
+        self.parameters = parameters
+        self.concentrations = concentrations
+        self.statistics = statistics
+        self.folds = folds
+
+
+@timed('ode.scan')
+def scan_steady_states(kinetic_model, parameter_path, initial_concentrations=None,
+                       tolerance=1e-9, max_iterations=20, integration_time=None,
+                       **kwargs):
+    """
+    Follow the steady state along a path of parameter values. Every point is
+    warm started from the steady state of the previous point: the predictor
+    steps along the tangent dx/dp = -J^-1 df/dp and Newton iterations on the
+    compiled rate of change and jacobian correct the prediction. The moieties
+    are kept at their values in the initial concentrations.
+
+    If the corrector fails and an integration_time is given, the model is
+    integrated from the previous steady state before the Newton iterations
+    are started again. The parameter values are restored after the scan.
+
+    :param kinetic_model: KineticModel with a compiled ode function
+    :param parameter_path: dict of arrays of parameter values indexed by the
+                           parameter names or DataFrame with the parameters
+                           as columns, e.g. {'vmax_forward_E1': values} or
+                           p0 + s*d for a direction d
+    :param initial_concentrations: start of the first point, the initial
+                           conditions of the model by default
+    :param tolerance: relative tolerance of the Newton steps
+    :param max_iterations: maximal number of Newton iterations per point
+    :param integration_time: optional time to integrate if Newton fails
+    :param kwargs: options of solve_ode for these integrations
+    :return: ParameterScan
+    """
+    parameter_path = pd.DataFrame(parameter_path, dtype=float)
+    parameter_names = list(parameter_path.columns)
+
+    sensitivity_fun = kinetic_model.compile_sensitivities(parameter_names)
+    variables = sensitivity_fun.variables
+
+    if initial_concentrations is None:
+        initial_concentrations = kinetic_model.initial_conditions
+    x = np.array([initial_concentrations[k] for k in variables], dtype=float)
+
+    # The equations of the dependent variables are replaced by the moieties
+    _, conservation_relation, independent_ix, dependent_ix = \
+        get_reduced_stoichiometry(kinetic_model, variables)
+    if dependent_ix:
+        conservation_relation = conservation_relation.toarray()
+    else:
+        conservation_relation = np.zeros((0, len(variables)))
+    system = _SteadyStateSystem(sensitivity_fun, independent_ix,
+                                conservation_relation,
+                                conservation_relation.dot(x))
+
+    parameters = kinetic_model.parameters
+    original_values = [parameters[k].value for k in parameter_names]
+    original_initial_conditions = [kinetic_model.initial_conditions[k] for k in variables]
+
+    concentrations = np.full((len(parameter_path), len(variables)), np.nan)
+    statistics = []
+    folds = []
+
+    tangent = None
+    last_values = None
+    last_sign = None
+    try:
+        for i, values in enumerate(parameter_path.values):
+            for k, value in zip(parameter_names, values):
+                parameters[k].value = value
+            sensitivity_fun.get_parames()
+
+            # Predictor
+            start = x if tangent is None else x + tangent.dot(values - last_values)
+
+            this_x, iterations, converged = system.solve(start, tolerance, max_iterations)
+            integrated = False
+            if not converged and integration_time is not None:
+                start = _integrate(kinetic_model, variables, x, integration_time, **kwargs)
+                this_x, more_iterations, converged = system.solve(start, tolerance,
+                                                                  max_iterations)
+                iterations += more_iterations
+                integrated = True
+
+            sign = np.nan
+            if converged:
+                jacobian = system.jacobian(this_x)
+                sign, _ = np.linalg.slogdet(jacobian)
+                if sign == 0 or (last_sign is not None and sign != last_sign):
+                    folds.append(i)
+
+                if sign != 0:
+                    # Tangent of the branch for the next predictor
+                    tangent = system.tangent(this_x, jacobian)
+                    last_sign = sign
+                else:
+                    tangent = None
+
+                x = this_x
+                last_values = values
+                concentrations[i] = x
+
+            statistics.append({'converged': converged,
+                               'newton_iterations': iterations,
+                               'integrated': integrated,
+                               'jacobian_sign': sign})
+    finally:
+        for k, value in zip(parameter_names, original_values):
+            parameters[k].value = value
+        for k, value in zip(variables, original_initial_conditions):
+            kinetic_model.initial_conditions[k] = value
+
+    return ParameterScan(parameter_path,
+                         pd.DataFrame(concentrations, columns=list(variables)),
+                         pd.DataFrame(statistics),
+                         folds)
+
+
+class _SteadyStateSystem(object):
+    """
+    Steady state equations [f_independent(x), L0 x - totals] = 0
+    """
+    def __init__(self, sensitivity_fun, independent_ix, conservation_relation, totals):
+        self.sensitivity_fun = sensitivity_fun
+        self.independent_ix = independent_ix
+        self.conservation_relation = conservation_relation
+        self.totals = totals
+
+    def residual(self, x):
+        rate_of_change = np.zeros(len(x))
+        self.sensitivity_fun.ode_fun(0, x, rate_of_change)
+        return np.append(rate_of_change[self.independent_ix],
+                         self.conservation_relation.dot(x) - self.totals)
+
+    def jacobian(self, x):
+        jacobian = self.sensitivity_fun.get_jacobian(x).toarray()
+        return np.vstack([jacobian[self.independent_ix], self.conservation_relation])
+
+    def tangent(self, x, jacobian):
+        derivatives = self.sensitivity_fun.get_parameter_derivatives(x)
+        derivatives = np.vstack([derivatives[self.independent_ix],
+                                 np.zeros((self.conservation_relation.shape[0],
+                                           derivatives.shape[1]))])
+        return -np.linalg.solve(jacobian, derivatives)
+
+    def solve(self, x, tolerance, max_iterations):
+        """
+        Newton iterations from x
+
+        :return: tuple of the solution, the number of iterations and
+                 whether the iterations converged to non negative concentrations
+        """
+        for iteration in range(1, max_iterations+1):
+            try:
+                step = np.linalg.solve(self.jacobian(x), self.residual(x))
+            except np.linalg.LinAlgError:
+                return x, iteration, False
+            x = x - step
+            if not np.all(np.isfinite(x)):
+                return x, iteration, False
+            if np.all(np.abs(step) <= tolerance*(1 + np.abs(x))):
+                return x, iteration, bool(np.all(x >= -tolerance))
+        return x, max_iterations, False
+
+
+def _integrate(kinetic_model, variables, x, integration_time, **kwargs):
+    for k, value in zip(variables, x):
+        kinetic_model.initial_conditions[k] = value
+    solution = kinetic_model.solve_ode(np.array([0.0, integration_time]), **kwargs)
+    return solution.species[-1]
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from numpy import array, zeros, exp, power, append, where
+from scipy.sparse import csr_matrix, diags
+from sympy import symbols
+
+from skimpy.analysis.ode.ode_fun import ODEFunction
+from skimpy.utils.compile_sympy import make_cython_function
+from skimpy.utils.tabdict import iterable_to_tabdict
+
+
+class ElementaryODEFunction(ODEFunction):
+    """
+    Ode function of a network of mass action steps
+
+        dx/dt = S (k(p) * prod_i x_i**R_ji)
+
+    The stoichiometry S and the reactant orders R are sparse matrices, only
+    the rate constants k(p) are compiled from their expressions. The function
+    provides the analytic jacobian of the right hand side.
+    """
+    def __init__(self, model, variables, steps, pool=None, log_transform=False):
+        """
+        :param variables: TabDict of the variable symbols
+        :param steps: list of ElementaryStep
+        :param log_transform: if True the states are the log concentrations
+        """
+        self.variables = variables
+        self.expressions = None
+        self.model = model
+        self.log_transform = log_transform
+        self.rebuild_report = None
+
+        self.n_calls = 0
+        self._budget = None
+        self.budget_status = None
+
+        variable_index = {v: i for i, v in enumerate(variables.values())}
+
+        # Reactants that are not variables (e.g. boundary concentrations) are
+        # part of the rate constant
+        rate_constants = []
+        order_entries = []
+        stoichiometry_entries = []
+        for j, this_step in enumerate(steps):
+            rate_constant = this_step.rate_constant
+            for x, order in this_step.reactant_orders.items():
+                if x in variable_index:
+                    order_entries.append((j, variable_index[x], order))
+                else:
+                    rate_constant = rate_constant * x**order
+            rate_constants.append(rate_constant)
+            for x, coefficient in this_step.stoichiometry.items():
+                if x in variable_index:
+                    stoichiometry_entries.append((variable_index[x], j, coefficient))
+
+        n_steps, n_variables = len(steps), len(variables)
+        steps_index, variables_index, orders = \
+            [array(column) for column in zip(*order_entries)] \
+            if order_entries else (zeros(0, int), zeros(0, int), zeros(0))
+        rows, columns, coefficients = zip(*stoichiometry_entries)
+
+        self.stoichiometry = csr_matrix((coefficients, (rows, columns)),
+                                        shape=(n_variables, n_steps))
+        self.reactant_orders = csr_matrix((orders, (steps_index, variables_index)),
+                                          shape=(n_steps, n_variables))
+        self._steps_index = steps_index
+        self._variables_index = variables_index
+        self._orders = orders.astype(float)
+
+        # Entries of the reactant orders of every step padded with the index
+        # of a unit factor, the derivatives multiply the entries of the other
+        # reactants of the step
+        n_entries = len(orders)
+        entries = [[] for _ in range(n_steps)]
+        for e, j in enumerate(steps_index):
+            entries[j].append(e)
+        width = max([len(these_entries) for these_entries in entries] + [1])
+        self._step_entries = array([these_entries + [n_entries]*(width - len(these_entries))
+                                    for these_entries in entries], dtype=int).reshape(n_steps, width)
+        other_entries = self._step_entries[steps_index]
+        self._other_entries = where(other_entries == array(range(n_entries))[:, None],
+                                    n_entries, other_entries)
+
+        # Parameters of the rate constants sorted to generate the same code
+        # in every session
+        parameters = set().union(*[k.free_symbols for k in rate_constants])
+        parameters = sorted(parameters, key=str)
+        self._parameters = iterable_to_tabdict(parameters, use_name=False)
+
+        the_param_keys = [x for x in self._parameters]
+        sym_params = list(symbols(the_param_keys))
+        self.function = make_cython_function(sym_params, rate_constants,
+                                             simplify=True, pool=pool)
+        self.rate_constants = None
+
+    def get_parames(self):
+        ODEFunction.get_parames(self)
+        self.rate_constants = zeros(self.reactant_orders.shape[0])
+        self.function(list(self._parameters_values), self.rate_constants)
+
+    def get_rates(self, y):
+        """
+        Rates of the elementary steps
+        """
+        if self.log_transform:
+            return self.rate_constants*exp(self.reactant_orders.dot(y))
+        terms = append(power(y[self._variables_index], self._orders), 1.0)
+        return self.rate_constants*terms[self._step_entries].prod(axis=1)
+
+    def __call__(self, t, y, ydot):
+        self.n_calls += 1
+        if self._budget is not None and self._is_budget_exceeded():
+            return -1
+        y = array(y)
+        ydot[:] = self.stoichiometry.dot(self.get_rates(y))
+        if self.log_transform:
+            ydot /= exp(y)
+
+    def get_jacobian(self, y):
+        """
+        Sparse jacobian of the right hand side with respect to the states
+        """
+        y = array(y)
+        shape = self.reactant_orders.shape
+        if self.log_transform:
+            # d r_j/d ln x_i = R_ji r_j
+            x = exp(y)
+            rates = self.get_rates(y)
+            derivatives = self._orders*rates[self._steps_index]
+            rates_jacobian = csr_matrix((derivatives, (self._steps_index, self._variables_index)),
+                                        shape=shape)
+            ydot = self.stoichiometry.dot(rates)/x
+            return diags(1.0/x).dot(self.stoichiometry.dot(rates_jacobian)) - diags(ydot)
+
+        # d r_j/d x_i = k_j R_ji x_i**(R_ji-1) prod_(l != i) x_l**R_jl
+        terms = append(power(y[self._variables_index], self._orders), 1.0)
+        derivatives = self.rate_constants[self._steps_index] * self._orders \
+                      * power(y[self._variables_index], self._orders - 1.0) \
+                      * terms[self._other_entries].prod(axis=1)
+        rates_jacobian = csr_matrix((derivatives, (self._steps_index, self._variables_index)),
+                                    shape=shape)
+        return self.stoichiometry.dot(rates_jacobian)
+
+    def jacobian(self, t, y, fy, J):
+        """
+        Dense jacobian in the form of the jacfn option of cvode
+        """
+        J[:, :] = self.get_jacobian(y).toarray()
+        return 0
+
+    def warmup(self):
+        input_vars = [1.0]*len(self._parameters)
+        try:
+            self.function(input_vars, zeros(self.reactant_orders.shape[0]))
+        except ArithmeticError:
+            pass
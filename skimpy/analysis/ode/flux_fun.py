@@ -68,3 +68,14 @@ class FluxFunction:
         self.function(input_vars, fluxes)
 
         return {k:v for k,v in zip(list(self.expr.keys()) , fluxes)}
+
+    def warmup(self):
+        """
+        Compile the cython kernel by evaluating it once with the
+        argument types used in __call__
+        """
+        input_vars = [1.0]*(len(self.variables)+len(self.parameters))
+        try:
+            self.function(input_vars, np.zeros(len(self.expr)))
+        except ArithmeticError:
+            pass
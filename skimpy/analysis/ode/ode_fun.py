@@ -25,17 +25,26 @@ limitations under the License.
 
 """
 
-from numpy import array, double
+from time import time
+
+from numpy import array, double, zeros, exp, log, maximum, divide
 from sympy import symbols, Symbol
 
-from skimpy.utils.compile_sympy import make_cython_function
+from skimpy.utils.compile_sympy import make_cython_function, \
+    make_cython_unit_function, RebuildReport
 from skimpy.utils.general import robust_index
+from skimpy.utils.namespace import TIME_BUDGET_EXCEEDED, RHS_BUDGET_EXCEEDED
 from ...utils.tabdict import TabDict
 from warnings import warn
 
+# Lower bound of the concentrations taken as initial values in the
+# log-concentration formulation
+LOG_CONCENTRATION_FLOOR = 1e-20
+
 
 class ODEFunction:
-    def __init__(self, model, variables, expressions, parameters, pool=None):
+    def __init__(self, model, variables, expressions, parameters, pool=None, units=None,
+                 log_transform=False):
         """
         Constructor for a precompiled function to solve the ode epxressions
         numerically
@@ -43,26 +52,72 @@ class ODEFunction:
         :param expressions: dict of sympy expressions for the rate of
                      change of a variable indexed by the variable name
         :param parameters: dict of parameters
+        :param units: optional list of per reaction code units
+                      (see make_reaction_units) to build the function from
+        :param log_transform: if True the states are the log concentrations
+                      and the function computes d ln x/dt = f(x)/x
 
         """
         self.variables = variables
         self.expressions = expressions
         self.model = model
+        self.log_transform = log_transform
         # self._parameter_values = TabDict([])
 
         # Link to the model
         self._parameters = parameters
 
+        # Number of evaluations of the right hand side
+        self.n_calls = 0
+        self._budget = None
+        self.budget_status = None
+
         # Unpacking is needed as ufuncify only take ArrayTypes
         the_param_keys = [x for x in self._parameters]
         the_variable_keys = [x for x in variables]
         sym_vars = list(symbols(the_variable_keys+the_param_keys))
 
-        # Sort the expressions
-        expressions = [self.expressions[x] for x in self.variables.values()]
-
-        # Awsome magic
-        self.function = make_cython_function(sym_vars, expressions, simplify=True, pool=pool)
+        if units is None:
+            # Sort the expressions
+            expressions = [self.expressions[x] for x in self.variables.values()]
+
+            # Awsome magic
+            self.function = make_cython_function(sym_vars, expressions, simplify=True, pool=pool)
+            self.rebuild_report = None
+        else:
+            # The rate of change of each variable sums the unit expressions
+            variable_index = {v: i for i, v in enumerate(self.variables.values())}
+            outputs = [[] for _ in variable_index]
+            for u, (_, _, _, contributions) in enumerate(units):
+                for this_variable, k, coefficient in contributions:
+                    if this_variable in variable_index:
+                        outputs[variable_index[this_variable]].append((u, k, coefficient))
+
+            self.rebuild_report = RebuildReport('ode')
+            self.function = make_cython_unit_function(sym_vars,
+                                                      [unit[:3] for unit in units],
+                                                      outputs,
+                                                      pool=pool,
+                                                      report=self.rebuild_report)
+
+    @classmethod
+    def from_kernel(cls, model, variables, parameters, kernel, log_transform=False):
+        """
+        Ode function of a compiled kernel without the expressions,
+        e.g. loaded from a model bundle
+        """
+        self = cls.__new__(cls)
+        self.variables = variables
+        self.expressions = None
+        self.model = model
+        self.log_transform = log_transform
+        self._parameters = parameters
+        self.function = kernel
+        self.rebuild_report = None
+        self.n_calls = 0
+        self._budget = None
+        self.budget_status = None
+        return self
 
     @property
     def parameters(self):
@@ -110,5 +165,74 @@ class ODEFunction:
     #             self.parameters[robust_index(k)] = v
 
     def __call__(self, t, y, ydot):
-        input_vars = list(y)+list(self._parameters_values)
-        self.function(input_vars,ydot)
+        self.n_calls += 1
+        if self._budget is not None and self._is_budget_exceeded():
+            # Unrecoverable error, the solver stops and returns the
+            # solution up to the last output time
+            return -1
+        if self.log_transform:
+            # The kernel computes f(x) from the concentrations
+            x = exp(y)
+            input_vars = list(x)+list(self._parameters_values)
+            self.function(input_vars,ydot)
+            divide(ydot, x, out=ydot)
+        else:
+            input_vars = list(y)+list(self._parameters_values)
+            self.function(input_vars,ydot)
+
+    def to_state(self, concentrations):
+        """
+        States of the integration from the concentrations
+        """
+        if self.log_transform:
+            return log(maximum(array(concentrations, dtype=double),
+                               LOG_CONCENTRATION_FLOOR))
+        return concentrations
+
+    def from_state(self, states):
+        """
+        Concentrations from the states of the integration
+        """
+        if self.log_transform:
+            return exp(states)
+        return states
+
+    def set_budget(self, time_budget=None, rhs_budget=None):
+        """
+        Make the function fail once the budget is used up, starting now
+
+        :param time_budget: wall time in seconds
+        :param rhs_budget: number of evaluations
+        """
+        self.budget_status = None
+        if time_budget is None and rhs_budget is None:
+            self._budget = None
+            return
+        deadline = None if time_budget is None else time() + time_budget
+        max_calls = None if rhs_budget is None else self.n_calls + rhs_budget
+        self._budget = (deadline, max_calls)
+
+    def clear_budget(self):
+        """
+        Remove the budget, budget_status keeps the state of the last run
+        """
+        self._budget = None
+
+    def _is_budget_exceeded(self):
+        deadline, max_calls = self._budget
+        if max_calls is not None and self.n_calls > max_calls:
+            self.budget_status = RHS_BUDGET_EXCEEDED
+        elif deadline is not None and time() > deadline:
+            self.budget_status = TIME_BUDGET_EXCEEDED
+        return self.budget_status is not None
+
+    def warmup(self):
+        """
+        Compile the cython kernel by evaluating it once with the
+        argument types used in __call__
+        """
+        input_vars = [1.0]*(len(self.variables)+len(self._parameters))
+        try:
+            self.function(input_vars, zeros(len(self.variables)))
+        except ArithmeticError:
+            pass
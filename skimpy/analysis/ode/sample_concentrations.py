@@ -1,7 +1,5 @@
 import numpy as np
-from cobra import Model, Reaction, Metabolite
 #from optlang import Variable, Constraint, Objective, Model
-from cobra.sampling import sample
 EPSILON = 1e-7
 
 def sample_initial_concentrations(kmodel,
@@ -33,11 +31,14 @@ def sample_initial_concentrations(kmodel,
                                        lower_bound=lower_bound,
                                        upper_bound=upper_bound)
 
+        # cobra is only needed to sample moieties
+        from cobra.sampling import sample
         return sample(linmodel, n_samples, )
 
 
 def create_linear_model(A, rhs, variables, lower_bound=None, upper_bound=None):
     # This is a bit retarded but this way we can use the sampling functions from cobra
+    from cobra import Model, Reaction, Metabolite
 
     model = Model('lin_model')
     # TODO have cases for lower and upper bound  None
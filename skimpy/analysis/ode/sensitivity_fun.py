@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from numpy import array, zeros, double, nan, kron, eye
+from numpy import append as append_array
+from scipy.sparse import coo_matrix
+from sympy import symbols, diff
+
+from skimpy.utils.compile_sympy import make_cython_function
+
+
+class SensitivityFunction:
+    """
+    Right hand side of the ode system augmented with the forward
+    sensitivities S = dx/dp of a list of parameters
+
+        dx/dt = f(x,p)
+        dS/dt = J S + df/dp
+
+    The states are x followed by S flattened row by row. The jacobian is
+    evaluated by the kernel of a SymbolicJacobianFunction, df/dp by a kernel
+    of the non-zero derivatives with the same inputs.
+    """
+    def __init__(self, ode_fun, jacobian_fun, parameter_list, pool=None):
+        """
+        :param ode_fun: compiled ODEFunction
+        :param jacobian_fun: SymbolicJacobianFunction of the ode expressions
+        :param parameter_list: TabDict of parameter symbols indexed by name
+        """
+        self.ode_fun = ode_fun
+        self.jacobian_fun = jacobian_fun
+        self.parameter_list = parameter_list
+        self.variables = ode_fun.variables
+
+        n_variables = len(self.variables)
+        self.shape = (n_variables, len(parameter_list))
+
+        # Same inputs as the jacobian kernel
+        the_variable_keys = [x for x in self.variables]
+        the_param_keys = [x for x in jacobian_fun.parameters]
+        sym_vars = list(symbols(the_variable_keys+the_param_keys))
+
+        expressions = {}
+        for k, this_parameter in enumerate(parameter_list.values()):
+            for j, var_j in enumerate(self.variables.values()):
+                derivative = diff(ode_fun.expressions[var_j], this_parameter)
+                if derivative != 0:
+                    expressions[(j, k)] = derivative
+
+        if expressions:
+            coordinates, expressions = zip(*expressions.items())
+            self.rows, self.columns = zip(*coordinates)
+            self.function = make_cython_function(sym_vars, expressions,
+                                                 pool=pool, simplify=False)
+        else:
+            self.rows, self.columns = (), ()
+            self.function = None
+
+        self._parameter_values = None
+
+    @property
+    def n_calls(self):
+        return self.ode_fun.n_calls
+
+    def get_parames(self):
+        self.ode_fun.get_parames()
+        # The kernels take all the model parameters
+        self._parameter_values = array([nan if p.value is None else p.value
+                                        for p in self.jacobian_fun.parameters.values()],
+                                       dtype=double)
+
+    def get_initial_state(self, initial_conditions):
+        """
+        Initial states of the augmented system, the initial conditions do
+        not depend on the parameters
+        """
+        return append_array(initial_conditions,
+                            zeros(self.shape[0]*self.shape[1]))
+
+    def __call__(self, t, y, ydot):
+        n_variables, n_parameters = self.shape
+        y = array(y)
+        x = y[:n_variables]
+
+        flag = self.ode_fun(t, x, ydot[:n_variables])
+        if flag is not None:
+            return flag
+
+        sensitivities = y[n_variables:].reshape(self.shape)
+        derivatives = self.get_jacobian(x).dot(sensitivities) \
+                      + self.get_parameter_derivatives(x)
+
+        ydot[n_variables:] = derivatives.ravel()
+
+    def get_jacobian(self, x):
+        """
+        Sparse jacobian df/dx at the concentrations x
+        """
+        n_variables = self.shape[0]
+        input_vars = append_array(x, self._parameter_values)
+
+        # The symbolic jacobian is stored as (variable, expression)
+        values = zeros(len(self.jacobian_fun.rows))
+        self.jacobian_fun.function(input_vars, values)
+        return coo_matrix((values, (self.jacobian_fun.columns, self.jacobian_fun.rows)),
+                          shape=(n_variables, n_variables)).tocsr()
+
+    def jacobian(self, t, y, fy, J):
+        """
+        Dense jacobian in the form of the jacfn option of cvode. As in the
+        simultaneous corrector of CVODES the matrix is block diagonal, J for
+        the concentrations and for every column of S. The coupling d(J S)/dx
+        of the sensitivities to the concentrations only enters the right
+        hand side.
+        """
+        n_variables, n_parameters = self.shape
+        jacobian = self.get_jacobian(array(y)[:n_variables]).toarray()
+        J[:, :] = 0.0
+        J[:n_variables, :n_variables] = jacobian
+        # S is flattened row by row, d(dS_ik/dt)/dS_jk = J_ij
+        J[n_variables:, n_variables:] = kron(jacobian, eye(n_parameters))
+        return 0
+
+    def get_parameter_derivatives(self, x):
+        """
+        Dense matrix df/dp at the concentrations x
+        """
+        if self.function is None:
+            return zeros(self.shape)
+        input_vars = append_array(x, self._parameter_values)
+        values = zeros(len(self.rows))
+        self.function(input_vars, values)
+        return coo_matrix((values, (self.rows, self.columns)),
+                          shape=self.shape).toarray()
+
+    def warmup(self):
+        """
+        Compile the cython kernel of df/dp
+        """
+        if self.function is None:
+            return
+        input_vars = [1.0]*(len(self.variables)+len(self.jacobian_fun.parameters))
+        try:
+            self.function(input_vars, zeros(len(self.rows)))
+        except ArithmeticError:
+            pass
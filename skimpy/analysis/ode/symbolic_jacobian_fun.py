@@ -34,11 +34,14 @@ from scipy.sparse import coo_matrix
 
 from skimpy.utils.compile_sympy import make_cython_function
 from skimpy.utils.general import join_dicts
+from skimpy.utils.parallel import map_with_shared_state
+from skimpy.utils.namespace import QSSA
 
 
 class SymbolicJacobianFunction:
 
-    def __init__(self, variables, ode_expressions, parameters, pool=None):
+    def __init__(self, variables, ode_expressions, parameters, pool=None,
+                 jacobian_expressions=None):
         """
         Constructor for a precompiled function to compute epxressions
         numerically
@@ -46,6 +49,9 @@ class SymbolicJacobianFunction:
         :param expr: dict of sympy expressions for the rate of
                      change of a variable indexed by the variable name
         :param parameters: dict of parameters
+        :param jacobian_expressions: optional dict of precomputed non-zero
+                     jacobian entries (see make_symbolic_jacobian), if None
+                     the ode expressions are differentiated
 
         """
         self.variables = variables
@@ -65,7 +71,11 @@ class SymbolicJacobianFunction:
         # Make a function to compute every non zero entry in the matrix
 
         # Compute the Jacobian
-        self.expressions = make_symbolic_jacobian(self.variables.values(),ode_expressions, pool=pool)
+        if jacobian_expressions is None:
+            jacobian_expressions = make_symbolic_jacobian(self.variables.values(),
+                                                          ode_expressions,
+                                                          pool=pool)
+        self.expressions = jacobian_expressions
 
 
         coordinates, expressions= zip(*[ (coord, expr) for coord, expr in self.expressions.items()])
@@ -113,10 +123,14 @@ def make_symbolic_jacobian(variables,ode_expressions, pool=None):
         pickled_variables = [v for v in variables]
         pickled_ode_expressions = {k:v for k,v in ode_expressions.items()}
 
-        inputs = [(i,var_i,pickled_variables,pickled_ode_expressions)
-                  for i,var_i in enumerate(variables) ]
+        # The ode expressions are send only once to each worker
+        inputs = [(i,var_i) for i,var_i in enumerate(variables) ]
 
-        row_slices = pool.map(make_symbolic_jacobian_row, inputs)
+        row_slices = map_with_shared_state(_make_symbolic_jacobian_row,
+                                           inputs,
+                                           (pickled_variables, pickled_ode_expressions),
+                                           pool=pool,
+                                           phase='symbolic_jacobian')
 
         expressions = join_dicts(row_slices)
 
@@ -124,6 +138,124 @@ def make_symbolic_jacobian(variables,ode_expressions, pool=None):
 
 
 
+def make_symbolic_jacobian_from_reactions(kinetic_model, variables, pool=None):
+    """
+    Build the symbolic jacobian by the chain rule J = N * dv/dx from the
+    reaction level expressions instead of differentiating the summed
+    ode expressions. Each reaction is only differentiated with respect to
+    the variables it contains, the contributions are then scattered with
+    the stoichiometry.
+
+    The mechanism expressions have to be up to date i.e. the ode function
+    needs to be compiled first. Constraints acting on the summed expressions
+    are not accounted for.
+
+    :param kinetic_model: KineticModel with a compiled ode function
+    :param variables: TabDict of variable symbols indexed by name
+    :param pool: optional multiprocessing pool
+    :return: dict of non-zero jacobian entries with the same (i,j) layout
+             as make_symbolic_jacobian
+    """
+    variable_index = {var: i for i, var in enumerate(variables.values())}
+
+    inputs = []
+    for this_reaction in kinetic_model.reactions.values():
+        # Elementary mechanisms do not have a single net rate to factor out
+        if kinetic_model.sim_type.lower() == QSSA:
+            v_net = this_reaction.mechanism.reaction_rates['v_net']
+            stoichiometry = {k.symbol: v for k, v
+                             in this_reaction.reactant_stoichiometry.items()}
+        else:
+            v_net = None
+            stoichiometry = {}
+
+        inputs.append((this_reaction.mechanism.expressions,
+                       v_net,
+                       stoichiometry))
+
+    if pool is None:
+        reaction_slices = [make_reaction_jacobian(this_input, variable_index)
+                           for this_input in inputs]
+    else:
+        reaction_slices = map_with_shared_state(make_reaction_jacobian,
+                                                inputs,
+                                                variable_index,
+                                                pool=pool,
+                                                phase='symbolic_jacobian')
+
+    # The sparsity is known from the free symbols of each reaction
+    # before any derivative is computed
+    sparsity = get_symbolic_jacobian_sparsity(inputs, variable_index)
+
+    expressions = dict.fromkeys(sparsity, 0)
+    for this_slice in reaction_slices:
+        for coord, derivative in this_slice.items():
+            expressions[coord] += derivative
+
+    return {coord: derivative for coord, derivative in expressions.items()
+            if derivative != 0}
+
+
+def get_symbolic_jacobian_sparsity(inputs, variable_index):
+    """
+    Sparsity pattern of the jacobian from the free symbols of the
+    reaction expressions, without differentiating
+    :param inputs: list of tuples (expressions, v_net, stoichiometry)
+    :param variable_index: dict of variable symbols to their position
+    :return: sorted list of the (i,j) coordinates
+    """
+    sparsity = set()
+    for expressions, _, _ in inputs:
+        for var_j, this_expression in expressions.items():
+            if var_j not in variable_index:
+                continue
+            j = variable_index[var_j]
+            sparsity.update((variable_index[var_i], j)
+                            for var_i in this_expression.free_symbols
+                            if var_i in variable_index)
+    return sorted(sparsity)
+
+
+def make_reaction_jacobian(input, variable_index):
+    """
+    Jacobian contributions of a single reaction
+    :param input: tuple (expressions, v_net, stoichiometry)
+    :param variable_index: dict of variable symbols to their position
+    :return: dict of the non-zero contributions
+    """
+    expressions, v_net, stoichiometry = input
+
+    # Derivatives of the net rate are computed only once per reaction
+    if v_net is not None:
+        rate_derivatives = {var_i: diff(v_net, var_i)
+                            for var_i in v_net.free_symbols
+                            if var_i in variable_index}
+
+    expressions_slice = {}
+    for var_j, this_expression in expressions.items():
+        if var_j not in variable_index:
+            continue
+        j = variable_index[var_j]
+
+        # Use the chain rule only if the expression is verifiably N_jr * v_r
+        coefficient = stoichiometry.get(var_j)
+        if v_net is not None and coefficient is not None \
+                and this_expression == coefficient * v_net:
+            for var_i, derivative in rate_derivatives.items():
+                if derivative != 0:
+                    expressions_slice[(variable_index[var_i], j)] = \
+                        coefficient * derivative
+        else:
+            for var_i in this_expression.free_symbols:
+                if var_i not in variable_index:
+                    continue
+                derivative = diff(this_expression, var_i)
+                if derivative != 0:
+                    expressions_slice[(variable_index[var_i], j)] = derivative
+
+    return expressions_slice
+
+
 def make_symbolic_jacobian_row(input):
     i, var_i, variables, ode_expressions = input
     expressions_row_slice = {}
@@ -133,3 +265,9 @@ def make_symbolic_jacobian_row(input):
             expressions_row_slice[(i, j)] = derivative
 
     return expressions_row_slice
+
+
+def _make_symbolic_jacobian_row(input, shared):
+    i, var_i = input
+    variables, ode_expressions = shared
+    return make_symbolic_jacobian_row((i, var_i, variables, ode_expressions))
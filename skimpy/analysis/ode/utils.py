@@ -27,18 +27,31 @@ limitations under the License.
 from sympy import simplify
 
 from skimpy.analysis.ode.ode_fun import ODEFunction
+from skimpy.analysis.ode.elementary_fun import ElementaryODEFunction
 from skimpy.analysis.ode.flux_fun import FluxFunction
 from skimpy.utils import iterable_to_tabdict, TabDict
 from skimpy.utils.namespace import *
 from skimpy.utils.general import join_dicts
+from skimpy.utils.parallel import map_with_shared_state
+from skimpy.utils.compile_sympy import get_fingerprint
+from skimpy.utils.lazy import LazyFunction
+from skimpy.utils.profiling import timed
 
 
-def make_ode_fun(kinetic_model, sim_type, pool=None):
+@timed('ode.derivation')
+def make_ode_fun(kinetic_model, sim_type, pool=None, log_transform=False,
+                 sparse_elementary=True):
     """
 
     :param kinetic_model:
     :param sim_type:
-    :return:
+    :param log_transform: if True the ode function integrates the log
+                          concentrations (see ODEFunction)
+    :param sparse_elementary: if True and all mechanisms provide their
+                              elementary steps, ELEMENTARY simulations use
+                              the sparse mass action function
+                              (see ElementaryODEFunction)
+    :return: LazyFunction of the ODEFunction, built on first use, and the variables
     """
     sim_type = sim_type.lower()
     # Get all variables and expressions (Better solution with types?)
@@ -73,6 +86,13 @@ def make_ode_fun(kinetic_model, sim_type, pool=None):
 
 
     elif sim_type == ELEMENTARY:
+        if sparse_elementary and not kinetic_model.constraints:
+            all_steps = [this_reaction.mechanism.get_elementary_steps()
+                         for this_reaction in kinetic_model.reactions.values()]
+            if all(these_steps is not None for these_steps in all_steps):
+                return make_elementary_ode_fun(kinetic_model, all_steps, pool,
+                                               log_transform)
+
         all_data = []
         #TODO Modifiers sould be applicable for all simulation types
         for this_reaction in kinetic_model.reactions.values():
@@ -81,6 +101,9 @@ def make_ode_fun(kinetic_model, sim_type, pool=None):
             all_data.append((this_reaction.mechanism.expressions,
                              this_reaction.mechanism.expression_parameters)
                             )
+        # The full rate expressions add the enzymes and complexes as reactants
+        # and replace the parameter symbols by the elementary rate constants
+        kinetic_model.update()
     else:
         raise(ValueError('Simulation type not recognized: {}'.format(sim_type)))
 
@@ -94,7 +117,8 @@ def make_ode_fun(kinetic_model, sim_type, pool=None):
                               for these_expressions in all_expr])
 
     all_parameters = flatten_list(all_parameters)
-    all_parameters = list(set(all_parameters))
+    # Sorted to generate the same kernel code in every session
+    all_parameters = sorted(set(all_parameters), key=str)
     all_parameters = iterable_to_tabdict(all_parameters, use_name=False)
 
     # Get unique set of all the variables
@@ -104,6 +128,32 @@ def make_ode_fun(kinetic_model, sim_type, pool=None):
     # Better since this is implemented now
     variables = TabDict([(k,v.symbol) for k,v in kinetic_model.reactants.items()])
 
+    # The kernel is build from per reaction code units such that only
+    # reactions that changed are generated again. Constraints act on the
+    # summed expressions and require the full expressions
+    if kinetic_model.constraints:
+        units = None
+    else:
+        units = make_reaction_units(kinetic_model, sim_type)
+
+    # The mechanisms update their expressions in place at every compilation
+    all_expr = [dict(these_expressions) for these_expressions in all_expr]
+
+    def build_ode_fun():
+        return _make_ode_fun(kinetic_model, variables, all_expr, all_parameters,
+                             units, pool, log_transform)
+
+    # The expressions are summed and the code is generated on first use
+    ode_fun = LazyFunction(build_ode_fun, name='ode', variables=variables,
+                           log_transform=log_transform)
+
+    return ode_fun, variables
+
+
+@timed('ode.build')
+def _make_ode_fun(kinetic_model, variables, all_expr, all_parameters, units, pool=None,
+                  log_transform=False):
+
     expr = make_expressions(variables,all_expr, pool=pool)
 
     # Apply constraints. Constraints are modifiers that act on
@@ -118,11 +168,77 @@ def make_ode_fun(kinetic_model, sim_type, pool=None):
     #     this_boundary_condition(expr)
 
     # Make vector function from expressions
-    ode_fun = ODEFunction(kinetic_model, variables, expr, all_parameters, pool=pool)
+    return ODEFunction(kinetic_model, variables, expr, all_parameters, pool=pool,
+                       units=units, log_transform=log_transform)
+
+
+def make_elementary_ode_fun(kinetic_model, all_steps, pool=None, log_transform=False):
+    """
+    Sparse mass action ode function of the elementary steps, the rate
+    expressions are only kept for the flux functions
+
+    :param all_steps: list of the TabDicts of ElementaryStep of the reactions
+    :return: LazyFunction of the ElementaryODEFunction and the variables
+    """
+    # The mechanisms import the core module
+    from skimpy.mechanisms.mechanism import make_elementary_expressions
+
+    steps = []
+    for this_reaction, these_steps in zip(kinetic_model.reactions.values(), all_steps):
+        this_reaction.mechanism.reaction_rates, _ = make_elementary_expressions(these_steps)
+        steps.extend(these_steps.values())
+
+    # The enzymes and complexes were added to the reactants of the mechanisms
+    kinetic_model.update()
+    variables = TabDict([(k,v.symbol) for k,v in kinetic_model.reactants.items()])
+
+    @timed('ode.build')
+    def build_ode_fun():
+        return ElementaryODEFunction(kinetic_model, variables, steps, pool=pool,
+                                     log_transform=log_transform)
+
+    ode_fun = LazyFunction(build_ode_fun, name='ode', variables=variables,
+                           log_transform=log_transform)
 
     return ode_fun, variables
 
 
+def make_reaction_units(kinetic_model, sim_type):
+    """
+    Split the ode expressions into code units per reaction. If the contributions
+    of a reaction are N_ir * v_r the unit only computes the net rate v_r.
+
+    :param kinetic_model:
+    :param sim_type:
+    :return: list of tuples (name, fingerprint, expressions, contributions) where
+             contributions are tuples (variable, expression index, coefficient)
+    """
+    units = []
+    for this_reaction in kinetic_model.reactions.values():
+        if sim_type == QSSA:
+            v_net = this_reaction.mechanism.reaction_rates['v_net']
+            stoichiometry = {k.symbol: v for k, v
+                             in this_reaction.reactant_stoichiometry.items()}
+            unit_expressions = [v_net]
+        else:
+            stoichiometry = {}
+            unit_expressions = []
+
+        contributions = []
+        for this_variable, this_expression in this_reaction.mechanism.expressions.items():
+            coefficient = stoichiometry.get(this_variable)
+            if coefficient is not None and this_expression == coefficient * v_net:
+                contributions.append((this_variable, 0, coefficient))
+            else:
+                contributions.append((this_variable, len(unit_expressions), 1.0))
+                unit_expressions.append(this_expression)
+
+        fingerprint = get_fingerprint(*unit_expressions)
+        units.append((this_reaction.name, fingerprint, unit_expressions, contributions))
+
+    return units
+
+
 def make_expressions(variables, all_flux_expr, pool=None):
 
     if pool is None:
@@ -137,9 +253,14 @@ def make_expressions(variables, all_flux_expr, pool=None):
 
     else:
 
-        inputs = [(v,all_flux_expr) for v in variables.values()]
+        # The flux expressions are send only once to each worker
+        inputs = [v for v in variables.values()]
 
-        list_expressions = pool.map(make_expresson_single_var, inputs)
+        list_expressions = map_with_shared_state(_make_expresson_single_var,
+                                                 inputs,
+                                                 all_flux_expr,
+                                                 pool=pool,
+                                                 phase='ode_expressions')
 
         expr = join_dicts(list_expressions)
 
@@ -159,6 +280,10 @@ def make_expresson_single_var(input):
     return this_expr
 
 
+def _make_expresson_single_var(var, all_flux_expr):
+    return make_expresson_single_var((var, all_flux_expr))
+
+
 
 def make_flux_fun(kinetic_model, sim_type):
     """
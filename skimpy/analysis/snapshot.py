@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import coo_matrix, diags
+from scipy.sparse.linalg import inv as sparse_inv
+
+"""
+Picklable snapshot of a compiled model for worker processes. The snapshot
+only holds index maps, matrices, parameter vectors and the cython kernels
+of the compiled functions. This module must not import sympy such that the
+snapshot can be evaluated in workers that do not import the modelling layer.
+"""
+
+
+class ElasticityKernel(object):
+    """
+    Sparse elasticity matrix from the kernel of an ElasticityFunction
+    """
+    def __init__(self, kernel, parameter_ix, rows, columns, shape):
+        self.kernel = kernel
+        self.parameter_ix = parameter_ix
+        self.rows = rows
+        self.columns = columns
+        self.shape = shape
+
+    @classmethod
+    def from_function(cls, elasticity_function, parameter_index):
+        parameter_ix = np.array([parameter_index[str(p)]
+                                 for p in elasticity_function.parameters.values()],
+                                dtype=int)
+        return cls(elasticity_function.function,
+                   parameter_ix,
+                   np.array(elasticity_function.rows),
+                   np.array(elasticity_function.columns),
+                   elasticity_function.shape)
+
+    def __call__(self, concentrations, parameter_values):
+        input_vars = np.append(concentrations, parameter_values[self.parameter_ix])
+        values = np.zeros(len(self.rows), dtype=np.double)
+        self.kernel(input_vars, values)
+        return coo_matrix((values, (self.rows, self.columns)),
+                          shape=self.shape).tocsc()
+
+
+class CompiledModelSnapshot(object):
+    """
+    Compiled ode, flux, elasticity and jacobian evaluation of a kinetic model
+    that pickles without the sympy expressions, the mechanisms or the solver.
+    Concentrations are vectors ordered as `variable_index` or dicts indexed by
+    the variable names, parameters are vectors ordered as `parameter_index`
+    or dicts of the parameters to change from `parameter_values`.
+    """
+    def __init__(self, name, variable_index, parameter_index, parameter_values,
+                 reaction_index, stoichiometry):
+        self.name = name
+        self.variable_index = variable_index
+        self.parameter_index = parameter_index
+        self.parameter_values = parameter_values
+        self.reaction_index = reaction_index
+        self.stoichiometry = stoichiometry
+
+        self.ode_kernel = None
+        self.ode_parameter_ix = None
+        self.flux_kernel = None
+        self.flux_parameter_ix = None
+        self.flux_index = None
+
+        self.independent_elasticities = None
+        self.dependent_elasticities = None
+        self.reduced_stoichiometry = None
+        self.conservation_relation = None
+        self.independent_variables_ix = None
+        self.dependent_variables_ix = None
+
+    @classmethod
+    def from_model(cls, kinetic_model):
+        """
+        Snapshot of the compiled functions of a model, compile_ode needs to
+        be called before, the elasticities and the jacobian are only
+        available after compile_mca. The kernels are compiled if this was
+        not done before such that the workers can load them from the cache.
+
+        :param kinetic_model:
+        :type kinetic_model: skimpy.core.KineticModel
+        :return: CompiledModelSnapshot
+        """
+        from skimpy.analysis.ode.utils import make_flux_fun
+        from skimpy.utils.general import get_stoichiometry
+
+        if getattr(kinetic_model, 'ode_fun', None) is None:
+            raise AttributeError('Model has no compiled ode function, call compile_ode first')
+
+        kinetic_model.warmup(['ode_fun'])
+        ode_fun = kinetic_model.ode_fun.build()
+
+        variable_index = OrderedDict((k, i) for i, k in enumerate(ode_fun.variables))
+
+        parameter_values = OrderedDict((str(p.symbol), np.nan if p.value is None else p.value)
+                                       for p in kinetic_model.parameters.values())
+        parameter_index = OrderedDict((k, i) for i, k in enumerate(parameter_values))
+
+        snapshot = cls(kinetic_model.name,
+                       variable_index,
+                       parameter_index,
+                       np.array(list(parameter_values.values()), dtype=np.double),
+                       OrderedDict((k, i) for i, k in enumerate(kinetic_model.reactions)),
+                       get_stoichiometry(kinetic_model, variable_index).tocsc())
+
+        snapshot.ode_kernel = ode_fun.function
+        snapshot.ode_parameter_ix = np.array([parameter_index[str(p)]
+                                              for p in ode_fun._parameters],
+                                             dtype=int)
+
+        flux_fun = make_flux_fun(kinetic_model, kinetic_model.sim_type)
+        flux_fun.warmup()
+        snapshot.flux_kernel = flux_fun.function
+        snapshot.flux_parameter_ix = np.array([parameter_index[str(p)]
+                                               for p in flux_fun.parameters],
+                                              dtype=int)
+        snapshot.flux_index = OrderedDict((k, i) for i, k in enumerate(flux_fun.expr))
+
+        if getattr(kinetic_model, 'independent_elasticity_fun', None) is not None:
+            kinetic_model.warmup(['independent_elasticity_fun',
+                                  'dependent_elasticity_fun'])
+            snapshot.independent_elasticities = ElasticityKernel.from_function(
+                kinetic_model.independent_elasticity_fun, parameter_index)
+            if kinetic_model.dependent_elasticity_fun is not None:
+                snapshot.dependent_elasticities = ElasticityKernel.from_function(
+                    kinetic_model.dependent_elasticity_fun, parameter_index)
+
+            snapshot.reduced_stoichiometry = kinetic_model.reduced_stoichiometry
+            snapshot.conservation_relation = kinetic_model.conservation_relation
+            snapshot.independent_variables_ix = kinetic_model.independent_variables_ix
+            snapshot.dependent_variables_ix = kinetic_model.dependent_variables_ix
+
+        return snapshot
+
+    def get_concentration_vector(self, concentrations):
+        if hasattr(concentrations, 'keys'):
+            return np.array([concentrations[k] for k in self.variable_index], dtype=np.double)
+        return np.asarray(concentrations, dtype=np.double)
+
+    def get_parameter_vector(self, parameters=None):
+        if parameters is None:
+            return self.parameter_values
+        if hasattr(parameters, 'keys'):
+            parameter_values = self.parameter_values.copy()
+            for k, v in parameters.items():
+                parameter_values[self.parameter_index[str(k)]] = v
+            return parameter_values
+        return np.asarray(parameters, dtype=np.double)
+
+    def ode(self, concentrations, parameters=None):
+        """
+        Rate of change of the variables
+
+        :return: numpy.array ordered as variable_index
+        """
+        concentrations = self.get_concentration_vector(concentrations)
+        parameter_values = self.get_parameter_vector(parameters)[self.ode_parameter_ix]
+
+        ydot = np.zeros(len(self.variable_index))
+        self.ode_kernel(list(concentrations)+list(parameter_values), ydot)
+        return ydot
+
+    def fluxes(self, concentrations, parameters=None):
+        """
+        Reaction rates
+
+        :return: numpy.array ordered as flux_index
+        """
+        concentrations = self.get_concentration_vector(concentrations)
+        parameter_values = self.get_parameter_vector(parameters)[self.flux_parameter_ix]
+
+        fluxes = np.zeros(len(self.flux_index))
+        self.flux_kernel(list(concentrations)+list(parameter_values), fluxes)
+        return fluxes
+
+    def elasticities(self, concentrations, parameters=None):
+        """
+        Log-concentration elasticities of the independent variables, the
+        dependent variables are accounted for by the conservation relations
+
+        :return: scipy.sparse.csc_matrix (reactions x independent variables)
+        """
+        if self.independent_elasticities is None:
+            raise AttributeError('Snapshot has no elasticities, call compile_mca '
+                                 'before taking the snapshot')
+
+        concentrations = self.get_concentration_vector(concentrations)
+        parameter_values = self.get_parameter_vector(parameters)
+
+        elasticity_matrix = self.independent_elasticities(concentrations, parameter_values)
+
+        if self.conservation_relation.nnz > 0:
+            dependent_weights = get_dependent_weights(concentrations,
+                                                      self.conservation_relation,
+                                                      self.independent_variables_ix,
+                                                      self.dependent_variables_ix)
+            elasticity_matrix += self.dependent_elasticities(concentrations, parameter_values)\
+                                     .dot(dependent_weights)
+
+        return elasticity_matrix
+
+    def jacobian(self, fluxes, concentrations, parameters=None):
+        """
+        Jacobian of the independent variables as computed by JacobianFunction
+
+        :return: scipy.sparse.csc_matrix
+        """
+        concentrations = self.get_concentration_vector(concentrations)
+        flux_matrix = diags(np.asarray(fluxes, dtype=np.double), 0).tocsc()
+
+        if self.conservation_relation.nnz == 0:
+            concentration_matrix = diags(concentrations).tocsc()
+        else:
+            concentration_matrix = diags(concentrations[self.independent_variables_ix]).tocsc()
+        inv_concentration_matrix = sparse_inv(concentration_matrix)
+
+        elasticity_matrix = self.elasticities(concentrations, parameters)
+
+        return self.reduced_stoichiometry.dot(flux_matrix)\
+                   .dot(elasticity_matrix)\
+                   .dot(inv_concentration_matrix)
+
+
+def get_dependent_weights(concentrations, L0, all_independent_ix, all_dependent_ix):
+    """
+    Dependent weights Qd = dln(xd)/dln(xi) from the conservation relations
+    L0, see ElasticityFunction.get_dependent_weights
+    """
+    Fi = L0[:, all_independent_ix]
+    Fd = L0[:, all_dependent_ix]
+
+    dxd_dxi = sparse_inv(Fd).dot(-Fi)
+
+    XD = diags(np.reciprocal(concentrations[all_dependent_ix]), 0).tocsc()
+    XI = diags(concentrations[all_independent_ix], 0).tocsc()
+
+    return XD.dot(dxd_dxi).dot(XI)
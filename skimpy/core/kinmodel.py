@@ -25,19 +25,27 @@ limitations under the License.
 
 """
 
-from scikits.odes import ode
+import time
+
+import numpy as np
+
 from skimpy.analysis.ode.utils import make_ode_fun
-from skimpy.analysis.ode.symbolic_jacobian_fun import SymbolicJacobianFunction
+from skimpy.analysis.ode.symbolic_jacobian_fun import SymbolicJacobianFunction, \
+    make_symbolic_jacobian_from_reactions
+from skimpy.analysis.ode.sensitivity_fun import SensitivityFunction
+from skimpy.analysis.ode.continuation import scan_steady_states
 from skimpy.analysis.mca.make import make_mca_functions
 from skimpy.analysis.mca.prepare import prepare_mca
 from skimpy.analysis.mca import *
 from ..utils.logger import get_bistream_logger
-from .solution import ODESolution
+from .solution import ODESolution, ODESolutionPopulation, get_solver_statistics
 
 from ..utils import TabDict, iterable_to_tabdict
+from ..utils.lazy import LazyFunction, warmup_functions
 from ..utils.namespace import *
 
-from multiprocessing import Pool
+from ..utils.parallel import get_pool
+from ..utils.profiling import timer, count
 
 class KineticModel(object):
     """
@@ -62,24 +70,52 @@ class KineticModel(object):
         self._simtype = None
         self._modified = True
         self._recompiled = False
+        # Number of processes used to compile, see pool
+        self.ncpu = 1
+
+        # Cached views on the reactions, see update()
+        self._reactants = None
+        self._parameters = None
+        self._reactant_index = None
+        self._parameter_index = None
+        self._stoichiometry = None
 
         #self.parameters = TabDict()
 
+    def update(self):
+        """
+        Drop the cached reactant and parameter views and the stoichiometry.
+        They are rebuilt from the reactions on the next access. Needs to be
+        called whenever the reactions, their mechanisms or their modifiers
+        are changed.
+
+        :return: Nothing
+        """
+        self._reactants = None
+        self._parameters = None
+        self._reactant_index = None
+        self._parameter_index = None
+        self._stoichiometry = None
+
     @property
     def reactants(self):
-        reactants = TabDict([])
-        for this_reaction in self.reactions.values():
-            this_rectants = TabDict([(v.name,v) for v in this_reaction.reactants.values()])
-            reactants.update(this_rectants)
-        return reactants
+        if getattr(self, '_reactants', None) is None:
+            reactants = TabDict([])
+            for this_reaction in self.reactions.values():
+                this_rectants = TabDict([(v.name,v) for v in this_reaction.reactants.values()])
+                reactants.update(this_rectants)
+            self._reactants = reactants
+        return self._reactants
 
     @property
     def parameters(self):
-        parameters = TabDict([])
-        for this_reaction in self.reactions.values():
-            reaction_params = TabDict({str(p.symbol): p for p in this_reaction.parameters.values()})
-            parameters.update(reaction_params)
-        return parameters
+        if getattr(self, '_parameters', None) is None:
+            parameters = TabDict([])
+            for this_reaction in self.reactions.values():
+                reaction_params = TabDict({str(p.symbol): p for p in this_reaction.parameters.values()})
+                parameters.update(reaction_params)
+            self._parameters = parameters
+        return self._parameters
 
     @parameters.setter
     def parameters(self,value_dict):
@@ -88,14 +124,30 @@ class KineticModel(object):
         :param value_dict:
         :return: Nothing
         """
-        parameters = TabDict([])
-        for this_reaction in self.reactions.values():
-            reaction_params = TabDict({str(p.symbol): p for p in this_reaction.parameters.values()})
-            parameters.update(reaction_params)
+        parameters = self.parameters
 
         for key,value in value_dict.items():
             parameters[str(key)].value = value
 
+    @property
+    def reactant_index(self):
+        """
+        Maps the reactant names to their position in :attr:`reactants`, which
+        is also the row index in the stoichiometric matrix
+        """
+        if getattr(self, '_reactant_index', None) is None:
+            self._reactant_index = {k: i for i, k in enumerate(self.reactants)}
+        return self._reactant_index
+
+    @property
+    def parameter_index(self):
+        """
+        Maps the parameter names to their position in :attr:`parameters`
+        """
+        if getattr(self, '_parameter_index', None) is None:
+            self._parameter_index = {k: i for i, k in enumerate(self.parameters)}
+        return self._parameter_index
+
     @property
     def moieties(self):
         ms = []
@@ -115,10 +167,12 @@ class KineticModel(object):
         :type reaction: skimpy.core.Reaction
         :return:
         """
+        reactants = self.reactants
+
         # If the variable name already exists substitute
         # with the variable
         for k,v in reaction.reactants.items():
-            if v.name in self.reactants.keys():
+            if v.name in reactants:
 
                 # TODO substitute by itemsetter in reactions.reactants
                 # UGLYYYYYYY
@@ -127,13 +181,19 @@ class KineticModel(object):
                         if this_mod.reactants['small_molecule'].name \
                            is v.name:
 
-                           this_mod.reactants['small_molecule'] = self.reactants[v.name]
+                           this_mod.reactants['small_molecule'] = reactants[v.name]
                 else:
-                    reaction.mechanism.reactants[k] = self.reactants[v.name]
+                    reaction.mechanism.reactants[k] = reactants[v.name]
 
 
         self.add_to_tabdict(reaction, 'reactions')
 
+        # Extend the reactant view instead of rebuilding it from all the
+        # reactions, which makes building large models quadratic
+        for v in reaction.reactants.values():
+            reactants[v.name] = v
+        self._reactants = reactants
+
     def add_constraint(self, constraint):
         constraint.link(self)
         self.add_to_tabdict(constraint, 'constraints')
@@ -165,6 +225,7 @@ class KineticModel(object):
         # for this_metabolite in reaction.metabolites:
         #     self.metabolites.append(this_metabolite)
         self._modified = True
+        self.update()
 
     def parametrize_by_reaction(self, param_dict):
         """
@@ -176,7 +237,8 @@ class KineticModel(object):
             the_reaction = self.reactions[reaction_name]
             the_reaction.parametrize(the_params)
 
-        #self.update()
+        # Parametrizing changes the parameter symbols
+        self.update()
 
     def parametrize(self, param_dict):
         raise NotImplemented('We have to do some thinking OK')
@@ -196,8 +258,20 @@ class KineticModel(object):
                     if this_inhibitor.name in self.reactants:
                         this_mechanism.inhibitors[this_keys] = self.reactants[this_inhibitor.name]
 
+        self.update()
+
 
 
+    @property
+    def pool(self):
+        """
+        Shared multiprocessing pool with ncpu processes, the pool is not stored
+        on the model such that it can be pickled
+
+        :return: multiprocessing.Pool or None for serial runs
+        """
+        return get_pool(getattr(self, 'ncpu', 1))
+
     @property
     def sim_type(self):
         return self._simtype
@@ -206,6 +280,7 @@ class KineticModel(object):
     def sim_type(self, value):
         self._simtype = value
         self._modified = True
+        self.update()
 
     def prepare(self, mca=True, ode=True, **kwargs):
         """
@@ -229,47 +304,109 @@ class KineticModel(object):
             self.dependent_variables_ix = dependent_variables_ix
             self.independent_variables_ix = independent_variables_ix
 
-            self.dependent_reactants = TabDict([self.reactants.iloc(ix)
-                                        for ix in self.dependent_variables_ix])
+            self.dependent_reactants = TabDict(self.reactants.iloc(self.dependent_variables_ix))
 
         if ode:
             pass
 
 
-    def compile_jacobian(self, type=NUMERICAL ,sim_type=QSSA, ncpu=1):
+    def compile_jacobian(self, type=NUMERICAL ,sim_type=QSSA, ncpu=1, lazy=True, background=False):
 
         self.sim_type = sim_type
 
-        if not hasattr(self, 'pool'):
-            self.pool = Pool(ncpu)
+        self.ncpu = ncpu
 
         if type == NUMERICAL:
-            self.compile_mca(parameter_list=[], sim_type=sim_type, ncpu=ncpu)
+            self.compile_mca(parameter_list=[], sim_type=sim_type, ncpu=ncpu,
+                             lazy=lazy, background=background)
 
         if type == SYMBOLIC:
             self.compile_ode(sim_type=sim_type, ncpu=ncpu)
-            self.jacobian_fun = SymbolicJacobianFunction(self.ode_fun.variables,
-                                                         self.ode_fun.expressions,
-                                                         self.parameters,
-                                                         self.pool)
+            self.jacobian_fun = self._make_symbolic_jacobian_fun()
+
+    def _make_symbolic_jacobian_fun(self):
+        # Constraints act on the summed ode expressions and can not be
+        # accounted for by the reaction level chain rule
+        if self.constraints:
+            jacobian_expressions = None
+        else:
+            jacobian_expressions = make_symbolic_jacobian_from_reactions(
+                self, self.ode_fun.variables, pool=self.pool)
+
+        return SymbolicJacobianFunction(self.ode_fun.variables,
+                                        self.ode_fun.expressions,
+                                        self.parameters,
+                                        self.pool,
+                                        jacobian_expressions=jacobian_expressions)
+
+    def compile_sensitivities(self, parameter_list):
+        """
+        Compile the forward sensitivity system of the ode function for the
+        parameters in parameter_list, compile_ode needs to be called before.
+        The function is only compiled again if the ode function or the
+        parameter list changed.
 
-    def compile_ode(self, sim_type=QSSA, ncpu=1,):
+        :param parameter_list: names of the parameters
+        :return: SensitivityFunction
+        """
+        ode_fun = self.ode_fun.build()
+        sensitivity_fun = getattr(self, 'sensitivity_fun', None)
+        if sensitivity_fun is not None \
+                and sensitivity_fun.ode_fun is ode_fun \
+                and list(sensitivity_fun.parameter_list) == list(parameter_list):
+            return sensitivity_fun
+
+        if ode_fun.expressions is None or ode_fun.log_transform:
+            raise NotImplementedError('Sensitivities require the symbolic ode expressions '
+                                      'of the concentrations')
+
+        with timer('sensitivity.build'):
+            parameter_list = TabDict([(k, self.parameters[k].symbol)
+                                      for k in parameter_list])
+            self.sensitivity_fun = SensitivityFunction(ode_fun,
+                                                       self._make_symbolic_jacobian_fun(),
+                                                       parameter_list,
+                                                       pool=self.pool)
+        return self.sensitivity_fun
+
+    def compile_ode(self, sim_type=QSSA, ncpu=1, lazy=True, background=False,
+                    log_transform=False, sparse_elementary=True):
+        """
+        Compile the ode function
+
+        :param lazy: if True the code of the ode function is only generated
+                     on first use (see warmup)
+        :param background: if True the ode function is build in a background
+                           thread
+        :param log_transform: if True solve_ode integrates the log
+                              concentrations, which keeps the concentrations
+                              positive and allows relative tolerances over
+                              many orders of magnitude. The solutions are
+                              returned as concentrations.
+        :param sparse_elementary: if True ELEMENTARY simulations evaluate the
+                                  mass action steps with sparse matrices and
+                                  an analytic jacobian instead of compiling
+                                  the summed rate expressions
+        """
 
         # For security
         # self.update()
 
         self.sim_type = sim_type
 
-        if not hasattr(self, 'pool'):
-            self.pool = Pool(ncpu)
+        self.ncpu = ncpu
 
         # Recompile only if modified or simulation
         if self._modified or self.sim_type != sim_type:
             # Compile ode function
-            ode_fun, variables = make_ode_fun(self, sim_type, pool=self.pool)
+            ode_fun, variables = make_ode_fun(self, sim_type, pool=self.pool,
+                                              log_transform=log_transform,
+                                              sparse_elementary=sparse_elementary)
             # TODO define the init properly
             self.ode_fun = ode_fun
             self.variables = variables
+            self.report_rebuild(self.ode_fun)
+            self._build_functions([self.ode_fun], lazy=lazy, background=background)
 
             self._modified = False
             self._recompiled = True
@@ -280,33 +417,133 @@ class KineticModel(object):
             # serialization)
             self.initial_conditions.update(old_initial_conditions)
 
-    def solve_ode(self, time_out, solver_type='cvode', **kwargs):
+    def report_rebuild(self, *functions):
+        """
+        Collect the rebuild reports of compiled functions in
+        `rebuild_reports` and log which reactions were generated again
+
+        :param functions: compiled functions with a rebuild_report
+        :return: Nothing
+        """
+        if getattr(self, 'rebuild_reports', None) is None:
+            self.rebuild_reports = TabDict()
+
+        for this_function in functions:
+            # Lazy functions report when they are build
+            if isinstance(this_function, LazyFunction) and not this_function.is_built:
+                this_function.callbacks.append(self.report_rebuild)
+                continue
+            report = getattr(this_function, 'rebuild_report', None)
+            if report is None:
+                continue
+
+            self.rebuild_reports[report.name] = report
+            self.logger.info('{}: rebuilt {} of {} reactions (kernel {})'
+                             .format(report.name,
+                                     len(report.rebuilt),
+                                     len(report.rebuilt) + len(report.reused),
+                                     report.kernel_fingerprint))
+            self.logger.debug('{}: rebuilt {}'.format(report.name, report.rebuilt))
+
+    def _build_functions(self, functions, lazy=True, background=False):
+        functions = [f for f in functions if f is not None]
+        if background:
+            for this_function in functions:
+                this_function.build_async()
+        elif not lazy:
+            for this_function in functions:
+                this_function.build()
+
+    def warmup(self, functions=None, ncpu=None):
+        """
+        Build the compiled functions and compile their cython kernels, the
+        C compilation of the different functions runs in parallel
+
+        :param functions: names of the functions to warm up e.g. ['ode_fun'],
+                          by default all the compiled functions of the model
+        :param ncpu: number of threads used to compile
+        :return: Nothing
+        """
+        if functions is None:
+            functions = ['ode_fun',
+                         'independent_elasticity_fun',
+                         'dependent_elasticity_fun',
+                         'parameter_elasticities_fun']
+
+        warmup_functions([getattr(self, name, None) for name in functions],
+                         ncpu=ncpu)
+
+    def solve_ode(self, time_out, solver_type='cvode', time_budget=None, rhs_budget=None,
+                  sensitivity_parameters=None, sensitivity_error_control=True, **kwargs):
         """
 
         The solver types are from ::scikits.odes::, and can be found at
         <https://scikits-odes.readthedocs.io/en/latest/solvers.html>`_.
 
+        If a budget is exceeded the integration stops and the solution up to
+        the last output time is returned, statistics['status'] tells why
+        the integration stopped.
+
         :param time_out: The times at which the solution is evaluated
         :type time_out:  list(float) or similar
         :param solver_type: must be among ['cvode','ida','dopri5','dop853']
+        :param time_budget: optional wall time budget of the integration in seconds
+        :param rhs_budget: optional budget of right hand side evaluations, every
+                           solver step takes at least one evaluation
+        :param sensitivity_parameters: optional names of parameters, the forward
+                           sensitivities dx/dp of these parameters are integrated
+                           together with the concentrations and returned as
+                           the sensitivities tensor of the solution
+        :param sensitivity_error_control: if False the sensitivities are not
+                           error controlled, they are excluded from the local
+                           error test and the convergence test of the Newton
+                           iterations such that only the concentrations
+                           control the steps
         :param kwargs:
         :return:
         """
+        # scikits.odes is only needed to integrate
+        from scikits.odes import ode
+
         extra_options = {'old_api': False}
         kwargs.update(extra_options)
 
-        # Choose a solver
-        if not hasattr(self, 'solver')\
-           or self._recompiled:
-            self.solver = ode(solver_type, self.ode_fun, **kwargs)
-            self._recompiled = False
-
         # Order the initial conditions according to variables
         ordered_initial_conditions = [self.initial_conditions[variable]
                                       for variable in self.variables]
+        ordered_initial_conditions = self.ode_fun.to_state(ordered_initial_conditions)
+
+        if sensitivity_parameters is None:
+            # Choose a solver
+            if not hasattr(self, 'solver')\
+               or self._recompiled:
+                ode_fun = self.ode_fun.build()
+                # Use the analytic jacobian if the ode function provides one
+                if solver_type == 'cvode' and hasattr(ode_fun, 'jacobian'):
+                    kwargs.setdefault('jacfn', ode_fun.jacobian)
+                self.solver = ode(solver_type, ode_fun, **kwargs)
+                self._recompiled = False
+            solver = self.solver
+            rhs_fun = self.ode_fun
+        else:
+            # The augmented system gets its own solver
+            rhs_fun = self.compile_sensitivities(sensitivity_parameters)
+            ordered_initial_conditions = rhs_fun.get_initial_state(ordered_initial_conditions)
+            if not sensitivity_error_control:
+                # A vanishing error weight excludes the sensitivities from
+                # the error tests (1e-12 is the default of scikits.odes)
+                n_variables, n_parameters = rhs_fun.shape
+                atol = kwargs.get('atol', 1e-12)
+                kwargs['atol'] = np.append(np.full(n_variables, atol),
+                                           np.full(n_variables*n_parameters, 1e300))
+            # Without the analytic jacobian cvode would take n*(1+Np)
+            # evaluations for each difference quotient jacobian
+            if solver_type == 'cvode':
+                kwargs.setdefault('jacfn', rhs_fun.jacobian)
+            solver = ode(solver_type, rhs_fun, **kwargs)
 
         #Update fixed parameters
-        self.ode_fun.get_parames()
+        rhs_fun.get_parames()
 
         # #if parameters are empty try to fetch from model
         # if not self.ode_fun._parameter_values:
@@ -314,20 +551,113 @@ class KineticModel(object):
         #                                      for k,v in self.parameters.items()}
 
         # solve the ode
-        solution = self.solver.solve(time_out, ordered_initial_conditions)
+        ode_fun = self.ode_fun.build()
+        n_calls = ode_fun.n_calls
+        start = time.time()
+        ode_fun.set_budget(time_budget=time_budget, rhs_budget=rhs_budget)
+        try:
+            with timer('ode.solve'):
+                solution = solver.solve(time_out, ordered_initial_conditions)
+        finally:
+            ode_fun.clear_budget()
+        wall_time = time.time() - start
+
+        statistics = get_solver_statistics(solver, solution)
+        statistics['rhs_calls'] = ode_fun.n_calls - n_calls
+        statistics['wall_time'] = wall_time
+        if ode_fun.budget_status is not None:
+            statistics['status'] = ode_fun.budget_status
+        elif statistics['success']:
+            statistics['status'] = SOLVER_SUCCESS
+        else:
+            statistics['status'] = SOLVER_FAILED
+        count('ode.rhs_calls', statistics['rhs_calls'])
 
-        return ODESolution(self, solution)
+        return ODESolution(self, solution, statistics=statistics,
+                           sensitivity_parameters=sensitivity_parameters)
 
-    def compile_mca(self, parameter_list=[], sim_type=QSSA, ncpu=1):
+    def solve_ode_population(self, time_out, parameter_population, solver_type='cvode',
+                             time_budget=None, rhs_budget=None, **kwargs):
+        """
+        Integrate the model for every parameter set of a population, the
+        budgets apply to each integration (see solve_ode)
+
+        :param time_out: The times at which the solutions are evaluated
+        :param parameter_population: list of parameter sets e.g. from a sampler
+        :param time_budget: optional wall time budget per integration in seconds
+        :param rhs_budget: optional budget of right hand side evaluations per
+                           integration
+        :return: ODESolutionPopulation, the indices of the parameter sets
+                 that exceeded the budget are in exceeded_budget such that
+                 they can be integrated again with other settings
+        """
+        solutions = []
+        for parameters in parameter_population:
+            self.parameters = parameters
+            this_solution = self.solve_ode(time_out,
+                                           solver_type=solver_type,
+                                           time_budget=time_budget,
+                                           rhs_budget=rhs_budget,
+                                           **kwargs)
+            solutions.append(this_solution)
+
+        return ODESolutionPopulation(solutions)
+
+    def scan_parameters(self, parameter_path, initial_concentrations=None, tolerance=1e-9,
+                        max_iterations=20, integration_time=None, **kwargs):
+        """
+        Steady states along a path of parameter values, each point is warm
+        started from the previous steady state by a predictor-corrector
+        continuation (see scan_steady_states). compile_ode needs to be called
+        before.
+
+        :param parameter_path: dict of arrays of parameter values indexed by the
+                               parameter names, or a DataFrame
+        :param initial_concentrations: start of the first point, the initial
+                                       conditions by default
+        :param tolerance: relative tolerance of the Newton steps
+        :param max_iterations: maximal number of Newton iterations per point
+        :param integration_time: optional time to integrate if Newton fails
+        :param kwargs: options of solve_ode for these integrations
+        :return: ParameterScan, the points at which the jacobian becomes
+                 singular are reported in folds
+        """
+        return scan_steady_states(self, parameter_path,
+                                  initial_concentrations=initial_concentrations,
+                                  tolerance=tolerance,
+                                  max_iterations=max_iterations,
+                                  integration_time=integration_time,
+                                  **kwargs)
+
+    def compile_mca(self, parameter_list=[], sim_type=QSSA, ncpu=1, all_parameters=False,
+                    lazy=True, background=False):
             """
             Compile MCA expressions: elasticities, jacobian
             and control coeffcients
+
+            :param all_parameters: if True the parameter elasticities are compiled
+                                   for all model parameters, the control functions
+                                   then take any subset as parameter_list at call time
+            :param lazy: if True the code of the elasticity functions is only
+                         generated on first use (see warmup)
+            :param background: if True the elasticity functions are build in
+                               background threads
             """
-            if not hasattr(self, 'pool'):
-                self.pool = Pool(ncpu)
+            self.ncpu = ncpu
+
+            if all_parameters:
+                parameter_list = TabDict([(k, p.symbol) for k, p in self.parameters.items()])
+
+            # Parameters that have not been compiled before
+            compiled_elasticities = getattr(self, 'parameter_elasticities_fun', None)
+            if compiled_elasticities is None:
+                missing_parameters = bool(parameter_list)
+            else:
+                missing_parameters = any(k not in compiled_elasticities.respective_variable_index
+                                         for k in parameter_list)
 
             # Recompile only if modified or simulation
-            if self._modified or self.sim_type != sim_type:
+            if self._modified or self.sim_type != sim_type or missing_parameters:
 
                 # Get the model expressions
                 independent_elasticity_fun, \
@@ -342,33 +672,49 @@ class KineticModel(object):
                 self.dependent_elasticity_fun = dependent_elasticity_fun
                 self.parameter_elasticities_fun = parameter_elasticities_fun
 
+                self.report_rebuild(self.independent_elasticity_fun,
+                                    self.dependent_elasticity_fun,
+                                    self.parameter_elasticities_fun)
+                self._build_functions([self.independent_elasticity_fun,
+                                       self.dependent_elasticity_fun,
+                                       self.parameter_elasticities_fun],
+                                      lazy=lazy, background=background)
 
                 # Build functions for stability and control coefficient's
-                self.jacobian_fun = JacobianFunction(
-                    self.reduced_stoichiometry,
-                    self.independent_elasticity_fun,
-                    self.dependent_elasticity_fun,
-                    self.conservation_relation,
-                    self.independent_variables_ix,
-                    self.dependent_variables_ix)
-
-                self.concentration_control_fun = ConcentrationControlFunction(
-                    self,
-                    self.reduced_stoichiometry,
-                    self.independent_elasticity_fun,
-                    self.dependent_elasticity_fun,
-                    self.parameter_elasticities_fun,
-                    self.conservation_relation,
-                    self.independent_variables_ix,
-                    self.dependent_variables_ix)
-
-                self.flux_control_fun = FluxControlFunction(
-                    self,
-                    self.reduced_stoichiometry,
-                    self.independent_elasticity_fun,
-                    self.dependent_elasticity_fun,
-                    self.parameter_elasticities_fun,
-                    self.conservation_relation,
-                    self.independent_variables_ix,
-                    self.dependent_variables_ix,
-                    self.concentration_control_fun)
+                self.make_control_functions()
+
+    def make_control_functions(self):
+        """
+        Build the jacobian and the control coefficient functions from the
+        elasticity functions
+
+        :return: Nothing
+        """
+        self.jacobian_fun = JacobianFunction(
+            self.reduced_stoichiometry,
+            self.independent_elasticity_fun,
+            self.dependent_elasticity_fun,
+            self.conservation_relation,
+            self.independent_variables_ix,
+            self.dependent_variables_ix)
+
+        self.concentration_control_fun = ConcentrationControlFunction(
+            self,
+            self.reduced_stoichiometry,
+            self.independent_elasticity_fun,
+            self.dependent_elasticity_fun,
+            self.parameter_elasticities_fun,
+            self.conservation_relation,
+            self.independent_variables_ix,
+            self.dependent_variables_ix)
+
+        self.flux_control_fun = FluxControlFunction(
+            self,
+            self.reduced_stoichiometry,
+            self.independent_elasticity_fun,
+            self.dependent_elasticity_fun,
+            self.parameter_elasticities_fun,
+            self.conservation_relation,
+            self.independent_variables_ix,
+            self.dependent_variables_ix,
+            self.concentration_control_fun)
@@ -26,9 +26,9 @@ limitations under the License.
 """
 
 from skimpy.utils.tabdict import TabDict
+from skimpy.utils.profiling import timed
 from sympy import Symbol
 from pandas import Series
-import h5py
 
 import numpy as np
 
@@ -96,7 +96,9 @@ class ParameterValuePopulation(object):
         else:
             return self._data[self._index[index]]
 
+    @timed('io.hdf5_write')
     def save(self,filename):
+        import h5py
         f = h5py.File(filename, 'w') #TODO catch existing file?
 
         # TODO more central way ?
@@ -119,7 +121,9 @@ class ParameterValuePopulation(object):
 
 
 ## TODO Lets see this should maybe
+@timed('io.hdf5_read')
 def load_parameter_population(filename, lower_index=None, upper_index=None):
+    import h5py
     f = h5py.File(filename, 'r')
     data = []
     if lower_index is None:
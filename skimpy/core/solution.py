@@ -26,21 +26,88 @@ limitations under the License.
 """
 
 import numpy as np
-from ..viz.plotting import timetrace_plot, plot_population_per_variable
 from ..utils import TabDict,iterable_to_tabdict
+from ..utils.namespace import TIME_BUDGET_EXCEEDED, RHS_BUDGET_EXCEEDED
+from ..utils.tensor import Tensor
 
 from copy import deepcopy
 
 import pandas as pd
 
+# Names of the integration statistics reported by the scikits.odes solvers
+SOLVER_STATISTICS = {'NumSteps': 'steps',
+                     'NumRhsEvals': 'solver_rhs_evaluations',
+                     'NumRhsEvalsJac': 'jacobian_rhs_evaluations',
+                     'NumJacEvals': 'jacobian_evaluations',
+                     'NumLinSolvSetups': 'linear_solver_setups',
+                     'NumErrTestFails': 'error_test_failures',
+                     'NumNonlinSolvIters': 'nonlinear_iterations',
+                     'NumNonlinSolvConvFails': 'nonlinear_convergence_failures',
+                     'NumLinConvFails': 'linear_solver_failures',
+                     'LastOrder': 'last_order',
+                     'LastStep': 'last_step',
+                     }
+
+
+def get_solver_statistics(solver, solution):
+    """
+    Integration statistics of a scikits.odes solver after a solve
+
+    :param solver: scikits.odes.ode
+    :param solution: the solution returned by solver.solve
+    :return: dict, the solver specific entries without a name in
+             SOLVER_STATISTICS keep the name used by the solver
+    """
+    try:
+        info = solver.get_info()
+    except AttributeError:
+        # Older versions and some solvers do not report statistics
+        info = dict()
+
+    statistics = {SOLVER_STATISTICS.get(k, k): v for k, v in info.items()}
+    statistics['flag'] = solution.flag
+    statistics['message'] = solution.message
+    # Negative flags are errors
+    statistics['success'] = solution.flag >= 0
+    return statistics
+
+
 # Class for ode solutions
 class ODESolution:
-    def __init__(self, model, solution):
+    def __init__(self, model, solution, statistics=None, sensitivity_parameters=None):
+        """
+        :param model: the kinetic model
+        :param solution: the solution returned by the solver
+        :param statistics: optional dict of the integration statistics, e.g.
+                           steps, solver_rhs_evaluations, jacobian_evaluations,
+                           error_test_failures, rhs_calls and wall_time (see
+                           KineticModel.solve_ode)
+        :param sensitivity_parameters: names of the parameters if the solution
+                           holds the forward sensitivities after the species
+        """
         self.ode_solution = solution
+        self.statistics = statistics if statistics is not None else dict()
 
         self.time    = np.array(solution.values.t)
 
         self.species = np.array(solution.values.y)
+
+        # Sensitivities dx/dp indexed by time, parameter and variable
+        self.sensitivities = None
+        if sensitivity_parameters is not None:
+            states = self.species
+            n_variables = len(model.ode_fun.variables)
+            self.species = states[:, :n_variables]
+            sensitivities = states[:, n_variables:]\
+                .reshape(len(self.time), n_variables, len(sensitivity_parameters))\
+                .transpose(0, 2, 1)
+            indexes = [pd.Index(self.time, name='time'),
+                       pd.Index(list(sensitivity_parameters), name='parameter'),
+                       pd.Index(list(model.ode_fun.variables), name='variable')]
+            self.sensitivities = Tensor(sensitivities, indexes)
+        # Solutions integrated in log concentrations are transformed back
+        if getattr(model.ode_fun, 'log_transform', False):
+            self.species = model.ode_fun.from_state(self.species)
         self.names = [x for x in model.ode_fun.variables]
 
         # TODO: Cleanup this
@@ -51,6 +118,8 @@ class ODESolution:
         self.concentrations = pd.DataFrame.from_dict(concentrations, orient='columns')
 
     def plot(self, filename=''):
+        # bokeh is only imported for plotting
+        from ..viz.plotting import timetrace_plot
         timetrace_plot(self.time, self.species, filename, legend=self.names)
 
     def copy(self):
@@ -64,6 +133,16 @@ class ODESolutionPopulation:
         sol_cols = list(list_of_solutions[0].concentrations.keys())
         self.data = pd.DataFrame(columns=['solution_id', 'time']+sol_cols)
 
+        # Integration statistics with one row per solution_id
+        self.statistics = pd.DataFrame([getattr(td, 'statistics', dict())
+                                        for td in list_of_solutions])
+        self.statistics.index.name = 'solution_id'
+
+        # Solutions that were stopped by a time or rhs budget
+        self.exceeded_budget = [e for e, td in enumerate(list_of_solutions)
+                                if getattr(td, 'statistics', dict()).get('status')
+                                in (TIME_BUDGET_EXCEEDED, RHS_BUDGET_EXCEEDED)]
+
         for e, td in enumerate(list_of_solutions):
             new_block = pd.DataFrame.from_dict(td.concentrations.copy())
             new_block['time'] = td.time
@@ -72,4 +151,5 @@ class ODESolutionPopulation:
             self.data = pd.concat([self.data, new_block])
 
     def plot(self, filename):
+        from ..viz.plotting import plot_population_per_variable
         plot_population_per_variable(self.data, filename)
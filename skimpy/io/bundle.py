@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import yaml
+from scipy.sparse import save_npz, load_npz
+from sympy import Symbol
+
+from skimpy.analysis.mca.elasticity_fun import ElasticityFunction
+from skimpy.analysis.ode.ode_fun import ODEFunction
+from skimpy.analysis.ode.elementary_fun import ElementaryODEFunction
+from skimpy.io.yaml import YAML_LOADER, export_to_yaml, make_model_from_dict
+from skimpy.utils import TabDict, iterable_to_tabdict
+from skimpy.utils.compile_sympy import get_fingerprint
+from skimpy.utils.cython_kernel import CythonKernel, get_platform_tag, \
+    get_kernel_directory
+from skimpy.utils.lazy import LazyFunction
+from skimpy.utils.namespace import QSSA
+
+"""
+Binary model bundles: a zip container with the model structure (yaml), the
+parameter vector, the reduced stoichiometry and the conservation relations,
+the fingerprints of the rate expressions and the compiled kernels. On the
+same platform the model is ready to simulate without deriving or compiling
+any expression.
+"""
+
+BUNDLE_FORMAT = 1
+
+ELASTICITY_FUNCTIONS = ['independent_elasticity_fun',
+                        'dependent_elasticity_fun',
+                        'parameter_elasticities_fun']
+
+
+#----------------------------------------------------------------
+#                       Model export
+#----------------------------------------------------------------
+
+def export_to_bundle(model, path):
+    """
+    Save a compiled model with its compiled kernels, compile_ode needs to be
+    called before and compile_mca to store the mca functions
+
+    :param model: compiled kinetic model
+    :type model: skimpy.core.KineticModel
+    :param path: path of the bundle
+    :return: Nothing
+    """
+    if getattr(model, 'ode_fun', None) is None:
+        raise AttributeError('Model has no compiled ode function, call compile_ode first')
+    if isinstance(model.ode_fun.build(), ElementaryODEFunction):
+        raise NotImplementedError('Sparse elementary ode functions can not be bundled, '
+                                  'call compile_ode with sparse_elementary=False')
+
+    # Compile all kernels such that the shared objects can be stored
+    model.warmup()
+
+    manifest = {'format': BUNDLE_FORMAT,
+                'name': model.name,
+                'platform': get_platform_tag(),
+                'sim_type': model.sim_type,
+                'functions': {}}
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr('model.yaml', export_to_yaml(model))
+
+        ode_fun = model.ode_fun.build()
+        entry = _write_kernel(bundle, 'ode_fun', ode_fun.function)
+        entry['variables'] = list(ode_fun.variables)
+        entry['parameters'] = [str(p) for p in ode_fun._parameters]
+        entry['log_transform'] = bool(ode_fun.log_transform)
+        manifest['functions']['ode_fun'] = entry
+
+        # Parameter vector of the ode kernel
+        parameter_values = [np.nan if v is None else v
+                            for v in ode_fun.parameters.values()]
+        _write_array(bundle, 'parameters.npy', np.array(parameter_values, dtype=np.double))
+
+        for name in ELASTICITY_FUNCTIONS:
+            elasticity_fun = getattr(model, name, None)
+            if elasticity_fun is None:
+                continue
+            elasticity_fun = elasticity_fun.build()
+            entry = _write_kernel(bundle, name, elasticity_fun.function)
+            entry['respective_variables'] = [str(k) for k in elasticity_fun.respective_variables]
+            entry['parameters'] = [str(p) for p in elasticity_fun.parameters]
+            entry['rows'] = [int(i) for i in elasticity_fun.rows]
+            entry['columns'] = [int(j) for j in elasticity_fun.columns]
+            entry['shape'] = [int(n) for n in elasticity_fun.shape]
+            manifest['functions'][name] = entry
+
+        if getattr(model, 'reduced_stoichiometry', None) is not None:
+            _write_matrix(bundle, 'reduced_stoichiometry.npz', model.reduced_stoichiometry)
+            _write_matrix(bundle, 'conservation_relation.npz', model.conservation_relation)
+            manifest['independent_variables_ix'] = [int(i) for i in model.independent_variables_ix]
+            manifest['dependent_variables_ix'] = [int(i) for i in model.dependent_variables_ix]
+
+        if model.sim_type == QSSA:
+            manifest['expression_fingerprints'] = \
+                {k: get_fingerprint(r.mechanism.reaction_rates['v_net'])
+                 for k, r in model.reactions.items()}
+
+        bundle.writestr('manifest.json', json.dumps(manifest, indent=1))
+
+
+def _write_kernel(bundle, name, kernel):
+    code_path = 'kernels/{}.pyx'.format(name)
+    bundle.writestr(code_path, kernel.code)
+
+    modules = []
+    for module_path in kernel.get_compiled_modules():
+        arcname = 'kernels/' + os.path.basename(module_path)
+        bundle.write(module_path, arcname)
+        modules.append(arcname)
+
+    return {'code': code_path, 'modules': modules}
+
+
+def _write_array(bundle, name, array):
+    data = io.BytesIO()
+    np.save(data, array)
+    bundle.writestr(name, data.getvalue())
+
+
+def _write_matrix(bundle, name, matrix):
+    data = io.BytesIO()
+    save_npz(data, matrix)
+    bundle.writestr(name, data.getvalue())
+
+
+#----------------------------------------------------------------
+#                       Model loading
+#----------------------------------------------------------------
+
+def load_bundle_model(path):
+    """
+    Load a model saved with export_to_bundle. If the bundle was saved on the
+    same platform the compiled kernels are loaded, otherwise they are compiled
+    from the stored code on first call. In both cases no expression is derived.
+
+    :param path: path of the bundle
+    :return: compiled KineticModel
+    """
+    with zipfile.ZipFile(path, 'r') as bundle:
+        manifest = json.loads(bundle.read('manifest.json').decode())
+        if manifest['format'] != BUNDLE_FORMAT:
+            raise ValueError('Bundle format {} is not supported'.format(manifest['format']))
+
+        the_dict = yaml.load(bundle.read('model.yaml'), Loader=YAML_LOADER)
+        # The moieties are stored as matrices
+        dependent_reactants = the_dict.pop('dependent_reactants', None)
+        model = make_model_from_dict(the_dict)
+
+        parameter_values = _read_array(bundle, 'parameters.npy')
+        for name, value in zip(manifest['functions']['ode_fun']['parameters'],
+                               parameter_values):
+            if not np.isnan(value):
+                model.parameters[name].value = value
+
+        load_modules = manifest['platform'] == get_platform_tag()
+        kernels = {name: _read_kernel(bundle, entry, load_modules)
+                   for name, entry in manifest['functions'].items()}
+
+        if 'independent_variables_ix' in manifest:
+            model.reduced_stoichiometry = _read_matrix(bundle, 'reduced_stoichiometry.npz')
+            model.conservation_relation = _read_matrix(bundle, 'conservation_relation.npz')
+            model.independent_variables_ix = manifest['independent_variables_ix']
+            model.dependent_variables_ix = manifest['dependent_variables_ix']
+            model.dependent_reactants = iterable_to_tabdict([model.reactants[r] for r in
+                                                            dependent_reactants or []])
+
+    model.expression_fingerprints = manifest.get('expression_fingerprints')
+
+    # Ode function
+    entry = manifest['functions']['ode_fun']
+    variables = _make_symbols(entry['variables'])
+    ode_fun = ODEFunction.from_kernel(model,
+                                      variables,
+                                      _make_symbols(entry['parameters']),
+                                      kernels['ode_fun'],
+                                      log_transform=entry.get('log_transform', False))
+    model.ode_fun = _make_built_function(ode_fun, 'ode', variables=variables,
+                                         log_transform=ode_fun.log_transform)
+    model.variables = variables
+
+    old_initial_conditions = model.initial_conditions
+    model.initial_conditions = TabDict([(x, 0.0) for x in variables])
+    model.initial_conditions.update(old_initial_conditions)
+
+    # Mca functions
+    for name in ELASTICITY_FUNCTIONS:
+        entry = manifest['functions'].get(name)
+        if entry is None:
+            setattr(model, name, None)
+            continue
+        respective_variables = _make_symbols(entry['respective_variables'])
+        elasticity_fun = ElasticityFunction.from_kernel(kernels[name],
+                                                        respective_variables,
+                                                        variables,
+                                                        _make_symbols(entry['parameters']),
+                                                        tuple(entry['rows']),
+                                                        tuple(entry['columns']),
+                                                        tuple(entry['shape']))
+        setattr(model, name, _make_built_function(
+            elasticity_fun, name,
+            respective_variables=respective_variables,
+            respective_variable_index=elasticity_fun.respective_variable_index))
+
+    if model.independent_elasticity_fun is not None:
+        model.make_control_functions()
+
+    model._simtype = manifest['sim_type']
+    model._modified = False
+    model._recompiled = True
+
+    return model
+
+
+def _read_kernel(bundle, entry, load_modules):
+    kernel = CythonKernel(bundle.read(entry['code']).decode())
+
+    if load_modules and entry['modules']:
+        # Extract the shared object next to the modules compiled by cython
+        arcname = entry['modules'][0]
+        directory = get_kernel_directory()
+        module_path = os.path.join(directory, os.path.basename(arcname))
+        if not os.path.isfile(module_path):
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            fid, temp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fid, 'wb') as f:
+                f.write(bundle.read(arcname))
+            os.replace(temp_path, module_path)
+        kernel.load_module(module_path)
+
+    return kernel
+
+
+def _read_array(bundle, name):
+    return np.load(io.BytesIO(bundle.read(name)))
+
+
+def _read_matrix(bundle, name):
+    return load_npz(io.BytesIO(bundle.read(name)))
+
+
+def _make_symbols(names):
+    return TabDict([(k, Symbol(k)) for k in names])
+
+
+def _make_built_function(function, name, **attributes):
+    handle = LazyFunction(lambda: function, name=name, **attributes)
+    handle.build()
+    return handle
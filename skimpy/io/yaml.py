@@ -37,19 +37,26 @@ from skimpy.utils import TabDict, iterable_to_tabdict
 from skimpy.core import Item, Reactant, Parameter, Reaction, BoundaryCondition, \
     ConstantConcentration, KineticModel, ExpressionModifier
 from skimpy.mechanisms import *
-from skimpy.utils.general import make_subclasses_dict, get_stoichiometry
+from skimpy.mechanisms.mechanism import MECHANISM_SUBCLASSES
+from skimpy.utils.general import SubclassRegistry, get_stoichiometry
 from skimpy.utils.namespace import PARAMETER, VARIABLE
 
 from skimpy.analysis.mca.utils import get_reduced_stoichiometry
 
+# Use the C implementation of the loader if libyaml is available
+YAML_LOADER = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+
+BOUNDARY_SUBCLASSES = SubclassRegistry(BoundaryCondition)
+MODIFIER_SUBCLASSES = SubclassRegistry(ExpressionModifier)
+
 def get_mechanism_subclasses():
-    return make_subclasses_dict(KineticMechanism)
+    return MECHANISM_SUBCLASSES
 
 def get_boundary_subclasses():
-    return make_subclasses_dict(BoundaryCondition)
+    return BOUNDARY_SUBCLASSES
 
 def get_modifier_subclasses():
-    return make_subclasses_dict(ExpressionModifier)
+    return MODIFIER_SUBCLASSES
 
 #TODO We need to do better?
 ALL_GENERIC_MECHANISM_SUBCLASSES = {'Convenience': make_convenience,
@@ -83,7 +90,8 @@ FIELDS_TO_SERIALIZE = [
 
 def parameter_representer(dumper, data):
     if data.value is not None:
-        return dumper.represent_float(data.value)
+        # Sampled values are numpy floats
+        return dumper.represent_float(float(data.value))
     else:
         return  dumper.represent_none(data.value)
 
@@ -137,9 +145,10 @@ def refresh_representers():
     yaml.add_representer(Parameter, parameter_representer)
     yaml.add_representer(Reaction, reaction_representer)
 
-    for the_class in get_mechanism_subclasses().values():
+    get_modifier_subclasses().refresh()
+    for the_class in get_mechanism_subclasses().refresh().values():
         yaml.add_representer(the_class, mechanism_representer)
-    for the_class in get_boundary_subclasses().values():
+    for the_class in get_boundary_subclasses().refresh().values():
         yaml.add_representer(the_class, boundary_condition_representer)
 
 
@@ -148,7 +157,8 @@ def export_to_yaml(model, path=None, **kwargs):
     # In case new custom mechanisms have been made 
     refresh_representers()
 
-    dict_model = vars(model)
+    # Copy such that the compiled functions of the model are kept
+    dict_model = dict(vars(model))
     # Add parameters that are properties
     dict_model['parameters'] = model.parameters
     fields_not_to_serialize = [x for x in dict_model if not x in FIELDS_TO_SERIALIZE]
@@ -166,7 +176,7 @@ def export_to_yaml(model, path=None, **kwargs):
 #                       Model loading
 #----------------------------------------------------------------
 
-def get_mechanism(classdict):
+def get_mechanism(classdict, cache=None):
     #TODO Make nice and more readable
     """
     This function should construct mechanism for the generic types
@@ -176,32 +186,48 @@ def get_mechanism(classdict):
                                   'substrate1':'atp_c',
                                   'product1'  :'gtp_c',
                                   }
+    :param cache: optional dict of the classes already resolved, such that
+                  each class is only resolved once when loading a model
 
     :return:
     """
     classname = classdict.pop('class')
+    stoich_dict = classdict.get('mechanism_stoichiometry')
+
+    key = (classname, None if stoich_dict is None
+                      else tuple(sorted(stoich_dict.items())))
+    if cache is None:
+        cache = dict()
+    try:
+        the_class, is_modifier = cache[key]
+    except KeyError:
+        the_class, is_modifier = cache[key] = _resolve_mechanism(classname, stoich_dict)
 
+    # Modifiers take the stoichiometry as argument
+    if not is_modifier:
+        classdict.pop('mechanism_stoichiometry', None)
+
+    return the_class
+
+
+def _resolve_mechanism(classname, stoich_dict):
     # Checks if the classname is a modifier (Modifiers are subclasses of Mechanisms)
     # SPLIT FOR MECHANISM vs Modifier
     _find = lambda s: classname.find(s) >= 0
-    try:
-        if any(map(_find, get_modifier_subclasses())):
-            # If the class name is indeed a modifier, get the actual
-            return get_mechanism_subclasses()[classname]
+    if any(map(_find, get_modifier_subclasses())):
+        # If the class name is indeed a modifier, get the actual
+        return get_mechanism_subclasses()[classname], True
 
-        # TODO Make this realiable and nice !!!!
-        # TODO the way we create the mechanism can be easily
-        stoich_dict = classdict.pop('mechanism_stoichiometry')
-        make_mechanism = get_generic_constructor(classname)
+    make_mechanism = get_generic_constructor(classname)
+    if stoich_dict is None or make_mechanism is None:
+        return get_mechanism_subclasses()[classname], False
 
-        index_stoich = [(int(re.findall(r'\d+',k)[0]), v)
-                        for k, v in stoich_dict.items()]
+    # TODO Make this realiable and nice !!!!
+    index_stoich = [(int(re.findall(r'\d+',k)[0]), v)
+                    for k, v in stoich_dict.items()]
 
-        stoichiometry = [v for k,v in sorted(index_stoich)]
-        return make_mechanism(stoichiometry)
-
-    except KeyError:
-        return get_mechanism_subclasses()[classname]
+    stoichiometry = [v for k,v in sorted(index_stoich)]
+    return make_mechanism(stoichiometry), False
 
 
 def get_generic_constructor(s):
@@ -217,13 +243,26 @@ def get_stoich(s):
 
 def load_yaml_model(path):
     with open(path,'r') as fid:
-        the_dict = yaml.full_load(fid)
+        the_dict = yaml.load(fid, Loader=YAML_LOADER)
+
+    return make_model_from_dict(the_dict)
 
+
+def make_model_from_dict(the_dict):
+    """
+    Build a kinetic model from the dict of an exported model
+
+    :param the_dict: dict as loaded from the yaml file
+    :return: KineticModel
+    """
     new = KineticModel(name = the_dict['name'])
 
+    # Resolve each mechanism class only once
+    mechanism_cache = dict()
+
     # Rebuild the reactions
     for the_reaction in the_dict['reactions'].values():
-        TheMechanism = get_mechanism(the_reaction['mechanism'])
+        TheMechanism = get_mechanism(the_reaction['mechanism'], mechanism_cache)
         the_reactants = TheMechanism.Reactants(**the_reaction['mechanism'])
         new_reaction = Reaction(name=the_reaction['name'],
                                 mechanism=TheMechanism,
@@ -231,7 +270,7 @@ def load_yaml_model(path):
         # Add kinetic modifiers
         modifiers = the_reaction['modifiers']
         for the_modifier in modifiers.values():
-            TheModifier = get_mechanism(the_modifier)
+            TheModifier = get_mechanism(the_modifier, mechanism_cache)
             new_modifier = TheModifier(**the_modifier)
             new_reaction.modifiers[new_modifier.name] = new_modifier
 
@@ -256,15 +295,12 @@ def load_yaml_model(path):
 
 
     # Parameter assignment based on what parameters have been stored
-    for rxn_obj in new.reactions.values():
-        # Look into parameters for assignment
-        for p in rxn_obj.parameters.values():
-            # Try to find the parameter in our YAML
-            try:
-                p.value = the_dict['parameters'][str(p.symbol)]
-            except KeyError:
-                #No value found
-                pass
+    parameters = new.parameters
+    for name, value in the_dict['parameters'].items():
+        # Stored values that are not parameters of the model are skipped
+        the_parameter = parameters.get(name)
+        if the_parameter is not None:
+            the_parameter.value = value
 
     # Initial conditions
     for the_ic, value in the_dict['initial_conditions'].items():
@@ -26,32 +26,26 @@ limitations under the License.
 """
 
 
-from sympy import sympify
+from sympy import sympify, Mul
 
-from .mechanism import KineticMechanism,ElementrayReactionStep
+from .mechanism import KineticMechanism,ElementrayReactionStep, \
+    add_log_order, combine_log_elasticities
 from ..core.reactions import Reaction
 from ..utils.tabdict import TabDict
 from collections import namedtuple
 from ..core.itemsets import make_parameter_set, make_reactant_set
-from skimpy.utils.general import make_subclasses_dict
+from .mechanism import mechanism_factory
 from ..utils.namespace import *
 from .utils import stringify_stoichiometry
 
 
+@mechanism_factory
 def make_convenience(stoichiometry):
 
     """
 
     :param stoichiometry is a list of the reaction stoichioemtry
     """
-    ALL_MECHANISM_SUBCLASSES = make_subclasses_dict(KineticMechanism)
-
-    new_class_name = "Convenience"\
-                     + "_{0}".format(stringify_stoichiometry(stoichiometry))
-
-    if new_class_name in ALL_MECHANISM_SUBCLASSES.keys():
-        return ALL_MECHANISM_SUBCLASSES[new_class_name]
-
     class Convenience(KineticMechanism):
         """A reversible N-M enyme class """
 
@@ -203,6 +197,74 @@ def make_convenience(stoichiometry):
 
                 self.expressions = expressions
 
+        def get_log_elasticities(self):
+            reactant_km_relation = {self.reactants[v].symbol: k
+                                    for k, v in self.parameter_reactant_links.items()}
+
+            substrates = {k:r for k,r in self.reactants.items()
+                          if k.startswith('substrate')}
+
+            products= {k:r for k,r in self.reactants.items()
+                          if k.startswith('product')}
+
+            keq = self.parameters.k_equilibrium.symbol
+            vmaxf = self.parameters.vmax_forward.symbol
+
+            forward = {vmaxf: 1}
+            backward = {vmaxf: 1, keq: -1}
+            displacement = 1/keq
+
+            substrate_terms = []
+            for type, this_substrate in substrates.items():
+                s = this_substrate.symbol
+                kms = self.parameters[reactant_km_relation[s]].symbol
+                stoich = abs(self.reactant_stoichiometry[type])
+                add_log_order(forward, s, stoich)
+                add_log_order(forward, kms, -stoich)
+                add_log_order(backward, kms, -stoich)
+                displacement *= s**(-stoich)
+                substrate_terms.append((s, kms, stoich))
+
+            product_terms = []
+            for type, this_product in products.items():
+                p = this_product.symbol
+                kmp = self.parameters[reactant_km_relation[p]].symbol
+                stoich = abs(self.reactant_stoichiometry[type])
+                add_log_order(backward, p, stoich)
+                displacement *= p**stoich
+                product_terms.append((p, kmp, stoich))
+
+            # Binding polynomials 1 + x/km + ... + (x/km)**n and
+            # their log derivatives
+            polynomials = []
+            for terms in (substrate_terms, product_terms):
+                these_polynomials = []
+                for x, km, stoich in terms:
+                    this_polynomial = 1
+                    this_derivative = 0
+                    for alpha in range(int(stoich)):
+                        this_polynomial += (x/km)**(alpha+1)
+                        this_derivative += (alpha+1)*(x/km)**(alpha+1)
+                    these_polynomials.append((this_polynomial, this_derivative))
+                polynomials.append(these_polynomials)
+
+            common_denominator = Mul(*[q for q, _ in polynomials[0]]) \
+                                 + Mul(*[q for q, _ in polynomials[1]]) - 1
+
+            denominator = {}
+            for terms, these_polynomials in zip((substrate_terms, product_terms),
+                                                polynomials):
+                for k, ((x, km, _), (_, this_derivative)) \
+                        in enumerate(zip(terms, these_polynomials)):
+                    others = Mul(*[q for l, (q, _) in enumerate(these_polynomials)
+                                   if l != k])
+                    this_elasticity = others*this_derivative/common_denominator
+                    add_log_order(denominator, x, this_elasticity)
+                    add_log_order(denominator, km, -this_elasticity)
+
+            return combine_log_elasticities(displacement, forward,
+                                            backward, denominator)
+
         """"
         Convenience kinetics has no detailed mechanism 
         """
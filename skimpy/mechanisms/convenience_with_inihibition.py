@@ -33,26 +33,18 @@ from ..core.reactions import Reaction
 from ..utils.tabdict import TabDict
 from collections import namedtuple
 from ..core.itemsets import make_parameter_set, make_reactant_set
-from skimpy.utils.general import make_subclasses_dict
+from .mechanism import mechanism_factory
 from ..utils.namespace import *
 from .utils import stringify_stoichiometry
 
 
+@mechanism_factory
 def make_convenience_with_inhibition(stoichiometry, inihbitor_stoichiometry):
 
     """
 
     :param stoichiometry is a list of the reaction stoichioemtry
     """
-    ALL_MECHANISM_SUBCLASSES = make_subclasses_dict(KineticMechanism)
-
-    new_class_name = "Convenience"\
-                     + "_{0}".format(stringify_stoichiometry(stoichiometry,
-                                                             inihibitors=inihbitor_stoichiometry))
-
-    if new_class_name in ALL_MECHANISM_SUBCLASSES.keys():
-        return ALL_MECHANISM_SUBCLASSES[new_class_name]
-
     class ConvenienceInhibited(KineticMechanism):
         """A reversible N-M enyme class with inhibitors as described in:
 
@@ -25,16 +25,18 @@ limitations under the License.
 
 """
 
-from sympy import Symbol, exp
-from .mechanism import KineticMechanism
+from sympy import Symbol, exp, log
+from .mechanism import KineticMechanism, add_log_order, \
+    combine_log_elasticities
 from ..utils.tabdict import TabDict
 from collections import namedtuple
 from ..core.itemsets import make_parameter_set, make_reactant_set
-from skimpy.utils.general import make_subclasses_dict
+from .mechanism import mechanism_factory
 from ..utils.namespace import *
 from .utils import stringify_stoichiometry
 
 
+@mechanism_factory
 def make_generalized_elementary_kinetics(stoichiometry, generalized_reactants):
     """
     Creates a reversible N-M GeneralizedElementaryKinetics class
@@ -52,15 +54,6 @@ def make_generalized_elementary_kinetics(stoichiometry, generalized_reactants):
         with v_0 beeing the reversible Massaction flux 
 
     """
-    # This refresh all subclasses and fetches already create mechanism classes
-    ALL_MECHANISM_SUBCLASSES = make_subclasses_dict(KineticMechanism)
-
-    new_class_name = "GEEK" \
-                     + "_{0}".format(stringify_stoichiometry(stoichiometry))
-
-    if new_class_name in ALL_MECHANISM_SUBCLASSES.keys():
-        return ALL_MECHANISM_SUBCLASSES[new_class_name]
-
     class GeneralizedElementaryKinetics(KineticMechanism):
         """
         A reversible N-M GEEK class
@@ -207,6 +200,50 @@ def make_generalized_elementary_kinetics(stoichiometry, generalized_reactants):
                 stoich = self.reactant_stoichiometry[type]
                 self.expressions[p] = stoich * self.reaction_rates['v_net']
 
+        def get_log_elasticities(self):
+
+            substrates = {k: r for k, r in self.reactants.items()
+                          if k.startswith('substrate')}
+
+            products = {k: r for k, r in self.reactants.items()
+                        if k.startswith('product')}
+
+            kf = self.parameters.vmax_forward.symbol
+            Keq = self.parameters.k_equilibrium.symbol
+
+            beta_f = self.parameters.beta_forward.symbol
+            beta_r = self.parameters.beta_reverse.symbol
+
+            forward = {kf: 1, beta_f: beta_f}
+            backward = {kf: 1, Keq: -1, beta_r: beta_r}
+            displacement = exp(beta_r - beta_f)/Keq
+
+            for this_type, this_substrate in substrates.items():
+                s = this_substrate.symbol
+                add_log_order(forward, s, 1)
+                displacement /= s
+
+            for this_type, this_product in products.items():
+                p = this_product.symbol
+                add_log_order(backward, p, 1)
+                displacement *= p
+
+            for this_gr in self.inhibitors.values():
+
+                alpha_f, alpha_r, gr_0 = [self.parameters[p].symbol for p in
+                                          self.reactant_parameter_links[this_gr.name]]
+
+                gr = this_gr.symbol
+                add_log_order(forward, gr, alpha_f)
+                add_log_order(forward, gr_0, -alpha_f)
+                add_log_order(forward, alpha_f, alpha_f*log(gr/gr_0))
+                add_log_order(backward, gr, alpha_r)
+                add_log_order(backward, gr_0, -alpha_r)
+                add_log_order(backward, alpha_r, alpha_r*log(gr/gr_0))
+                displacement *= (gr/gr_0)**(alpha_r - alpha_f)
+
+            return combine_log_elasticities(displacement, forward, backward)
+
         """"
         Not implemented not necessary for elementary mechanisms
         """
@@ -26,19 +26,21 @@ limitations under the License.
 """
 
 
-from sympy import sympify
+from sympy import sympify, log
 from numpy import abs as np_abs
 
-from .mechanism import KineticMechanism,ElementrayReactionStep
+from .mechanism import KineticMechanism,ElementrayReactionStep, \
+    add_log_order, combine_log_elasticities
 from ..core.reactions import Reaction
 from ..utils.tabdict import TabDict
 from collections import namedtuple
 from ..core.itemsets import make_parameter_set, make_reactant_set
-from skimpy.utils.general import make_subclasses_dict
+from .mechanism import mechanism_factory
 from ..utils.namespace import *
 from .utils import stringify_stoichiometry
 
 
+@mechanism_factory
 def make_generalized_reversible_hill_n_n(stoichiometry):
 
     """
@@ -46,15 +48,6 @@ def make_generalized_reversible_hill_n_n(stoichiometry):
     :param stoichiometry is a list of the reaction stoichioemtry
     """
 
-    # This refresh all subclasses and fetches already create mechanism classes
-    ALL_MECHANISM_SUBCLASSES = make_subclasses_dict(KineticMechanism)
-
-    new_class_name = "GeneralizedReversibleHill"\
-                     + "_{0}".format(stringify_stoichiometry(stoichiometry))
-
-    if new_class_name in ALL_MECHANISM_SUBCLASSES.keys():
-        return ALL_MECHANISM_SUBCLASSES[new_class_name]
-
     class GeneralizedReversibleHill(KineticMechanism):
         """
         A reversible hill N-N enzyme class
@@ -217,6 +210,62 @@ def make_generalized_reversible_hill_n_n(stoichiometry):
 
                 self.expressions = expressions
 
+        def get_log_elasticities(self):
+
+            substrates = TabDict([(k, self.reactants[k])
+                                  for k in self.reactant_list
+                                  if k.startswith('substrate')])
+
+            products = TabDict([(k, self.reactants[k])
+                                for k in self.reactant_list
+                                if k.startswith('product')])
+
+            keq = self.parameters.k_equilibrium.symbol
+            vmaxf = self.parameters.vmax_forward.symbol
+
+            forward = {vmaxf: 1}
+            backward = {vmaxf: 1, keq: -1}
+            displacement = 1/keq
+
+            for type, this_substrate in substrates.items():
+                s = this_substrate.symbol
+                kms = self.parameters[self.reactant_parameter_links[type]].symbol
+                stoich = abs(self.reactant_stoichiometry[type])
+                add_log_order(forward, s, stoich)
+                add_log_order(forward, kms, -stoich)
+                add_log_order(backward, kms, -stoich)
+                displacement *= s**(-stoich)
+
+            for type, this_product in products.items():
+                p = this_product.symbol
+                stoich = abs(self.reactant_stoichiometry[type])
+                add_log_order(backward, p, stoich)
+                displacement *= p**stoich
+
+            # Every substrate product pair contributes a factor
+            # (1 + u**h) / u**(h-1) with u = p/kmp + s/kms to the denominator
+            denominator = {}
+            h = self.parameters.hill_coefficient.symbol
+            for this_product,this_substrate in zip(substrates.items(),products.items()):
+                substrate_type = this_substrate[0]
+                product_type = this_product[0]
+                s = this_substrate[1].symbol
+                p = this_product[1].symbol
+                kms = self.parameters[self.reactant_parameter_links[substrate_type]].symbol
+                kmp = self.parameters[self.reactant_parameter_links[product_type]].symbol
+
+                u = p/kmp + s/kms
+                dlog_factor_dlog_u = h*u**h/(1 + u**h) - (h - 1)
+                for x, km in ((s, kms), (p, kmp)):
+                    this_elasticity = x/km/u*dlog_factor_dlog_u
+                    add_log_order(denominator, x, this_elasticity)
+                    add_log_order(denominator, km, -this_elasticity)
+
+                add_log_order(denominator, h, h*(u**h*log(u)/(1 + u**h) - log(u)))
+
+            return combine_log_elasticities(displacement, forward,
+                                            backward, denominator)
+
 
         """"
         GeneralizedReversibleHill kinetics has no detailed mechanism 
@@ -32,27 +32,19 @@ from ..core.reactions import Reaction
 from ..utils.tabdict import TabDict
 from collections import namedtuple
 from ..core.itemsets import make_parameter_set, make_reactant_set
-from skimpy.utils.general import make_subclasses_dict
+from .mechanism import mechanism_factory
 from ..utils.namespace import *
 from .utils import stringify_stoichiometry
 
 
 
+@mechanism_factory
 def make_irrev_massaction(stoichiometry):
 
     """
 
     :param stoichiometry is a list of the reaction stoichioemtry
     """
-    # This refresh all subclasses and fetches already create mechanism classes
-    ALL_MECHANISM_SUBCLASSES = make_subclasses_dict(KineticMechanism)
-
-    new_class_name = "IrrevMassaction"\
-                     + "_{0}".format(stringify_stoichiometry(stoichiometry))
-
-    if new_class_name in ALL_MECHANISM_SUBCLASSES.keys():
-        return ALL_MECHANISM_SUBCLASSES[new_class_name]
-
     class IrrevMassaction(KineticMechanism):
         """A reversible N-M enyme class """
 
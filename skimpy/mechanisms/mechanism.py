@@ -25,8 +25,13 @@ limitations under the License.
 
 """
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from functools import wraps
+from sympy import sympify, Mul
 from skimpy.core.itemsets import Reactant
 from skimpy.utils.namespace import *
+from skimpy.utils.general import SubclassRegistry
+from skimpy.utils.tabdict import TabDict
 
 
 class KineticMechanism(ABC):
@@ -113,6 +118,25 @@ class KineticMechanism(ABC):
     def calculate_rate_constants(self):
         pass
 
+    def get_elementary_steps(self):
+        """
+        Optional mass action form of the full rate expressions used by the
+        sparse elementary ode function (see ElementaryODEFunction). Adds the
+        enzyme and the complexes to the reactants like
+        get_full_rate_expression.
+        :return: TabDict of ElementaryStep indexed by the rate name or None
+        """
+        return None
+
+    def get_log_elasticities(self):
+        """
+        Optional closed form of the log-elasticities of the net rate
+        d log(v_net) / d log(x) indexed by the symbol x. Symbols that are
+        not returned (or None) are differentiated symbolically.
+        :return: dict of sympy expressions or None
+        """
+        return None
+
     def get_parameters_from_expression(self, expr):
 
         reactants = [x.symbol for x in self.reactants.values()
@@ -127,6 +151,113 @@ class KineticMechanism(ABC):
         return parameters
 
 
+# Mass action step v = rate_constant * prod(x**order) where reactant_orders
+# and stoichiometry are dicts indexed by the reactant symbols
+ElementaryStep = namedtuple('ElementaryStep', ['rate_constant',
+                                               'reactant_orders',
+                                               'stoichiometry'])
+
+
+def make_elementary_expressions(steps):
+    """
+    Rate expressions of mass action steps and the resulting rates of change
+    of the reactants
+
+    :param steps: TabDict of ElementaryStep indexed by the rate name
+    :return: tuple of the TabDict of the rates and the dict of the expressions
+    """
+    reaction_rates = TabDict([])
+    expressions = {}
+    for name, this_step in steps.items():
+        rate = this_step.rate_constant \
+               * Mul(*[x**order for x, order in this_step.reactant_orders.items()])
+        reaction_rates[name] = rate
+        for x, coefficient in this_step.stoichiometry.items():
+            expressions[x] = expressions.get(x, 0) + coefficient*rate
+
+    return reaction_rates, expressions
+
+
+# Mechanism classes made by the factories indexed by the factory name and its
+# arguments, e.g. ('make_convenience', (-1, -1, 1))
+MECHANISM_REGISTRY = {}
+
+
+def mechanism_factory(factory):
+    """
+    Decorator for the factories of generic mechanism classes (e.g.
+    make_convenience) that returns the class made before for the same
+    arguments and registers new classes by name in MECHANISM_SUBCLASSES
+
+    :param factory: function of the stoichiometry (and inhibitors) returning
+                    a KineticMechanism subclass
+    :return: the cached factory
+    """
+    @wraps(factory)
+    def make_mechanism(*args):
+        key = (factory.__name__,) + tuple(_freeze(a) for a in args)
+        try:
+            return MECHANISM_REGISTRY[key]
+        except KeyError:
+            mechanism = factory(*args)
+            MECHANISM_REGISTRY[key] = mechanism
+            MECHANISM_SUBCLASSES.register(mechanism)
+            return mechanism
+
+    return make_mechanism
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def add_log_order(log_orders, symbol, value):
+    """
+    Accumulate the log order of a symbol, a symbol can appear multiple times
+    in a rate expression
+    """
+    if symbol in log_orders:
+        log_orders[symbol] += value
+    else:
+        log_orders[symbol] = value
+
+
+def combine_log_elasticities(displacement, forward, backward, denominator=None):
+    """
+    Log-elasticities of a rate v = (F - B)/D
+
+        e_x = (f_x - g*b_x)/(1 - g) - d_x
+
+    :param displacement: g = B/F
+    :param forward: dict of the log orders f_x of the forward term F
+    :param backward: dict of the log orders b_x of the backward term B
+    :param denominator: dict of the log-elasticities d_x of the denominator D
+    :return: dict of the log-elasticities indexed by symbol
+    """
+    if denominator is None:
+        denominator = {}
+
+    elasticities = {}
+    for x in set(forward).union(backward, denominator):
+        f_x = forward.get(x, 0)
+        b_x = backward.get(x, 0)
+        if f_x == b_x:
+            this_elasticity = f_x
+        else:
+            this_elasticity = (f_x - displacement*b_x)/(1 - displacement)
+        elasticities[x] = sympify(this_elasticity - denominator.get(x, 0))
+
+    return elasticities
+
+
+# All mechanism classes indexed by their name
+MECHANISM_SUBCLASSES = SubclassRegistry(KineticMechanism)
+
+
 class ElementrayReactionStep(object):
     def __init__(self,educts,products,rate_constant_name):
         self.educts = educts
@@ -26,7 +26,8 @@ limitations under the License.
 """
 
 from sympy import sympify
-from .mechanism import KineticMechanism,ElementrayReactionStep
+from .mechanism import KineticMechanism,ElementrayReactionStep, \
+    ElementaryStep, combine_log_elasticities, make_elementary_expressions
 from ..core.reactions import Reaction
 from ..core.itemsets import make_parameter_set, make_reactant_set, Reactant
 from ..utils.tabdict import TabDict
@@ -118,9 +119,44 @@ class ReversibleMichaelisMenten(KineticMechanism):
         self.expressions = {s: -self.reaction_rates['v_net'],
                             p:  self.reaction_rates['v_net']}
 
+    def get_log_elasticities(self):
+        s = self.reactants.substrate.symbol
+        p = self.reactants.product.symbol
+        # The closed form assumes distinct substrate and product
+        if s == p:
+            return None
 
+        kms = self.parameters.km_substrate.symbol
+        kmp = self.parameters.km_product.symbol
+        keq = self.parameters.k_equilibrium.symbol
 
-    def get_full_rate_expression(self):
+        if self.with_catalyst_concentration:
+            vmaxf = {self.reactants.enzyme.symbol: 1,
+                     self.parameters.kcat_forward.symbol: 1}
+        else:
+            vmaxf = {self.parameters.vmax_forward.symbol: 1}
+
+        common_denominator = 1 + s/kms + p/kmp
+        saturation_substrate = s/kms/common_denominator
+        saturation_product = p/kmp/common_denominator
+
+        # v = vmaxf/kms * (s - p/keq) / (1 + s/kms + p/kmp)
+        displacement = p/s/keq
+        forward = dict(vmaxf)
+        forward.update({s: 1, kms: -1})
+        backward = dict(vmaxf)
+        backward.update({p: 1, kms: -1, keq: -1})
+        denominator = {s: saturation_substrate,
+                       p: saturation_product,
+                       kms: -saturation_substrate,
+                       kmp: -saturation_product}
+
+        return combine_log_elasticities(displacement, forward,
+                                        backward, denominator)
+
+
+
+    def get_elementary_steps(self):
         # Calculate rates uppon initialization
         rate_constants = [ 'k1_fwd','k1_bwd','k2_fwd','k2_bwd']
         if any([self.parameters[x].value is None for x in rate_constants] ):
@@ -141,21 +177,16 @@ class ReversibleMichaelisMenten(KineticMechanism):
         k2_fwd = self.parameters.k2_fwd.symbol
         k2_bwd = self.parameters.k2_bwd.symbol
 
-        r1f = k1_fwd*e*s
-        r1b = k1_bwd*es
-        r2f = k2_fwd*es
-        r2b = k2_bwd*e*p
-
-        self.reaction_rates = TabDict([('r1f', r1f),
-                                       ('r1b', r1b),
-                                       ('r2f', r2f),
-                                       ('r2b', r2b),
-                                       ])
+        # E + S <-> ES <-> E + P
+        return TabDict([('r1f', ElementaryStep(k1_fwd, {e: 1, s: 1}, {e: -1, s: -1, es: 1})),
+                        ('r1b', ElementaryStep(k1_bwd, {es: 1}, {e: 1, s: 1, es: -1})),
+                        ('r2f', ElementaryStep(k2_fwd, {es: 1}, {e: 1, p: 1, es: -1})),
+                        ('r2b', ElementaryStep(k2_bwd, {e: 1, p: 1}, {e: -1, p: -1, es: 1})),
+                        ])
 
-        self.expressions = {s: r1b - r1f,
-                            p: r2f - r2b,
-                            es: r1f - r1b - r2f + r2b,
-                            e: r1b - r1f - r2b + r2f}
+    def get_full_rate_expression(self):
+        steps = self.get_elementary_steps()
+        self.reaction_rates, self.expressions = make_elementary_expressions(steps)
 
         parameters = [self.get_parameters_from_expression(expr)
                       for expr in self.expressions.values()]
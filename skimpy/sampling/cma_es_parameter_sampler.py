@@ -32,9 +32,9 @@ from sympy import sympify, Symbol
 
 from skimpy.sampling.utils import calc_max_eigenvalue, calc_parameters
 from skimpy.utils.namespace import *
+from skimpy.utils.profiling import timed
 
 import random, array
-from deap import algorithms
 
 
 
@@ -52,6 +52,7 @@ class CMAESParameterSampler(ParameterSampler):
     # if parameters are not defined put default values
     Parameters.__new__.__defaults__ = (None,) * len(Parameters._fields)
 
+    @timed('sampling.cma_es')
     def sample(self,
                compiled_model,
                flux_dict,
@@ -227,6 +228,7 @@ Utils
 
 
 def run_ea(toolbox, ngen=None ,stats=None, hof=None, verbose=False):
+    from deap import algorithms
     return algorithms.eaGenerateUpdate(toolbox, ngen=ngen, stats=stats, halloffame=hof)
 
 
@@ -238,4 +240,5 @@ def init_parameters(low, up):
        return [random.uniform(a, b) for a, b in zip(low, up)]
 
 def pareto_dominance(x,y):
+    from deap import tools
     return tools.emo.isDominated(x.fitness.values, y.fitness.values)
@@ -34,15 +34,13 @@ from skimpy.sampling.utils import calc_max_eigenvalue, calc_parameters
 from skimpy.utils.namespace import *
 
 from skimpy.utils.general import sanitize_cobra_vars
+from skimpy.utils.profiling import timed
 
 from skimpy.sampling.flux_concentration_sampler import FluxConcentrationSampler
 from skimpy.sampling.simple_parameter_sampler import SimpleParameterSampler
 from skimpy.io.generate_from_pytfa import FromPyTFA
 
-from pytfa.analysis import  GeneralizedACHRSampler
-
 import random, array
-from deap import algorithms
 
 from pandas import DataFrame,Series
 
@@ -77,6 +75,7 @@ class GaFluxConcentrationSampler(FluxConcentrationSampler):
                                            ])
     Parameters.__new__.__defaults__ = (None,) * len(Parameters._fields)
 
+    @timed('sampling.ga_flux_concentration')
     def sample(
                self,
                tmodel,
@@ -102,6 +101,7 @@ class GaFluxConcentrationSampler(FluxConcentrationSampler):
         self.tmodel = tmodel
         self.kmodel = kmodel
 
+        from pytfa.analysis import GeneralizedACHRSampler
         self.sampler = GeneralizedACHRSampler(tmodel, thinning=100, seed=self.parameters.seed)
 
         #Create the initial population from TFA Sampling
@@ -160,6 +160,7 @@ class GaFluxConcentrationSampler(FluxConcentrationSampler):
 
 
     def run_ea(self,toolbox, stats=None, verbose=False):
+        from deap import algorithms
         pop = toolbox.population(n=toolbox.pop_size)
         #pop = toolbox.select(pop, len(pop))
         return algorithms.eaMuPlusLambda(pop, toolbox, mu=toolbox.pop_size,
@@ -32,9 +32,9 @@ from sympy import sympify, Symbol
 
 from skimpy.sampling.utils import calc_max_eigenvalue, calc_parameters
 from skimpy.utils.namespace import *
+from skimpy.utils.profiling import timed
 
 import random, array
-from deap import algorithms
 
 
 
@@ -52,6 +52,7 @@ class GaParameterSampler(ParameterSampler):
     # if parameters are not defined put default values
     Parameters.__new__.__defaults__ = (None,) * len(Parameters._fields)
 
+    @timed('sampling.ga')
     def sample(self,
                compiled_model,
                flux_dict,
@@ -192,6 +193,7 @@ Utils
 
 
 def run_ea(toolbox, stats=None, verbose=False):
+    from deap import algorithms
     pop = toolbox.population(n=toolbox.pop_size)
     pop = toolbox.select(pop, len(pop))
     return algorithms.eaMuPlusLambda(pop, toolbox, mu=toolbox.pop_size,
@@ -210,4 +212,5 @@ def init_parameters(low, up):
        return [random.uniform(a, b) for a, b in zip(low, up)]
 
 def pareto_dominance(x,y):
+    from deap import tools
     return tools.emo.isDominated(x.fitness.values, y.fitness.values)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIE CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import numpy as np
+
+from scipy.sparse import coo_matrix, csc_matrix, diags
+
+from skimpy.utils.compile_sympy import make_cython_function
+from skimpy.utils.profiling import timer
+
+# Upper bound of the number of jacobian entries that are held at once by
+# get_real_eigenvalues (2**24 doubles are 128 MB)
+MAX_BATCH_ENTRIES = 2**24
+
+
+class SaturationJacobianFunction():
+    def __init__(self, model, saturation_parameter_function, concentrations, flux_dict):
+        """
+        Jacobian J = N.V.E.X^-1 at a fixed flux and concentration state as a
+        function of the sampled saturations only. The elasticities are
+        expressed in the saturations directly such that the Km's and Vmax's
+        do not need to be computed to check the stability of a sample.
+
+        Requires the compiled mca functions of the model (see compile_jacobian).
+
+        :param model: KineticModel with compiled mca functions
+        :param saturation_parameter_function: SaturationParameterFunction of the model
+        :param concentrations: dict of concentrations indexed by symbol
+        :param flux_dict: dict of fluxes indexed by reaction name
+        """
+        self.saturation_parameter_function = saturation_parameter_function
+
+        if saturation_parameter_function.sym_saturations is None:
+            self.sym_saturations = []
+            self.lower_saturations = np.zeros(0)
+            self.upper_saturations = np.zeros(0)
+        else:
+            self.sym_saturations = saturation_parameter_function.sym_saturations
+            self.lower_saturations, self.upper_saturations = \
+                saturation_parameter_function.get_saturation_bounds(concentrations)
+
+        # All values that are fixed for the steady state
+        values = {p.symbol: p.value for p in model.parameters.values()
+                  if p.value is not None}
+        values.update(concentrations)
+
+        # The log elasticities do not depend on the Vmax's
+        for this_reaction in model.reactions.values():
+            values[this_reaction.parameters.vmax_forward.symbol] = 1.0
+
+        # The Km's are expressed by their saturations
+        if saturation_parameter_function.expressions is not None:
+            for p, e in zip(saturation_parameter_function.saturation_parameters,
+                            saturation_parameter_function.expressions):
+                values[p.symbol] = e.xreplace(concentrations)
+
+        independent_elasticity_fun = model.independent_elasticity_fun
+        dependent_elasticity_fun = model.dependent_elasticity_fun
+
+        concentration_vector = np.array([concentrations[r.symbol]
+                                         for r in model.reactants.values()])
+        fluxes = np.array([flux_dict[this_reaction.name]
+                           for this_reaction in model.reactions.values()])
+
+        reduced_stoichiometry = csc_matrix(model.reduced_stoichiometry)
+        flux_stoichiometry = reduced_stoichiometry.dot(diags(fluxes)).tocsc()
+        self.shape = (reduced_stoichiometry.shape[0], reduced_stoichiometry.shape[0])
+
+        # Index structures to map the elasticity values to the entries of J
+        coordinates = list(independent_elasticity_fun.expressions.keys())
+        expressions = [independent_elasticity_fun.expressions[c] for c in coordinates]
+
+        if model.conservation_relation.nnz == 0:
+            independent_concentrations = concentration_vector
+        else:
+            independent_concentrations = concentration_vector[model.independent_variables_ix]
+
+        column_weights = [{column: 1.0/independent_concentrations[column]}
+                          for _, column in coordinates]
+
+        if model.conservation_relation.nnz > 0:
+            # Dependent elasticities enter through the dependent weights E_d.Q_d
+            dependent_weights = csc_matrix(dependent_elasticity_fun.get_dependent_weights(
+                concentration_vector=concentration_vector,
+                L0=model.conservation_relation,
+                all_independent_ix=model.independent_variables_ix,
+                all_dependent_ix=model.dependent_variables_ix,
+            )).tocsr()
+
+            dependent_coordinates = list(dependent_elasticity_fun.expressions.keys())
+            for row, column in dependent_coordinates:
+                this_weight_row = dependent_weights.getrow(column)
+                column_weights.append(
+                    {j: w/independent_concentrations[j]
+                     for j, w in zip(this_weight_row.indices, this_weight_row.data)})
+
+            coordinates += dependent_coordinates
+            expressions += [dependent_elasticity_fun.expressions[c]
+                            for c in dependent_coordinates]
+
+        # vec(J) = M.e with M[i*n+j, k] = (N.V)[i,r_k] * w_k[j]
+        n = self.shape[1]
+        m_rows, m_columns, m_data = [], [], []
+        for k, ((reaction, _), these_weights) in enumerate(zip(coordinates, column_weights)):
+            this_column = flux_stoichiometry.getcol(reaction)
+            for i, nv in zip(this_column.indices, this_column.data):
+                for j, w in these_weights.items():
+                    m_rows.append(i*n + j)
+                    m_columns.append(k)
+                    m_data.append(nv*w)
+
+        self.jacobian_map = coo_matrix((m_data, (m_rows, m_columns)),
+                                       shape=(self.shape[0]*n, len(expressions))).tocsr()
+
+        # Elasticities as function of the saturations only
+        expressions = [e.xreplace(values) for e in expressions]
+        self.expressions = expressions
+
+        if self.sym_saturations:
+            self.function = make_cython_function(self.sym_saturations, expressions,
+                                                 simplify=True, pool=model.pool)
+            self.constant_elasticities = None
+        else:
+            self.function = None
+            self.constant_elasticities = np.array([float(e) for e in expressions])
+
+    def __call__(self, saturations):
+        """
+        Return a sparse matrix with the jacobian of a single sample
+        :param saturations: array of samples in [0,1]
+        """
+        jacobian = self.evaluate_batch(np.atleast_2d(saturations))[0]
+        return csc_matrix(jacobian)
+
+    def evaluate_batch(self, saturations):
+        """
+        Dense jacobians of a batch of samples
+        :param saturations: array (n_samples, n_saturations) of samples in [0,1]
+        :return: array (n_samples, n, n)
+        """
+        saturations = np.atleast_2d(saturations)
+        n_samples = saturations.shape[0]
+
+        _saturations = self.lower_saturations \
+                       + saturations * (self.upper_saturations - self.lower_saturations)
+
+        elasticities = np.zeros((n_samples, self.jacobian_map.shape[1]))
+        if self.function is None:
+            elasticities[:] = self.constant_elasticities
+        else:
+            for this_saturations, these_elasticities in zip(_saturations, elasticities):
+                self.function(np.ascontiguousarray(this_saturations), these_elasticities)
+
+        jacobians = self.jacobian_map.dot(elasticities.T).T
+
+        return jacobians.reshape((n_samples,) + self.shape)
+
+    def get_real_eigenvalues(self, saturations, batch_size=None):
+        """
+        Sorted real parts of the eigenvalues of the jacobians of a batch of
+        samples. The dense jacobians are evaluated batch_size samples at a time
+        :param saturations: array (n_samples, n_saturations) of samples in [0,1]
+        :param batch_size: number of jacobians held at once, by default
+                           such that they have at most MAX_BATCH_ENTRIES entries
+        :return: array (n_samples, n)
+        """
+        saturations = np.atleast_2d(saturations)
+        n_samples = saturations.shape[0]
+        if batch_size is None:
+            batch_size = max(1, MAX_BATCH_ENTRIES // (self.shape[0]*self.shape[1]))
+
+        real_eigenvalues = np.zeros((n_samples, self.shape[0]))
+        for start in range(0, n_samples, batch_size):
+            stop = min(start + batch_size, n_samples)
+            jacobians = self.evaluate_batch(saturations[start:stop])
+            with timer('sampling.eigenvalues'):
+                real_eigenvalues[start:stop] = np.sort(np.real(np.linalg.eigvals(jacobians)),
+                                                       axis=1)
+        return real_eigenvalues
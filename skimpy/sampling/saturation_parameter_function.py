@@ -69,32 +69,11 @@ class SaturationParameterFunction():
 
         # Transform the sample to bounds accroding to the bounds of the parameters respective to
         # their concentrations
-        lower_saturations = []
-        upper_saturations = []
         if self.function is None:
             pass
 
         else:
-            for p in self.saturation_parameters:
-                # The lower bound of the parameter fixes the upper bound on the
-                # concentration and vice versa
-
-                the_lower_bound_saturation = 0.0 if p._upper_bound is None \
-                    else concentrations[p.hook.symbol] / \
-                         (p._upper_bound + concentrations[p.hook.symbol])
-
-                the_upper_bound_saturation = 1.0 if p._lower_bound is None \
-                    else concentrations[p.hook.symbol] / \
-                         (p._lower_bound + concentrations[p.hook.symbol])
-
-                lower_saturations.append(the_lower_bound_saturation)
-                upper_saturations.append(the_upper_bound_saturation)
-
-            _lower_saturations = np.array(lower_saturations)
-            _upper_saturations = np.array(upper_saturations)
-
-            _saturations = _lower_saturations + saturations * (upper_saturations - _lower_saturations)
-
+            _saturations = self.scale_saturations(saturations, concentrations)
 
             _concentrations = np.array([concentrations[c] for c in self.sym_concentrations])
 
@@ -106,3 +85,36 @@ class SaturationParameterFunction():
             # Assing saturation parameters
             for p,v in zip(self.saturation_parameters, saturation_parameter_values):
                 parameters[p.symbol] = v
+
+    def get_saturation_bounds(self, concentrations):
+        """
+        Bounds on the saturations from the bounds of the parameters respective to
+        their concentrations
+        :param concentrations: dict of concentrations indexed by symbol
+        :return: arrays of the lower and upper bounds
+        """
+        lower_saturations = []
+        upper_saturations = []
+        for p in self.saturation_parameters:
+            # The lower bound of the parameter fixes the upper bound on the
+            # concentration and vice versa
+
+            the_lower_bound_saturation = 0.0 if p._upper_bound is None \
+                else concentrations[p.hook.symbol] / \
+                     (p._upper_bound + concentrations[p.hook.symbol])
+
+            the_upper_bound_saturation = 1.0 if p._lower_bound is None \
+                else concentrations[p.hook.symbol] / \
+                     (p._lower_bound + concentrations[p.hook.symbol])
+
+            lower_saturations.append(the_lower_bound_saturation)
+            upper_saturations.append(the_upper_bound_saturation)
+
+        return np.array(lower_saturations), np.array(upper_saturations)
+
+    def scale_saturations(self, saturations, concentrations):
+        """
+        Scale samples in [0,1] to the saturation bounds
+        """
+        _lower_saturations, _upper_saturations = self.get_saturation_bounds(concentrations)
+        return _lower_saturations + saturations * (_upper_saturations - _lower_saturations)
@@ -35,6 +35,9 @@ from sympy import sympify, Symbol
 from skimpy.utils.namespace import *
 
 from skimpy.sampling import ParameterSampler, SaturationParameterFunction, FluxParameterFunction
+from skimpy.sampling.saturation_jacobian_function import SaturationJacobianFunction
+from skimpy.analysis.mca.jacobian_fun import JacobianFunction
+from skimpy.utils.profiling import timed, timer
 
 
 class SimpleParameterSampler(ParameterSampler):
@@ -48,13 +51,20 @@ class SimpleParameterSampler(ParameterSampler):
     # if parameters are not defined put default values
     Parameters.__new__.__defaults__ = (None,) * len(Parameters._fields)
 
+    @timed('sampling.simple')
     def sample(self,
                compiled_model,
                flux_dict,
                concentration_dict,
                only_stable=True,
                min_max_eigenvalues=False,
-               seed=123):
+               seed=123,
+               batch_size=None):
+        """
+        :param batch_size: number of dense jacobians held at once by the
+                           stability check of the saturations, by default
+                           bounded by MAX_BATCH_ENTRIES jacobian entries
+        """
 
         parameter_population = []
         smallest_eigenvalues = []
@@ -85,37 +95,62 @@ class SimpleParameterSampler(ParameterSampler):
         while (len(
                 parameter_population) < self.parameters.n_samples) or trials > 1e6:
 
-            parameter_sample = self._sample_saturation_step_compiled(
-                compiled_model,
-                symbolic_concentrations_dict,
-                flux_dict)
-
-            # Check stability: real part of all eigenvalues of the jacobian is <= 0
-            this_jacobian = compiled_model.jacobian_fun(fluxes, concentrations,
-                                                        parameter_sample)
-
-            #largest_eigenvalue = eigenvalues(this_jacobian, k=1, which='LR',
-            #                                 return_eigenvectors=False)
-            # Test suggests that this is apparently much faster ....
-            this_real_eigenvalues = sorted(np.real(eigenvalues(this_jacobian.todense())))
-
-            largest_eigenvalue = this_real_eigenvalues[-1]
-            smallest_eigenvalue = this_real_eigenvalues[0]
+            # Draw the saturations for the missing samples at once
+            n_missing = self.parameters.n_samples - len(parameter_population)
+            saturation_batch = self._sample_saturations(compiled_model, n_missing)
+
+            if compiled_model.saturation_jacobian_function is not None:
+                # The stability is checked before the parameters are computed
+                real_eigenvalue_batch = compiled_model.saturation_jacobian_function\
+                    .get_real_eigenvalues(saturation_batch, batch_size=batch_size)
+
+            for e, saturations in enumerate(saturation_batch):
+
+                if compiled_model.saturation_jacobian_function is not None:
+                    this_real_eigenvalues = real_eigenvalue_batch[e]
+                    parameter_sample = None
+                else:
+                    parameter_sample = self._sample_saturation_step_compiled(
+                        compiled_model,
+                        symbolic_concentrations_dict,
+                        flux_dict,
+                        saturations=saturations)
+
+                    # Check stability: real part of all eigenvalues of the jacobian is <= 0
+                    this_jacobian = compiled_model.jacobian_fun(fluxes, concentrations,
+                                                                parameter_sample)
+
+                    #largest_eigenvalue = eigenvalues(this_jacobian, k=1, which='LR',
+                    #                                 return_eigenvectors=False)
+                    # Test suggests that this is apparently much faster ....
+                    with timer('sampling.eigenvalues'):
+                        this_real_eigenvalues = sorted(np.real(eigenvalues(this_jacobian.todense())))
+
+                largest_eigenvalue = this_real_eigenvalues[-1]
+                smallest_eigenvalue = this_real_eigenvalues[0]
+
+                is_stable = largest_eigenvalue <= 0
+
+                compiled_model.logger.info('Model is stable? {} '
+                                           '(max real part eigv: {}'.
+                                           format(is_stable,largest_eigenvalue))
+
+                if is_stable or not only_stable:
+                    # The Km's and Vmax's are only computed for accepted samples
+                    if parameter_sample is None:
+                        parameter_sample = self._sample_saturation_step_compiled(
+                            compiled_model,
+                            symbolic_concentrations_dict,
+                            flux_dict,
+                            saturations=saturations)
+
+                    parameter_population.append(parameter_sample)
+                    largest_eigenvalues.append(largest_eigenvalue)
+                    smallest_eigenvalues.append(smallest_eigenvalue)
+
+                # Count the trials
+                trials += 1
 
-            is_stable = largest_eigenvalue <= 0
-
-            compiled_model.logger.info('Model is stable? {} '
-                                       '(max real part eigv: {}'.
-                                       format(is_stable,largest_eigenvalue))
-
-            if is_stable or not only_stable:
-                parameter_population.append(parameter_sample)
-                largest_eigenvalues.append(largest_eigenvalue)
-                smallest_eigenvalues.append(smallest_eigenvalue)
-
-            # Count the trials
-            trials += 1
-            
         if min_max_eigenvalues:
             return parameter_population, largest_eigenvalues, smallest_eigenvalues
         else:
@@ -137,18 +172,45 @@ class SimpleParameterSampler(ParameterSampler):
                                                               model.parameters,
                                                               concentrations,)
 
+        # Fast path for the stability check if the mca functions are compiled
+        # from expressions (not for models loaded from a bundle)
+        if isinstance(getattr(model, 'jacobian_fun', None), JacobianFunction) \
+                and model.independent_elasticity_fun.expressions is not None:
+            model.saturation_jacobian_function = SaturationJacobianFunction(
+                model,
+                model.saturation_parameter_function,
+                concentrations,
+                fluxes)
+        else:
+            model.saturation_jacobian_function = None
+
+    def _sample_saturations(self, compiled_model, n_samples):
+        """
+        Sample a batch of saturations uniformly in [0,1]
+        :param compiled_model:
+        :param n_samples:
+        :return: array (n_samples, n_saturations)
+        """
+        if not compiled_model.saturation_parameter_function.sym_saturations:
+            return np.zeros((n_samples, 0))
+
+        n_sats = len(compiled_model.saturation_parameter_function.sym_saturations)
+        return sample((n_samples, n_sats))
+
 
 
     def _sample_saturation_step_compiled(self,
                                          compiled_model,
                                          concentration_dict,
-                                         flux_dict):
+                                         flux_dict,
+                                         saturations=None):
 
         """
         Sample one set of staturations using theano complied functions
         :param compiled_model:
         :param concentration_dict:
         :param flux_dict:
+        :param saturations: optional pre-sampled saturations in [0,1]
         :return:
         """
 
@@ -171,7 +233,9 @@ class SimpleParameterSampler(ParameterSampler):
            or not hasattr(compiled_model,'flux_parameter_function'):
             raise RuntimeError("Function for sampling not complied")
 
-        if not compiled_model.saturation_parameter_function.sym_saturations:
+        if saturations is not None:
+            pass
+        elif not compiled_model.saturation_parameter_function.sym_saturations:
             n_stats = 0
             saturations = []
         else:
@@ -30,6 +30,8 @@ from sympy import Symbol
 
 from numpy.linalg import eig as eigenvalues
 
+from skimpy.utils.profiling import timer
+
 
 def calc_max_eigenvalue(parameter_sample,
                         compiled_model,
@@ -56,8 +58,9 @@ def calc_max_eigenvalue(parameter_sample,
     # largest_eigenvalue = eigenvalues(this_jacobian, k=1, which='LR',
     #                                 return_eigenvectors=False)
     # Test suggests that this is apparently much faster ....
-    largest_eigenvalue = np.real(sorted(
-        eigenvalues(this_jacobian.todense())[0]))[-1]
+    with timer('sampling.eigenvalues'):
+        largest_eigenvalue = np.real(sorted(
+            eigenvalues(this_jacobian.todense())[0]))[-1]
 
     return largest_eigenvalue
 
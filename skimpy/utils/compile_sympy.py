@@ -25,14 +25,21 @@ limitations under the License.
 
 """
 
-import Cython
 import re
 import os
 
 import multiprocessing
 
+from collections import OrderedDict
+from hashlib import sha1
+
+from sympy import srepr, numbered_symbols
 from sympy.printing import ccode
 
+from skimpy.utils.parallel import map_with_shared_state
+from skimpy.utils.cython_kernel import CythonKernel
+from skimpy.utils.profiling import timer, count
+
 CYTHON_DECLARATION = "# cython: boundscheck=False, wraparound=False,"+\
                      "nonecheck=True, initializecheck=False, language=c\n"
 
@@ -60,15 +67,155 @@ def make_cython_function(symbols, expressions, quiet=True, simplify=True, optimi
 
     _set_cflags(optimize=optimize)
 
-    def this_function(input_array,output_array):
+    code = CYTHON_DECLARATION+SQRT_FUNCTION+EXP_FUNCTION+code_expressions
+
+    return CythonKernel(code, quiet=quiet)
+
+
+# Generated code of the code units indexed by their fingerprint
+CODE_UNIT_CACHE = OrderedDict()
+CODE_UNIT_CACHE_SIZE = 100000
+
+
+def get_fingerprint(*items):
+    """
+    Fingerprint of sympy expressions (or strings) that is stable across sessions
+    """
+    return sha1('|'.join(srepr(x) for x in items).encode()).hexdigest()[:16]
+
+
+class RebuildReport(object):
+    """
+    Summary of the code units that were regenerated or taken from the cache
+    when building a compiled function
+    """
+    def __init__(self, name):
+        self.name = name
+        self.rebuilt = []
+        self.reused = []
+        self.kernel_fingerprint = None
+
+    def __repr__(self):
+        return '<RebuildReport {}: {} units rebuilt, {} reused, kernel {}>'\
+            .format(self.name, len(self.rebuilt), len(self.reused), self.kernel_fingerprint)
+
+
+def make_cython_unit_function(symbols, units, outputs, quiet=True, optimize=False,
+                              pool=None, report=None):
+    """
+    Make a compiled function from code units. Each unit is a set of expressions
+    that is generated independently and cached by its fingerprint, such that only
+    units that changed are generated again. The outputs are linear combinations
+    of the unit expressions.
+
+    :param symbols: list of input symbols
+    :param units: list of tuples (name, fingerprint, expressions)
+    :param outputs: list of lists of tuples (unit index, expression index, coefficient)
+    :param report: optional RebuildReport
+    """
+    # Generate the code of the units that are not cached
+    missing = OrderedDict()
+    for name, fingerprint, expressions in units:
+        if fingerprint in CODE_UNIT_CACHE:
+            CODE_UNIT_CACHE.move_to_end(fingerprint)
+            if report is not None:
+                report.reused.append(name)
+        else:
+            missing[fingerprint] = expressions
+            if report is not None:
+                report.rebuilt.append(name)
+
+    inputs = list(missing.items())
+    count('code_generation.units_rebuilt', len(inputs))
+    count('code_generation.units_reused', len(units) - len(inputs))
+    if pool is None:
+        with timer('code_generation'):
+            unit_code = [generate_unit_code(this_input) for this_input in inputs]
+    else:
+        unit_code = map_with_shared_state(_generate_unit_code,
+                                          inputs,
+                                          None,
+                                          pool=pool,
+                                          phase='code_generation')
+
+    for fingerprint, this_code in zip(missing, unit_code):
+        CODE_UNIT_CACHE[fingerprint] = this_code
+
+    # Assemble the kernel
+    input_subs = {str(e): "input_array[{}]".format(i)
+                  for i, e in enumerate(symbols)}
+
+    cython_code = []
+    assembled = set()
+    for _, fingerprint, _ in units:
+        if fingerprint in assembled:
+            continue
+        assembled.add(fingerprint)
+        this_code, this_symbols = CODE_UNIT_CACHE[fingerprint]
+        # Only the symbols of the unit need to be substituted
+        for str_sym in this_symbols:
+            this_code = re.sub(r"(\ |\+|\-|\*|\(|\)|\/|\,)({})(\ |\+|\-|\*|\(|\)|\/|\,)".format(str_sym),
+                               r"\1 {} \3 ".format(input_subs[str_sym]),
+                               this_code)
+        cython_code.append(this_code)
+
+    for i, these_terms in enumerate(outputs):
+        terms = ["{} * unit_{}_{}".format(repr(float(coefficient)), units[u][1], k)
+                 for u, k, coefficient in these_terms]
+        if not terms:
+            terms = ["0.0"]
+        cython_code.append("output_array[{}] = {} ".format(i, " + ".join(terms)))
+
+    code_expressions = '\n'.join(cython_code)
+
+    # Drop the oldest units
+    while len(CODE_UNIT_CACHE) > CODE_UNIT_CACHE_SIZE:
+        CODE_UNIT_CACHE.popitem(last=False)
+
+    if report is not None:
+        report.kernel_fingerprint = sha1(code_expressions.encode()).hexdigest()[:16]
+
+    _set_cflags(optimize=optimize)
+
+    code = CYTHON_DECLARATION+SQRT_FUNCTION+EXP_FUNCTION+code_expressions
+
+    return CythonKernel(code, quiet=quiet)
+
+
+def generate_unit_code(input):
+    """
+    Generate the code of a unit with the symbol names as inputs
+    :param input: tuple (fingerprint, expressions)
+    :return: tuple of the code and the names of the symbols used
+    """
+    fingerprint, expressions = input
+
+    cython_code = ''
+    used_symbols = set()
+    for k, e in enumerate(expressions):
+        used_symbols.update(str(x) for x in e.free_symbols)
+
+        cse_symbols = numbered_symbols('cse_{}_{}_'.format(fingerprint, k))
+        with timer('code_generation.cse'):
+            common_sub_expressions, main_expression = cse(e, symbols=cse_symbols)
+        for this_cse in common_sub_expressions:
+            cython_code = cython_code + '{} = {} \n'.format(str(this_cse[0]),
+                                                            ccode(this_cse[1], standard='C99'))
+
+        cython_code = cython_code + 'unit_{}_{} = {} \n'.format(fingerprint, k,
+                                                                ccode(main_expression[0],
+                                                                      standard='C99'))
+
+    # Substitute integers in the cython code
+    cython_code = re.sub(r"(\ |\+|\-|\*|\(|\)|\/|\,)([1-9])(\ |\+|\-|\*|\(|\)|\/|\,)",
+                         r"\1 \2.0 \3 ",
+                         cython_code)
 
-        code = CYTHON_DECLARATION+SQRT_FUNCTION+EXP_FUNCTION+code_expressions
+    return cython_code, sorted(used_symbols)
 
-        Cython.inline(code,
-                     language_level=3,
-                     quiet=quiet,)
 
-    return this_function
+def _generate_unit_code(input, shared):
+    return generate_unit_code(input)
 
 
 def generate_vectorized_code(inputs, expressions, simplify=True, optimize=False, pool=None):
@@ -78,22 +225,29 @@ def generate_vectorized_code(inputs, expressions, simplify=True, optimize=False,
 
     if pool is None:
         cython_code = []
-        for i,e in enumerate(expressions):
-            if simplify:
-                cython_code.append(generate_a_code_line_simplfied((i,e,input_subs)))
-            else:
-                cython_code.append(generate_a_code_line((i, e, input_subs)))
+        with timer('code_generation'):
+            for i,e in enumerate(expressions):
+                if simplify:
+                    cython_code.append(generate_a_code_line_simplfied((i,e,input_subs)))
+                else:
+                    cython_code.append(generate_a_code_line((i, e, input_subs)))
 
     else:
+        # The input substitutions are send only once to each worker
+        inputs = list(enumerate(expressions))
         if simplify:
-            input_subs_input = [input_subs, ]*len(expressions)
-            i,e =zip(*enumerate(expressions))
-            cython_code = pool.map(generate_a_code_line_simplfied, zip(i,e,input_subs_input) )
+            cython_code = map_with_shared_state(_generate_a_code_line_simplfied,
+                                                inputs,
+                                                input_subs,
+                                                pool=pool,
+                                                phase='code_generation')
 
         else:
-            input_subs_input = [input_subs, ] * len(expressions)
-            i, e = zip(*enumerate(expressions))
-            cython_code = pool.map(generate_a_code_line, zip(i, e, input_subs_input))
+            cython_code = map_with_shared_state(_generate_a_code_line,
+                                                inputs,
+                                                input_subs,
+                                                pool=pool,
+                                                phase='code_generation')
 
     cython_code = '\n'.join(cython_code)
 
@@ -102,14 +256,26 @@ def generate_vectorized_code(inputs, expressions, simplify=True, optimize=False,
 
 from sympy import cse
 
+
+def _generate_a_code_line_simplfied(input, input_subs):
+    i, e = input
+    return generate_a_code_line_simplfied((i, e, input_subs))
+
+
+def _generate_a_code_line(input, input_subs):
+    i, e = input
+    return generate_a_code_line((i, e, input_subs))
+
+
 def generate_a_code_line_simplfied(input , optimize=False):
     i, e, input_subs = input
 
     # Use common sub expressions instead of simpilfy
-    if optimize:
-        common_sub_expressions, main_expression = cse(e.simplify())
-    else:
-        common_sub_expressions, main_expression = cse(e)
+    with timer('code_generation.cse'):
+        if optimize:
+            common_sub_expressions, main_expression = cse(e.simplify())
+        else:
+            common_sub_expressions, main_expression = cse(e)
     #print(main_expression)
     cython_code = ''
     for this_cse in common_sub_expressions:
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import importlib.util
+import os
+import sys
+
+import Cython
+
+from skimpy.utils.profiling import timer
+
+
+class CythonKernel(object):
+    """
+    Compiled function of the generated cython code that fills the
+    output_array from the input_array. The module is compiled by
+    Cython.inline on first call and cached on disk, only the code is pickled
+    such that the kernel can be send to worker processes without sympy.
+    """
+    def __init__(self, code, quiet=True):
+        self.code = code
+        self.quiet = quiet
+        # Entry point of a module loaded with load_module
+        self._invoke = None
+        self._called = False
+
+    def __call__(self, input_array, output_array):
+        if self._invoke is not None:
+            try:
+                self._invoke(input_array, output_array)
+                return
+            except TypeError:
+                # The module was compiled for other argument types
+                pass
+
+        if not self._called:
+            # The first call compiles the module or loads it from the cache
+            with timer('cython.compile'):
+                Cython.inline(self.code, language_level=3, quiet=self.quiet,)
+            self._called = True
+            return
+
+        Cython.inline(self.code, language_level=3, quiet=self.quiet,)
+
+    def __getstate__(self):
+        return {'code': self.code, 'quiet': self.quiet}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._invoke = None
+        self._called = False
+
+    def get_compiled_modules(self):
+        """
+        Paths of the shared objects compiled for this kernel in this session,
+        one per type signature of the arguments it was called with
+
+        :return: list of paths
+        """
+        from Cython.Build.Inline import _cython_inline_cache
+
+        paths = []
+        for key, invoke in list(_cython_inline_cache.items()):
+            if isinstance(key, tuple) and key[0] == self.code:
+                module = sys.modules.get(invoke.__module__)
+                if module is not None:
+                    paths.append(module.__file__)
+        return paths
+
+    def load_module(self, path):
+        """
+        Call the kernel through a compiled module instead of Cython.inline,
+        e.g. a module stored in a model bundle
+
+        :param path: path of the shared object
+        :return: Nothing
+        """
+        module_name = os.path.basename(path).split('.')[0]
+        module = sys.modules.get(module_name)
+        if module is None:
+            with timer('cython.load'):
+                spec = importlib.util.spec_from_file_location(module_name, path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            sys.modules[module_name] = module
+        self._invoke = getattr(module, '__invoke')
+
+
+def get_platform_tag():
+    """
+    Compiled kernels can only be loaded on the same platform and python version
+
+    :return: string
+    """
+    import sysconfig
+    return '{}{}'.format(sys.platform, sysconfig.get_config_var('EXT_SUFFIX'))
+
+
+def get_kernel_directory():
+    """
+    Directory of the modules compiled by Cython.inline
+    """
+    from Cython.Build.Inline import get_cython_cache_dir
+    return os.path.join(get_cython_cache_dir(), 'inline')
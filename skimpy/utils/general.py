@@ -24,6 +24,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 
 """
+from collections import OrderedDict
 from scipy.sparse import coo_matrix
 from numpy import array
 from sympy import Symbol
@@ -38,38 +39,53 @@ def join_dicts(dicts):
 
 
 def get_stoichiometry(kinetic_model, variables):
-    # get stoichometriy
-
-    rows = []
-    columns = []
-    values = []
+    """
+    Build the stoichiometric matrix (variables x reactions) in a single pass
+    over the reactions. The matrix is cached on the model until its
+    structure changes (see KineticModel.update)
+
+    :param kinetic_model:
+    :type kinetic_model: skimpy.core.KineticModel
+    :param variables: iterable of the variable names indexing the rows
+    :return: scipy.sparse.csr_matrix
+    """
+    variable_names = tuple(str(v) for v in variables)
 
-    row_ix = 0
-    for this_variable in variables:
-        column_ix = 0
-        for this_reaction in kinetic_model.reactions.values():
+    cached = getattr(kinetic_model, '_stoichiometry', None)
+    if cached is not None and cached[0] == variable_names:
+        return cached[1].copy()
 
-            reaction_items = this_reaction.reactant_stoichiometry.items()
-            reactant_names = [x.name for x,_ in reaction_items]
-            if str(this_variable) in reactant_names:
+    row_index = {v: i for i, v in enumerate(variable_names)}
 
-                N = sum([this_stoich for this_var, this_stoich in reaction_items
-                         if str(this_variable) == this_var.name])
-                #Convert to real integer i
-                if float(N).is_integer():
-                    N = int(N)
-                values.append(N)
-                rows.append(row_ix)
-                columns.append(column_ix)
+    # Sum up the stoichiometries of a variable in a reaction
+    entries = OrderedDict()
+    for column_ix, this_reaction in enumerate(kinetic_model.reactions.values()):
+        for this_var, this_stoich in this_reaction.reactant_stoichiometry.items():
+            try:
+                row_ix = row_index[this_var.name]
+            except KeyError:
+                continue
+            coordinate = (row_ix, column_ix)
+            entries[coordinate] = entries.get(coordinate, 0) + this_stoich
 
-            column_ix += 1
-        row_ix += 1
+    rows = []
+    columns = []
+    values = []
+    for (row_ix, column_ix), N in entries.items():
+        #Convert to real integer i
+        if float(N).is_integer():
+            N = int(N)
+        values.append(N)
+        rows.append(row_ix)
+        columns.append(column_ix)
 
-    shape = (len(variables), len(kinetic_model.reactions))
+    shape = (len(variable_names), len(kinetic_model.reactions))
 
     stoichiometric_matrix = coo_matrix((values, (rows, columns)), shape = shape ).tocsr()
 
-    return stoichiometric_matrix
+    kinetic_model._stoichiometry = (variable_names, stoichiometric_matrix)
+
+    return stoichiometric_matrix.copy()
 
 def check_is_symbol(s_in):
     if not isinstance(s_in, Symbol):
@@ -102,6 +118,56 @@ def make_subclasses_dict(cls):
     return the_dict
 
 
+class SubclassRegistry(object):
+    """
+    Subclasses of a class indexed by their name. The subclass tree is walked
+    on first use and only walked again if a name is not found, e.g. when a
+    new subclass has been defined in the meantime
+    """
+    def __init__(self, cls):
+        self.cls = cls
+        self._subclasses = None
+
+    @property
+    def subclasses(self):
+        if self._subclasses is None:
+            self.refresh()
+        return self._subclasses
+
+    def refresh(self):
+        """
+        Walk the subclass tree again
+
+        :return: dict of the subclasses indexed by their name
+        """
+        self._subclasses = make_subclasses_dict(self.cls)
+        return self._subclasses
+
+    def register(self, subclass):
+        self.subclasses[subclass.__name__] = subclass
+
+    def __getitem__(self, name):
+        try:
+            return self.subclasses[name]
+        except KeyError:
+            return self.refresh()[name]
+
+    def __contains__(self, name):
+        return name in self.subclasses
+
+    def __iter__(self):
+        return iter(self.subclasses)
+
+    def keys(self):
+        return self.subclasses.keys()
+
+    def values(self):
+        return self.subclasses.values()
+
+    def items(self):
+        return self.subclasses.items()
+
+
 def robust_index(in_var):
     """
     Indexing can be done with symbols or strings representing the symbol,
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+"""
+Handles of compiled functions (ode, elasticities) that generate their code
+only when they are used for the first time. The sympy code generation is
+serialized by BUILD_LOCK, while the compilation of the cython kernels can
+run in parallel threads (see warmup_functions).
+"""
+
+BUILD_LOCK = threading.RLock()
+
+
+class LazyFunction(object):
+    """
+    Function handle that calls the builder on first use and then delegates
+    calls and attributes to the built function. Attributes that are known
+    before the build (e.g. the variables) can be given as keywords and are
+    accessible without building.
+    """
+    def __init__(self, builder, name=None, **attributes):
+        """
+        :param builder: callable without arguments that returns the function
+        :param name: name of the function used in error messages
+        :param attributes: attributes available without building
+        """
+        object.__setattr__(self, '_builder', builder)
+        object.__setattr__(self, '_function', None)
+        object.__setattr__(self, '_error', None)
+        object.__setattr__(self, '_lock', threading.RLock())
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'callbacks', [])
+        for key, value in attributes.items():
+            object.__setattr__(self, key, value)
+
+    @property
+    def is_built(self):
+        return self._function is not None
+
+    def build(self):
+        """
+        Build the function if this was not done before
+
+        :return: the built function
+        """
+        with self._lock:
+            if self._function is None:
+                if self._error is not None:
+                    raise self._error
+                with BUILD_LOCK:
+                    function = self._builder()
+                object.__setattr__(self, '_function', function)
+                # Release the expressions held by the builder
+                object.__setattr__(self, '_builder', None)
+                for this_callback in self.callbacks:
+                    this_callback(self)
+        return self._function
+
+    def build_async(self):
+        """
+        Build the function in a background thread, errors are raised on
+        the next use of the function
+
+        :return: the thread
+        """
+        thread = threading.Thread(target=self._build_in_background,
+                                  name='build_{}'.format(self.name))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        except Exception as e:
+            object.__setattr__(self, '_error', e)
+
+    def warmup(self):
+        """
+        Build the function and compile its kernel
+        """
+        function = self.build()
+        if hasattr(function, 'warmup'):
+            function.warmup()
+
+    def __call__(self, *args, **kwargs):
+        function = self._function
+        if function is None:
+            function = self.build()
+        return function(*args, **kwargs)
+
+    def __getattr__(self, item):
+        # Only called for attributes that are not known before the build
+        if item.startswith('_'):
+            raise AttributeError(item)
+        return getattr(self.build(), item)
+
+    def __setattr__(self, key, value):
+        if key in self.__dict__:
+            object.__setattr__(self, key, value)
+        else:
+            setattr(self.build(), key, value)
+
+    def __repr__(self):
+        return '<LazyFunction {} ({})>'.format(self.name,
+                                               'built' if self.is_built else 'not built')
+
+
+def warmup_functions(functions, ncpu=None):
+    """
+    Build the functions and compile their kernels. The code is generated
+    one function after the other, the C compilation runs in parallel threads.
+
+    :param functions: list of LazyFunction
+    :param ncpu: number of threads used to compile
+    :return: Nothing
+    """
+    functions = [f for f in functions if f is not None]
+    if not functions:
+        return
+
+    for this_function in functions:
+        this_function.build()
+
+    ncpu = ncpu or len(functions)
+    if ncpu == 1:
+        for this_function in functions:
+            this_function.warmup()
+    else:
+        thread_pool = ThreadPool(min(ncpu, len(functions)))
+        try:
+            thread_pool.map(_warmup, functions)
+        finally:
+            thread_pool.close()
+            thread_pool.join()
+
+
+def _warmup(function):
+    function.warmup()
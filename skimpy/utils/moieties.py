@@ -26,12 +26,16 @@ limitations under the License.
 """
 
 
+from collections import defaultdict
+from fractions import Fraction
+from functools import reduce
+from math import gcd
+
 import numpy as np
 
 from scipy.sparse import eye as speye
 from scipy.sparse import find as sfind
-from scipy.sparse import hstack, vstack
-from skimpy.nullspace import left_integer_nullspace
+from scipy.sparse import hstack, vstack, csr_matrix
 from sympy import Matrix, nsimplify
 
 def rational_left_basis(S):
@@ -87,6 +91,79 @@ def integer_left_basis_semipos(S):
 
 
 
+def sparse_left_integer_nullspace(S):
+    """
+    Exact left null space of an integer matrix using fraction-free sparse
+    Gaussian elimination on [S | I]. This is the fallback if the flint based
+    skimpy.nullspace extension is not available.
+
+    :param S: integer (sparse) matrix of shape (n, r)
+    :return: numpy array of shape (k, n), the rows span the left null space
+             and are scaled to coprime integers
+    """
+    S = csr_matrix(S)
+    n, r = S.shape
+
+    # Rows of S and of the transformation matrix as sparse dicts
+    s_rows = []
+    t_rows = []
+    column_rows = defaultdict(set)
+    for i in range(n):
+        this_row = {}
+        for j, v in zip(S.indices[S.indptr[i]:S.indptr[i+1]],
+                        S.data[S.indptr[i]:S.indptr[i+1]]):
+            if v != 0:
+                this_row[int(j)] = Fraction(int(np.rint(v)))
+                column_rows[int(j)].add(i)
+        s_rows.append(this_row)
+        t_rows.append({i: Fraction(1)})
+
+    pivot_rows = set()
+    for j in range(r):
+        candidates = sorted(column_rows[j].difference(pivot_rows))
+        if not candidates:
+            continue
+        # Choose the sparsest pivot to limit the fill in
+        pivot = min(candidates, key=lambda i: len(s_rows[i]) + len(t_rows[i]))
+        pivot_rows.add(pivot)
+        pivot_value = s_rows[pivot][j]
+
+        for i in candidates:
+            if i == pivot:
+                continue
+            factor = s_rows[i][j] / pivot_value
+            for k, v in s_rows[pivot].items():
+                new_value = s_rows[i].get(k, 0) - factor * v
+                if new_value == 0:
+                    s_rows[i].pop(k, None)
+                    column_rows[k].discard(i)
+                else:
+                    s_rows[i][k] = new_value
+                    column_rows[k].add(i)
+            for k, v in t_rows[pivot].items():
+                new_value = t_rows[i].get(k, 0) - factor * v
+                if new_value == 0:
+                    t_rows[i].pop(k, None)
+                else:
+                    t_rows[i][k] = new_value
+
+    # The rows that were not used as pivots are reduced to zero
+    left_nullspace = np.zeros((n - len(pivot_rows), n))
+    for e, i in enumerate(i for i in range(n) if i not in pivot_rows):
+        this_row = t_rows[i]
+        # Scale to coprime integers with a positive leading entry
+        denominator = reduce(lambda a, b: a * b // gcd(a, b),
+                             (v.denominator for v in this_row.values()), 1)
+        integers = {k: int(v * denominator) for k, v in this_row.items()}
+        divisor = reduce(gcd, (abs(v) for v in integers.values()))
+        if integers[min(integers)] < 0:
+            divisor = -divisor
+        for k, v in integers.items():
+            left_nullspace[e, k] = v // divisor
+
+    return left_nullspace
+
+
 def local_gcd(v):
     # if not v == np.round(v):
     #     return 1
@@ -41,6 +41,12 @@ SYMBOLIC = 'symbolic'
 PARAMETER = 'parameter'
 VARIABLE  = 'variable'
 
+""" Integration status """
+SOLVER_SUCCESS = 'success'
+SOLVER_FAILED = 'failed'
+TIME_BUDGET_EXCEEDED = 'time_budget_exceeded'
+RHS_BUDGET_EXCEEDED = 'rhs_budget_exceeded'
+
 """ Units """
 KCAL = 'kcal'
 KJ   = 'kJ'
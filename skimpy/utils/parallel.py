@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import atexit
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from multiprocessing import cpu_count, Pool
+
+from skimpy.utils.profiling import PROFILER
+
+"""
+Pool maps with a state that is shared by all the tasks (e.g. the full dict of
+ode expressions). The shared state is pickled once into a file, preferably
+in shared memory (/dev/shm), and every worker process loads it once. Only
+the file name is sent along with the tasks.
+"""
+
+SHARED_MEMORY_DIR = '/dev/shm'
+
+# State loaded in the worker process
+_WORKER_SHARED_STATE = {}
+
+# Pools shared by all the models indexed by the number of processes
+_POOLS = {}
+_POOL_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def get_pool(ncpu=1):
+    """
+    Shared multiprocessing pool, the pool is only started when it is first
+    requested and then reused by all the models
+
+    :param ncpu: number of processes
+    :return: multiprocessing.Pool or None for serial runs (ncpu <= 1)
+    """
+    if ncpu is None or ncpu <= 1:
+        return None
+
+    with _POOL_LOCK:
+        try:
+            return _POOLS[ncpu]
+        except KeyError:
+            logger.info('Starting a pool of {} processes'.format(ncpu))
+            _POOLS[ncpu] = Pool(ncpu)
+            return _POOLS[ncpu]
+
+
+@atexit.register
+def shutdown_pools():
+    """
+    Close the shared pools and wait for the worker processes to finish
+
+    :return: Nothing
+    """
+    with _POOL_LOCK:
+        for this_pool in _POOLS.values():
+            this_pool.close()
+            this_pool.join()
+        _POOLS.clear()
+
+
+class SharedState(object):
+    """
+    Context manager that publishes a picklable object to the worker processes
+    """
+    def __init__(self, data):
+        self.data = data
+        self.path = None
+
+    def __enter__(self):
+        directory = SHARED_MEMORY_DIR if os.access(SHARED_MEMORY_DIR, os.W_OK) else None
+        fid, self.path = tempfile.mkstemp(prefix='skimpy_shared_', dir=directory)
+        with os.fdopen(fid, 'wb') as f:
+            pickle.dump(self.data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return self.path
+
+    def __exit__(self, *args):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def load_shared_state(path):
+    """
+    Load the shared state in the worker, only once per worker and state
+
+    :param path: path of the pickled state
+    :return: the shared state
+    """
+    try:
+        return _WORKER_SHARED_STATE[path]
+    except KeyError:
+        # Only keep the state of the current map
+        _WORKER_SHARED_STATE.clear()
+        with open(path, 'rb') as f:
+            _WORKER_SHARED_STATE[path] = pickle.load(f)
+        return _WORKER_SHARED_STATE[path]
+
+
+def _apply_with_shared_state(input):
+    function, path, task = input
+    return function(task, load_shared_state(path))
+
+
+def get_chunksize(pool, n_tasks, chunks_per_worker=4):
+    """
+    Size of the task batches send to the workers
+
+    :param pool: multiprocessing.Pool
+    :param n_tasks: number of tasks
+    :param chunks_per_worker: number of batches per worker
+    :return: integer chunk size
+    """
+    n_workers = getattr(pool, '_processes', None) or cpu_count()
+    return max(1, n_tasks // (chunks_per_worker * n_workers))
+
+
+def map_with_shared_state(function, tasks, shared, pool=None, phase=None):
+    """
+    Compute [function(task, shared) for task in tasks], in parallel if a
+    pool is given. The shared state is send only once to each worker and the
+    tasks are send in batches.
+
+    :param function: module level function with signature f(task, shared)
+    :param tasks: list of the picklable tasks
+    :param shared: picklable state shared by all the tasks
+    :param pool: multiprocessing.Pool or None for serial execution
+    :param phase: name of the phase for the log and the profiler
+    :return: list of the results
+    """
+    start = time.time()
+
+    if pool is None:
+        results = [function(task, shared) for task in tasks]
+    else:
+        with SharedState(shared) as path:
+            inputs = [(function, path, task) for task in tasks]
+            results = pool.map(_apply_with_shared_state,
+                               inputs,
+                               chunksize=get_chunksize(pool, len(inputs)))
+
+    if phase is not None:
+        elapsed = time.time() - start
+        if PROFILER.enabled:
+            PROFILER.add_time(phase, elapsed)
+            PROFILER.count('{}.tasks'.format(phase), len(tasks))
+        logger.info('{}: {} tasks in {:.3f} s'.format(phase, len(tasks), elapsed))
+
+    return results
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: skimpy
+   :platform: Unix, Windows
+   :synopsis: Simple Kinetic Models in Python
+
+.. moduleauthor:: SKiMPy team
+
+[---------]
+
+Copyright 2017 Laboratory of Computational Systems Biotechnology (LCSB),
+Ecole Polytechnique Federale de Lausanne (EPFL), Switzerland
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+"""
+
+import os
+import threading
+import time
+
+from functools import wraps
+
+"""
+Opt-in instrumentation of the modelling pipeline. The phases (derivation,
+code generation, compilation, integration, sampling, ...) are timed with
+the timer context manager or the timed decorator and events are counted
+with count. Nothing is recorded unless profiling is enabled, either with
+enable_profiling, the profiling context manager or the environment variable
+SKIMPY_PROFILE=1. Phases that run in worker processes are not recorded.
+
+    with profiling() as profiler:
+        model.compile_ode()
+        model.solve_ode(...)
+    print(profiler.format_report())
+"""
+
+
+class Profiler(object):
+    """
+    Accumulates the wall time of named phases and named counters
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # name -> [calls, total time, max time]
+            self._timers = dict()
+            self._counters = dict()
+
+    def add_time(self, name, elapsed):
+        with self._lock:
+            this_timer = self._timers.get(name)
+            if this_timer is None:
+                self._timers[name] = [1, elapsed, elapsed]
+            else:
+                this_timer[0] += 1
+                this_timer[1] += elapsed
+                this_timer[2] = max(this_timer[2], elapsed)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def report(self):
+        """
+        :return: dict {'timers': {name: {'calls', 'total', 'mean', 'max'}},
+                       'counters': {name: count}}
+        """
+        with self._lock:
+            timers = {name: {'calls': calls,
+                             'total': total,
+                             'mean': total / calls,
+                             'max': max_time}
+                      for name, (calls, total, max_time) in self._timers.items()}
+            counters = dict(self._counters)
+        return {'timers': timers, 'counters': counters}
+
+    def format_report(self):
+        report = self.report()
+        lines = ['{:<40} {:>8} {:>12} {:>12}'.format('phase', 'calls', 'total [s]', 'max [s]')]
+        for name, t in sorted(report['timers'].items(),
+                              key=lambda item: -item[1]['total']):
+            lines.append('{:<40} {:>8} {:>12.4f} {:>12.4f}'.format(name, t['calls'],
+                                                                 t['total'], t['max']))
+        for name, n in sorted(report['counters'].items()):
+            lines.append('{:<40} {:>8}'.format(name, n))
+        return '\n'.join(lines)
+
+
+PROFILER = Profiler(enabled=os.environ.get('SKIMPY_PROFILE', '') not in ('', '0'))
+
+
+class _Timer(object):
+    __slots__ = ['name', 'start']
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        PROFILER.add_time(self.name, time.time() - self.start)
+
+
+class _NullTimer(object):
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """
+    Context manager that records the wall time of the block under name
+
+    :param name: name of the phase
+    """
+    if PROFILER.enabled:
+        return _Timer(name)
+    return _NULL_TIMER
+
+
+def timed(name):
+    """
+    Decorator that records the wall time of each call under name
+
+    :param name: name of the phase
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+            with _Timer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """
+    Increment the counter name by n
+    """
+    if PROFILER.enabled:
+        PROFILER.count(name, n)
+
+
+def enable_profiling(reset=True):
+    if reset:
+        PROFILER.reset()
+    PROFILER.enabled = True
+
+
+def disable_profiling():
+    PROFILER.enabled = False
+
+
+def get_profile_report():
+    """
+    :return: dict of the recorded timers and counters, see Profiler.report
+    """
+    return PROFILER.report()
+
+
+class profiling(object):
+    """
+    Context manager that enables the profiling in the block and returns
+    the profiler
+    """
+    def __init__(self, reset=True):
+        self.reset = reset
+
+    def __enter__(self):
+        self._was_enabled = PROFILER.enabled
+        enable_profiling(reset=self.reset)
+        return PROFILER
+
+    def __exit__(self, *args):
+        PROFILER.enabled = self._was_enabled
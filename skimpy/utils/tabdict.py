@@ -31,8 +31,12 @@ from collections import OrderedDict
 class TabDict(OrderedDict):
     """
     Really just an ordered dict with tab completion in interactive terminals
+    and positional access
     """
 
+    # Positional index of the keys, rebuilt lazily after the keys have changed
+    _ix_keys = None
+
     def __dir__(self):
         # Allow tab complete of items by their id
         attributes = dir(self.__class__)
@@ -57,8 +61,51 @@ class TabDict(OrderedDict):
     #         raise AttributeError("TabDict has no attribute or entry %s" %
     #                              attr)
 
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._ix_keys = None
+        OrderedDict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._ix_keys = None
+        OrderedDict.__delitem__(self, key)
+
+    def pop(self, *args):
+        self._ix_keys = None
+        return OrderedDict.pop(self, *args)
+
+    def popitem(self, *args, **kwargs):
+        self._ix_keys = None
+        return OrderedDict.popitem(self, *args, **kwargs)
+
+    def clear(self):
+        self._ix_keys = None
+        OrderedDict.clear(self)
+
+    def move_to_end(self, *args, **kwargs):
+        self._ix_keys = None
+        OrderedDict.move_to_end(self, *args, **kwargs)
+
     def iloc(self,ix):
-        return list(self.items())[ix]
+        """
+        Positional access to the items
+
+        :param ix: an integer position, a slice or an iterable of positions
+        :return: a (key, value) tuple or a list of those for slices and
+                 iterables
+        """
+        if self._ix_keys is None:
+            self._ix_keys = list(OrderedDict.keys(self))
+
+        if isinstance(ix, slice):
+            return [(k, OrderedDict.__getitem__(self, k))
+                    for k in self._ix_keys[ix]]
+        try:
+            key = self._ix_keys[ix]
+        except TypeError:
+            return [self.iloc(i) for i in ix]
+
+        return key, OrderedDict.__getitem__(self, key)
 
 
 
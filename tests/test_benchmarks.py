@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from skimpy.utils import TabDict
+from skimpy.utils.general import get_stoichiometry
+
+from benchmarks.models import MODEL_BUILDERS
+
+
+@pytest.mark.parametrize('topology', sorted(MODEL_BUILDERS))
+def test_synthetic_model_steady_state(topology):
+    model, flux_dict, concentration_dict = MODEL_BUILDERS[topology](11)
+
+    variables = TabDict([(k, v.symbol) for k, v in model.reactants.items()])
+    stoichiometry = get_stoichiometry(model, variables).toarray()
+    fluxes = np.array([flux_dict[r] for r in model.reactions])
+
+    # The fluxes balance all the variables
+    assert np.allclose(stoichiometry.dot(fluxes), 0.0)
+    assert all(v > 0 for v in fluxes)
+    assert set(variables) <= set(concentration_dict)
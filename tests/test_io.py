@@ -88,3 +88,44 @@ def test_cobra_import():
 def test_import():
     model = load_yaml_model(dummy_model_path)
     model.compile_ode()
+
+
+def test_bundle():
+    from skimpy.io.bundle import export_to_bundle, load_bundle_model
+
+    dummy_model.compile_ode(sim_type=QSSA)
+    bundle_path = 'test.bundle'
+    export_to_bundle(dummy_model, bundle_path)
+
+    model = load_bundle_model(bundle_path)
+    os.remove(bundle_path)
+
+    assert model.ode_fun.is_built
+
+    assert list(model.variables) == list(dummy_model.variables)
+
+    concentrations = [1.0 + i for i, _ in enumerate(model.variables)]
+    expected = np.zeros(len(concentrations))
+    dummy_model.ode_fun.get_parames()
+    dummy_model.ode_fun(0, concentrations, expected)
+
+    result = np.zeros(len(concentrations))
+    model.ode_fun.get_parames()
+    model.ode_fun(0, concentrations, result)
+
+    assert np.allclose(result, expected)
+
+
+def test_load_large_model():
+    from tests.utils import build_chain_model
+
+    large_model = build_chain_model(1000)
+    large_model_path = 'large_test.yaml'
+    export_to_yaml(large_model, large_model_path)
+
+    model = load_yaml_model(large_model_path)
+    os.remove(large_model_path)
+
+    assert len(model.reactions) == 1000
+    assert all(model.parameters[k].value == p.value
+               for k, p in large_model.parameters.items())
@@ -0,0 +1,386 @@
+import pytest
+
+from skimpy.core import *
+from skimpy.mechanisms import *
+from tests.utils import build_linear_pathway_model
+
+
+def test_cached_views():
+    this_model = build_linear_pathway_model()
+
+    # Views are cached until the model changes
+    assert this_model.reactants is this_model.reactants
+    assert this_model.parameters is this_model.parameters
+
+    assert list(this_model.reactant_index) == list(this_model.reactants)
+    assert this_model.reactant_index['C'] == 1
+    for k, i in this_model.parameter_index.items():
+        assert this_model.parameters.iloc(i)[0] == k
+
+    metabolites = ReversibleMichaelisMenten.Reactants(substrate='C', product='E')
+    reaction = Reaction(name='E4',
+                        mechanism=ReversibleMichaelisMenten,
+                        reactants=metabolites)
+    this_model.add_reaction(reaction)
+    this_model.parametrize_by_reaction(
+        {'E4': ReversibleMichaelisMenten.Parameters(k_equilibrium=1.0)})
+
+    assert 'E' in this_model.reactants
+    assert this_model.reactant_index['E'] == 2
+    assert 'k_equilibrium_E4' in this_model.parameters
+
+
+def test_stoichiometry():
+    from skimpy.utils.general import get_stoichiometry
+
+    this_model = build_linear_pathway_model()
+
+    S = get_stoichiometry(this_model, this_model.reactants)
+    assert S.shape == (2, 3)
+    assert S.toarray().tolist() == [[1, -1, 0],
+                                    [0, 1, -1]]
+
+    # Cached until the structure changes
+    assert this_model._stoichiometry is not None
+    this_model.update()
+    assert this_model._stoichiometry is None
+
+
+def test_chain_rule_jacobian():
+    from sympy import simplify
+    from skimpy.analysis.ode.symbolic_jacobian_fun import \
+        make_symbolic_jacobian, make_symbolic_jacobian_from_reactions
+
+    this_model = build_linear_pathway_model()
+    this_model.compile_ode(sim_type=QSSA)
+
+    variables = this_model.ode_fun.variables
+    reference = make_symbolic_jacobian(variables.values(),
+                                       this_model.ode_fun.expressions)
+    jacobian = make_symbolic_jacobian_from_reactions(this_model, variables)
+
+    assert set(jacobian) == set(reference)
+    for coord, derivative in jacobian.items():
+        assert simplify(derivative - reference[coord]) == 0
+
+
+def test_log_elasticities():
+    from skimpy.analysis.mca.utils import get_dlogx_dlogy
+
+    this_model = build_linear_pathway_model()
+    values = {p.symbol: 1.0 + 0.1*i
+              for i, p in enumerate(this_model.parameters.values())}
+    values.update({r.symbol: 0.5 + 0.3*i
+                   for i, r in enumerate(this_model.reactants.values())})
+
+    for this_reaction in this_model.reactions.values():
+        this_reaction.mechanism.get_qssa_rate_expression()
+        rate = this_reaction.mechanism.reaction_rates['v_net']
+        log_elasticities = this_reaction.mechanism.get_log_elasticities()
+
+        for x in rate.free_symbols:
+            closed_form = log_elasticities[x].subs(values)
+            reference = get_dlogx_dlogy(rate, x).subs(values)
+            assert float(closed_form) == pytest.approx(float(reference))
+
+
+def _make_convenience():
+    mechanism = make_convenience([-1, -1, 1])
+    reactants = mechanism.Reactants(substrate1='A', substrate2='B', product1='C')
+    return mechanism, reactants, {}
+
+
+def _make_hill():
+    mechanism = make_generalized_reversible_hill_n_n([-1, -1, 1, 1])
+    reactants = mechanism.Reactants(substrate1='A', substrate2='B',
+                                    product1='C', product2='D')
+    return mechanism, reactants, {}
+
+
+def _make_geek():
+    mechanism = make_generalized_elementary_kinetics([-1, 1], ['A', 'B', 'C'])
+    reactants = mechanism.Reactants(substrate1='A', product1='B')
+    inhibitors = mechanism.Inhibitors(A='A', B='B', C='C')
+    return mechanism, reactants, {'inhibitors': inhibitors}
+
+
+@pytest.mark.parametrize('make_mechanism', [_make_convenience, _make_hill, _make_geek])
+def test_mechanism_log_elasticities(make_mechanism):
+    import numpy as np
+    from skimpy.analysis.mca.utils import get_dlogx_dlogy
+
+    mechanism, reactants, options = make_mechanism()
+    this_model = KineticModel()
+    this_model.add_reaction(Reaction(name='R', mechanism=mechanism,
+                                     reactants=reactants, **options))
+    this_model.parametrize_by_reaction({'R': mechanism.Parameters(k_equilibrium=2.0)})
+
+    this_reaction = this_model.reactions['R']
+    this_reaction.mechanism.get_qssa_rate_expression()
+    rate = this_reaction.mechanism.reaction_rates['v_net']
+    log_elasticities = this_reaction.mechanism.get_log_elasticities()
+    assert log_elasticities is not None
+
+    random_state = np.random.RandomState(1)
+    values = {x: random_state.uniform(0.5, 2.0) for x in rate.free_symbols}
+
+    for x in rate.free_symbols:
+        closed_form = log_elasticities[x].subs(values)
+        reference = get_dlogx_dlogy(rate, x).subs(values)
+        assert float(closed_form) == pytest.approx(float(reference))
+
+
+def test_incremental_recompilation():
+    this_model = build_linear_pathway_model()
+    this_model.compile_ode(sim_type=QSSA, lazy=False)
+
+    metabolites = ReversibleMichaelisMenten.Reactants(substrate='C', product='F')
+    reaction = Reaction(name='E5',
+                        mechanism=ReversibleMichaelisMenten,
+                        reactants=metabolites)
+    this_model.add_reaction(reaction)
+    this_model.parametrize_by_reaction(
+        {'E5': ReversibleMichaelisMenten.Parameters(k_equilibrium=1.0)})
+
+    this_model.compile_ode(sim_type=QSSA, lazy=False)
+
+    report = this_model.rebuild_reports['ode']
+    assert report.rebuilt == ['E5']
+    assert report.reused == ['E1', 'E2', 'E3']
+
+
+def test_lazy_compilation():
+    this_model = build_linear_pathway_model()
+    this_model.compile_ode(sim_type=QSSA)
+
+    # Nothing is generated before the first use
+    assert not this_model.ode_fun.is_built
+    assert list(this_model.ode_fun.variables) == list(this_model.reactants)
+
+    this_model.warmup(['ode_fun'])
+    assert this_model.ode_fun.is_built
+    assert 'ode' in this_model.rebuild_reports
+
+
+def test_compiled_model_snapshot():
+    import pickle
+    import numpy as np
+    from skimpy.analysis.snapshot import CompiledModelSnapshot
+
+    this_model = build_linear_pathway_model()
+    for i, p in enumerate(this_model.parameters.values()):
+        p.value = 1.3 + 0.1*i
+    this_model.prepare()
+    this_model.compile_mca(sim_type=QSSA)
+    this_model.compile_ode(sim_type=QSSA)
+
+    snapshot = pickle.loads(pickle.dumps(CompiledModelSnapshot.from_model(this_model)))
+
+    concentrations = np.array([1.0, 1.2])
+    ydot = np.zeros(2)
+    this_model.ode_fun.get_parames()
+    this_model.ode_fun(0, concentrations, ydot)
+    assert np.allclose(snapshot.ode(concentrations), ydot)
+
+    parameters = {p.symbol: p.value for p in this_model.parameters.values()}
+    fluxes = snapshot.fluxes(concentrations)
+    jacobian = this_model.jacobian_fun(fluxes, concentrations, parameters)
+    assert np.allclose(snapshot.jacobian(fluxes, concentrations).toarray(),
+                       jacobian.toarray())
+
+
+def test_mechanism_registry():
+    from skimpy.mechanisms.mechanism import MECHANISM_SUBCLASSES
+
+    TheMechanism = make_convenience_with_inhibition([-1, 1], [1])
+    assert make_convenience_with_inhibition([-1, 1], [1]) is TheMechanism
+    assert MECHANISM_SUBCLASSES[TheMechanism.__name__] is TheMechanism
+
+    # Factories are told apart by the registry key, not the class name
+    irreversible = make_irrev_massaction([-1, 1])
+    assert make_rev_massaction([-1, 1]) is not irreversible
+
+    # Static mechanisms are found by walking the subclass tree
+    assert MECHANISM_SUBCLASSES['ReversibleMichaelisMenten'] is ReversibleMichaelisMenten
+
+
+def test_solver_statistics():
+    import numpy as np
+    from skimpy.core.solution import ODESolutionPopulation
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None:
+            p.value = 1.0
+    this_model.compile_ode(sim_type=QSSA)
+    for k in this_model.initial_conditions:
+        this_model.initial_conditions[k] = 1.0
+
+    solutions = [this_model.solve_ode(np.linspace(0.0, 1.0, 10)) for _ in range(2)]
+
+    statistics = solutions[0].statistics
+    assert statistics['success']
+    assert statistics['rhs_calls'] > 0
+    assert statistics['wall_time'] > 0
+
+    population = ODESolutionPopulation(solutions)
+    assert list(population.statistics['rhs_calls']) == \
+           [s.statistics['rhs_calls'] for s in solutions]
+
+
+def test_integration_budget():
+    import numpy as np
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None:
+            p.value = 1.0
+    this_model.compile_ode(sim_type=QSSA)
+    for k in this_model.initial_conditions:
+        this_model.initial_conditions[k] = 1.0
+
+    time_out = np.linspace(0.0, 10.0, 100)
+    solution = this_model.solve_ode(time_out, rhs_budget=20)
+    assert solution.statistics['status'] == RHS_BUDGET_EXCEEDED
+    assert len(solution.time) < len(time_out)
+
+    parameters = {k: p.value for k, p in this_model.parameters.items()}
+    population = this_model.solve_ode_population(time_out, [parameters, parameters],
+                                                 time_budget=0.0)
+    assert population.exceeded_budget == [0, 1]
+
+    # The budget only applies to the integration it was given for
+    solution = this_model.solve_ode(time_out)
+    assert solution.statistics['status'] == SOLVER_SUCCESS
+    assert len(solution.time) == len(time_out)
+
+
+def test_log_transform():
+    import numpy as np
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None:
+            p.value = 1.0
+    this_model.compile_ode(sim_type=QSSA)
+    for k in this_model.initial_conditions:
+        this_model.initial_conditions[k] = 1.0
+
+    time_out = np.linspace(0.0, 10.0, 20)
+    solution = this_model.solve_ode(time_out, rtol=1e-9, atol=1e-9)
+
+    this_model.compile_ode(sim_type=QSSA, log_transform=True)
+    log_solution = this_model.solve_ode(time_out, rtol=1e-9, atol=1e-9)
+
+    assert (log_solution.species > 0).all()
+    assert np.allclose(solution.species, log_solution.species, rtol=1e-4)
+
+
+def test_sparse_elementary():
+    import numpy as np
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None and not p.name.startswith(('k1_', 'k2_')):
+            p.value = 1.0
+
+    this_model.compile_ode(sim_type=ELEMENTARY, sparse_elementary=False)
+    expected = this_model.ode_fun.build()
+    this_model.compile_ode(sim_type=ELEMENTARY)
+    ode_fun = this_model.ode_fun.build()
+    assert list(ode_fun.variables) == list(expected.variables)
+
+    y = np.linspace(0.5, 2.0, len(ode_fun.variables))
+    result, reference = np.zeros(len(y)), np.zeros(len(y))
+    expected.get_parames()
+    expected(0, y, reference)
+    ode_fun.get_parames()
+    ode_fun(0, y, result)
+    assert np.allclose(result, reference)
+
+    # Analytic jacobian against finite differences
+    eps = 1e-7
+    jacobian = np.zeros((len(y), len(y)))
+    for k in range(len(y)):
+        shifted = y.copy()
+        shifted[k] += eps
+        this_result = np.zeros(len(y))
+        ode_fun(0, shifted, this_result)
+        jacobian[:, k] = (this_result - result)/eps
+    assert np.allclose(ode_fun.get_jacobian(y).toarray(), jacobian, atol=1e-5)
+
+
+def test_forward_sensitivities():
+    import numpy as np
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None:
+            p.value = 1.0
+    this_model.compile_ode(sim_type=QSSA)
+    for k in this_model.initial_conditions:
+        this_model.initial_conditions[k] = 1.0
+
+    time_out = np.linspace(0.0, 5.0, 11)
+    solution = this_model.solve_ode(time_out,
+                                    sensitivity_parameters=['vmax_forward_E1'],
+                                    rtol=1e-9, atol=1e-10)
+    assert solution.species.shape == (len(time_out), len(this_model.variables))
+
+    # Central finite differences of the concentrations
+    eps = 1e-6
+    parameter = this_model.parameters['vmax_forward_E1']
+    parameter.value = 1.0 + eps
+    upper = this_model.solve_ode(time_out, rtol=1e-10, atol=1e-12).species
+    parameter.value = 1.0 - eps
+    lower = this_model.solve_ode(time_out, rtol=1e-10, atol=1e-12).species
+    parameter.value = 1.0
+
+    sensitivities = solution.sensitivities.slice_by('parameter', 'vmax_forward_E1')
+    assert np.allclose(sensitivities.values, (upper - lower)/(2*eps), atol=1e-5)
+
+    # The block jacobian of the augmented system matches its difference
+    # quotients up to the coupling of the sensitivities to the concentrations
+    sensitivity_fun = this_model.sensitivity_fun
+    sensitivity_fun.get_parames()
+    n_variables = len(this_model.variables)
+    y = np.linspace(0.5, 1.5, 2*n_variables)
+    ydot = np.zeros(len(y))
+    sensitivity_fun(0, y, ydot)
+    reference = np.zeros((len(y), len(y)))
+    for k in range(len(y)):
+        shifted = y.copy()
+        shifted[k] += eps
+        this_ydot = np.zeros(len(y))
+        sensitivity_fun(0, shifted, this_ydot)
+        reference[:, k] = (this_ydot - ydot)/eps
+    jacobian = np.zeros((len(y), len(y)))
+    sensitivity_fun.jacobian(0, y, ydot, jacobian)
+    assert np.allclose(jacobian[:n_variables], reference[:n_variables], atol=1e-5)
+    assert np.allclose(jacobian[:, n_variables:], reference[:, n_variables:], atol=1e-5)
+
+
+def test_parameter_scan():
+    import numpy as np
+
+    this_model = build_linear_pathway_model()
+    for p in this_model.parameters.values():
+        if p.value is None:
+            p.value = 1.0
+    this_model.compile_ode(sim_type=QSSA)
+    for k in this_model.initial_conditions:
+        this_model.initial_conditions[k] = 1.0
+
+    # Direction in the space of two parameters
+    s = np.linspace(0.0, 1.0, 6)
+    scan = this_model.scan_parameters({'vmax_forward_E1': 1.0 + s,
+                                       'vmax_forward_E2': 1.0 + 0.5*s})
+    assert scan.statistics['converged'].all()
+    assert scan.folds == []
+    # The parameters are restored after the scan
+    assert this_model.parameters['vmax_forward_E1'].value == 1.0
+
+    this_model.parameters['vmax_forward_E1'].value = 2.0
+    this_model.parameters['vmax_forward_E2'].value = 1.5
+    solution = this_model.solve_ode(np.linspace(0.0, 1000.0, 3))
+    assert np.allclose(scan.concentrations.iloc[-1].values, solution.species[-1])
@@ -30,4 +30,73 @@ def test_parameter_sampling_linear_pathway():
                                           concentration_dict, seed = 20)
 
     assert(parameter_population_A == parameter_population_B)
-    assert( not(parameter_population_B == parameter_population_C))
\ No newline at end of file
+    assert( not(parameter_population_B == parameter_population_C))
+
+def test_saturation_jacobian_function():
+    import numpy as np
+    from sympy import Symbol
+
+    this_model = build_linear_pathway_model()
+
+    this_model.prepare(mca=True)
+    this_model.compile_jacobian(sim_type=QSSA)
+
+    flux_dict = {'E1': 1.0, 'E2': 1.0, 'E3': 1.0}
+    concentration_dict = {'A': 3.0, 'B': 2.0, 'C': 1.0, 'D': 0.5}
+    symbolic_concentrations_dict = {Symbol(k): v
+                                    for k, v in concentration_dict.items()}
+
+    sampler = SimpleParameterSampler(SimpleParameterSampler.Parameters(n_samples=1))
+    sampler._compile_sampling_functions(this_model,
+                                        symbolic_concentrations_dict,
+                                        flux_dict)
+
+    fluxes = [flux_dict[r] for r in this_model.reactions]
+    concentrations = [concentration_dict[r] for r in this_model.reactants]
+
+    saturations = sampler._sample_saturations(this_model, 5)
+    jacobians = this_model.saturation_jacobian_function.evaluate_batch(saturations)
+
+    for this_saturations, this_jacobian in zip(saturations, jacobians):
+        parameter_sample = sampler._sample_saturation_step_compiled(
+            this_model,
+            symbolic_concentrations_dict,
+            flux_dict,
+            saturations=this_saturations)
+        reference = this_model.jacobian_fun(fluxes, concentrations, parameter_sample)
+        assert np.allclose(this_jacobian, reference.toarray())
+
+    # The eigenvalues do not depend on the batches the jacobians are evaluated in
+    real_eigenvalues = np.sort(np.real(np.linalg.eigvals(jacobians)), axis=1)
+    for batch_size in [1, 2, None]:
+        assert np.allclose(this_model.saturation_jacobian_function
+                           .get_real_eigenvalues(saturations, batch_size=batch_size),
+                           real_eigenvalues)
+
+
+def test_control_coefficients_parameter_subset():
+    import numpy as np
+    from skimpy.utils.tabdict import TabDict
+
+    this_model = build_linear_pathway_model()
+    this_model.prepare(mca=True)
+    this_model.compile_mca(sim_type=QSSA, all_parameters=True)
+
+    flux_dict = {'E1': 1.0, 'E2': 1.0, 'E3': 1.0}
+    concentration_dict = {'A': 3.0, 'B': 2.0, 'C': 1.0, 'D': 0.5}
+
+    sampler = SimpleParameterSampler(SimpleParameterSampler.Parameters(n_samples=2))
+    parameter_population = sampler.sample(this_model, flux_dict, concentration_dict)
+
+    parameter_list = TabDict([(k, p.symbol) for k, p in this_model.parameters.items()
+                              if p.name.startswith('vmax_forward')])
+
+    all_fcc = this_model.flux_control_fun(flux_dict, concentration_dict,
+                                          parameter_population)
+    fcc = this_model.flux_control_fun(flux_dict, concentration_dict,
+                                      parameter_population,
+                                      parameter_list=parameter_list)
+
+    assert fcc._data.shape == (3, len(parameter_list), 2)
+    ix = [list(this_model.parameters).index(k) for k in parameter_list]
+    assert np.allclose(fcc._data, all_fcc._data[:, ix, :])
@@ -0,0 +1,99 @@
+import pytest
+
+from skimpy.utils.tabdict import TabDict
+
+
+def test_tabdict_iloc():
+    the_dict = TabDict([('a', 1), ('b', 2), ('c', 3)])
+
+    assert the_dict.iloc(1) == ('b', 2)
+    assert the_dict.iloc(-1) == ('c', 3)
+    assert the_dict.iloc([2, 0]) == [('c', 3), ('a', 1)]
+    assert the_dict.iloc(slice(0, 2)) == [('a', 1), ('b', 2)]
+
+    # The positions follow changes of the keys
+    the_dict['d'] = 4
+    del the_dict['a']
+    assert the_dict.iloc(0) == ('b', 2)
+    assert the_dict.iloc(-1) == ('d', 4)
+
+    the_dict.move_to_end('b')
+    assert the_dict.iloc(-1) == ('b', 2)
+
+
+def test_sparse_left_nullspace():
+    import numpy as np
+    from skimpy.utils.moieties import sparse_left_integer_nullspace
+
+    # A + atp -> B + adp, B + adp -> C + atp
+    S = np.array([[-1,  0],
+                  [ 1, -1],
+                  [ 0,  1],
+                  [-1,  1],
+                  [ 1, -1]])
+
+    L0 = sparse_left_integer_nullspace(S)
+
+    assert L0.shape == (3, 5)
+    assert not np.any(L0.dot(S))
+    assert np.linalg.matrix_rank(L0) == 3
+    assert np.all(L0 == np.round(L0))
+
+
+def test_shared_pool():
+    from skimpy.utils.parallel import get_pool, shutdown_pools
+
+    # Serial runs do not start any process
+    assert get_pool(1) is None
+
+    pool = get_pool(2)
+    assert get_pool(2) is pool
+
+    shutdown_pools()
+    assert get_pool(2) is not pool
+    shutdown_pools()
+
+
+# The optional dependencies must only be imported when they are used
+MINIMAL_ENTRY_POINTS = ['skimpy.analysis.snapshot', 'skimpy.core', 'skimpy.sampling']
+OPTIONAL_DEPENDENCIES = ['bokeh', 'deap', 'pytfa', 'cobra', 'scikits.odes', 'h5py']
+
+
+@pytest.mark.parametrize('module', MINIMAL_ENTRY_POINTS)
+def test_import_optional_dependencies(module):
+    import json
+    import subprocess
+    import sys
+
+    code = "import sys, json; import {0}; " \
+           "print(json.dumps(sorted(sys.modules)))".format(module)
+    output = subprocess.check_output([sys.executable, '-c', code])
+    imported = json.loads(output.decode().splitlines()[-1])
+
+    assert not [m for m in OPTIONAL_DEPENDENCIES if m in imported]
+
+
+def test_profiling():
+    from skimpy.utils.namespace import QSSA
+    from skimpy.utils.profiling import profiling, timer, count, get_profile_report, PROFILER
+    from tests.utils import build_linear_pathway_model
+
+    this_model = build_linear_pathway_model()
+
+    with profiling() as profiler:
+        this_model.compile_ode(sim_type=QSSA, lazy=False)
+        this_model.warmup()
+        with timer('custom'):
+            count('custom.events', 3)
+
+    report = profiler.report()
+    for phase in ['ode.derivation', 'ode.build', 'code_generation', 'custom']:
+        assert report['timers'][phase]['calls'] >= 1
+    assert report['counters']['custom.events'] == 3
+
+    # Nothing is recorded when the profiling is disabled
+    if not PROFILER.enabled:
+        with timer('disabled'):
+            count('disabled.events')
+        assert 'disabled' not in get_profile_report()['timers']
+        assert 'disabled.events' not in get_profile_report()['counters']
@@ -87,3 +87,29 @@ def build_linear_pathway_model():
                                         'E2': parameters_2,
                                         'E3': parameters_3})
     return this_model
+
+
+def build_chain_model(n_reactions):
+    # Generated linear chain A_0 -> A_1 -> ... -> A_n with convenience kinetics
+    from skimpy.mechanisms import make_convenience
+    TheMechanism = make_convenience([-1, 1])
+
+    this_model = KineticModel(name='chain_{}'.format(n_reactions))
+    parameters = dict()
+    for i in range(n_reactions):
+        reactants = TheMechanism.Reactants(substrate1='A_{}'.format(i),
+                                           product1='A_{}'.format(i + 1))
+        reaction = Reaction(name='R_{}'.format(i),
+                            mechanism=TheMechanism,
+                            reactants=reactants)
+        this_model.add_reaction(reaction)
+        parameters[reaction.name] = TheMechanism.Parameters(vmax_forward=1.0,
+                                                            k_equilibrium=2.0,
+                                                            km_substrate1=1.0 + i,
+                                                            km_product1=2.0 + i)
+
+    the_boundary_condition = ConstantConcentration(this_model.reactants['A_0'])
+    this_model.add_boundary_condition(the_boundary_condition)
+
+    this_model.parametrize_by_reaction(parameters)
+    return this_model